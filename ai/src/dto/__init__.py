@@ -3,3 +3,5 @@ from .predict_series_query import *
 from .result import *
 from .update_predict_status import *
 from .ml_model_type import *
+from .staged_series import *
+from .model_input_format import *
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class ModelInputFormat(str, Enum):
+    """Format of the series handed to the model servers"""
+    DICOM = "dicom" # Folder of the DICOM files
+    PNG = "png" # Folder of the PNG images
+    VOLUME = "volume" # Memory-mapped `.npy` volume with a JSON sidecar
@@ -7,3 +7,4 @@ class PredictSeriesQuery(BaseModel):
     modality: str # CT, PT, MR, etc.
     model_type: MLModelType
     body_part: str | None # Optional, Neck, Chest, Abdomen, None
+    dicom_url: str | None = None # The DICOMweb URL of the PACS of the series, the DICOM SEG of the masks are stored to it
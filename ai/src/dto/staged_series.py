@@ -0,0 +1,5 @@
+from .base_model import BaseModel
+
+class StagedSeries(BaseModel):
+    """Reference to a series staged by the backend in the shared staging directory"""
+    manifest_path: str # The path of the series manifest.json relative to the shared staging directory
@@ -1,16 +1,19 @@
 import litserve as ls
 from pathlib import Path
-import os
+import shutil
 import numpy as np
 import nibabel as nib
 import pydicom
-import zipfile
-import base64
-from io import BytesIO
 from totalsegmentator.python_api import totalsegmentator
 from enums import DLModelEndpoint
+from common import (
+    ArtifactStore, ReadinessGate, get_artifact_store, get_ordered_files, get_server_address, get_server_options, load_slice_index,
+)
 
 class TotalSegmentorAPI(ls.LitAPI):
+    readiness: ReadinessGate | None = None  # Set by the server, the worker reports ready after its setup
+    artifacts: ArtifactStore | None = None  # Set by the server, the outputs are downloaded from its `/artifacts` endpoint
+
     def setup(self, device: str):
         # setup is called once at startup. Add task options here if needed
         self.tasks = [
@@ -18,6 +21,13 @@ class TotalSegmentorAPI(ls.LitAPI):
             "tissue_types", "tissue_types_mr", "face", "face_mr"
         ]
 
+        if self.artifacts is None:
+            self.artifacts = get_artifact_store("ABDOMINAL_ORGANS")
+
+        # TotalSegmentator loads its models on each run, a synthetic run would take as long as a real one
+        if self.readiness:
+            self.readiness.mark_ready()
+
     def decode_request(self, request: dict) -> tuple:
         # Decode the request to extract dicom folder and task information
         dicom_folder = Path(request["folder_path"])
@@ -51,11 +61,10 @@ class TotalSegmentorAPI(ls.LitAPI):
                 print(f"Error reading file {file_path}: {e}")
                 return None
 
-        dicom_files = [f for f in os.listdir(dicom_folder) if f.lower().endswith(('.dcm', '.ima'))]
-        dicom_files.sort()
+        dicom_files = get_ordered_files(dicom_folder, ('.dcm', '.ima'))
 
-        # Read DICOM files
-        slices = [safe_read_dicom(dicom_folder / f) for f in dicom_files]
+        # Read DICOM files in the slice order
+        slices = [safe_read_dicom(f) for f in dicom_files]
         slices = [s for s in slices if s is not None]
         
         if not slices:
@@ -65,26 +74,26 @@ class TotalSegmentorAPI(ls.LitAPI):
         pixel_arrays = [s.pixel_array for s in slices]
         volume = np.stack(pixel_arrays, axis=-1)
         
-        # Get metadata for affine transformation
-        first_slice = slices[0]
-        pixel_spacing = getattr(first_slice, 'PixelSpacing', [1, 1])
-        slice_thickness = getattr(first_slice, 'SliceThickness', 1)
+        # Get metadata for affine transformation from the slice index, read from the headers when the series was ingested
+        first_slice = self.get_first_slice_geometry(dicom_folder, slices[0])
+        pixel_spacing = first_slice['pixel_spacing'] or [1, 1]
+        slice_thickness = first_slice['slice_thickness'] or 1
         
         affine = np.eye(4)
         affine[0, 0] = pixel_spacing[1]
         affine[1, 1] = pixel_spacing[0]
         affine[2, 2] = slice_thickness
         
-        if hasattr(first_slice, 'ImageOrientationPatient'):
-            row_cosine = np.array(first_slice.ImageOrientationPatient[:3])
-            col_cosine = np.array(first_slice.ImageOrientationPatient[3:])
+        if first_slice['orientation']:
+            row_cosine = np.array(first_slice['orientation'][:3])
+            col_cosine = np.array(first_slice['orientation'][3:])
             slice_cosine = np.cross(row_cosine, col_cosine)
             affine[:3, 0] = row_cosine * pixel_spacing[1]
             affine[:3, 1] = col_cosine * pixel_spacing[0]
             affine[:3, 2] = slice_cosine * slice_thickness
             
-            if hasattr(first_slice, 'ImagePositionPatient'):
-                affine[:3, 3] = first_slice.ImagePositionPatient
+            if first_slice['position']:
+                affine[:3, 3] = first_slice['position']
         
         # Create NIfTI image and save it
         nifti_img = nib.Nifti1Image(volume, affine)
@@ -92,6 +101,31 @@ class TotalSegmentorAPI(ls.LitAPI):
         print('output_nifti_path: ', output_nifti_path)
         return output_nifti_path
 
+    def get_first_slice_geometry(self, dicom_folder: Path, first_dataset: pydicom.Dataset) -> dict:
+        """
+        Gets the pixel spacing, slice thickness, orientation and position of the first slice.
+
+        Parameters:
+        - dicom_folder: Path of the DICOM folder.
+        - first_dataset: The dataset of the first slice, used when the series has no slice index.
+
+        Returns:
+        - A dictionary with the `pixel_spacing`, `slice_thickness`, `orientation` and `position` of the first slice.
+        """
+        slice_index = load_slice_index(dicom_folder)
+        if slice_index:
+            return slice_index[0]
+        
+        def to_floats(value):
+            return [float(v) for v in value] if value else None
+        
+        return {
+            'pixel_spacing': to_floats(getattr(first_dataset, 'PixelSpacing', None)),
+            'slice_thickness': getattr(first_dataset, 'SliceThickness', None),
+            'orientation': to_floats(getattr(first_dataset, 'ImageOrientationPatient', None)),
+            'position': to_floats(getattr(first_dataset, 'ImagePositionPatient', None)),
+        }
+
     def run_totalsegmentor(self, input_nifti_file: Path, output_folder: Path, task: str, fast: bool, statistics: bool):
         """
         Runs TotalSegmentator on the input NIfTI file.
@@ -117,32 +151,22 @@ class TotalSegmentorAPI(ls.LitAPI):
             device='gpu'
         )
 
-    def zip_output_folder(self, folder: Path) -> str:
-        """
-        Zips the output folder and returns the base64-encoded string of the zipped content.
-
-        Parameters:
-        - folder: Path to the folder to be zipped.
+    def batch(self, inputs: list[tuple]) -> list[tuple]:
+        # Keep the decoded requests of the batch as a list, each series is segmented on its own
+        return list(inputs)
 
-        Returns:
-        - Base64-encoded string of the zipped folder content.
-        """
-        if not folder.exists():
-            return None
+    def predict(self, payload: tuple | list[tuple]) -> dict | list[dict]:
+        # TotalSegmentator runs on a single NIfTI volume, the series of a batch are segmented one after the other
+        if isinstance(payload, list):
+            return [self.segment_series(request) for request in payload]
         
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for root, _, files in os.walk(folder):
-                for file in files:
-                    file_path = Path(root) / file
-                    zip_file.write(file_path, arcname=file_path.relative_to(folder))
-        
-        # Get the base64-encoded string
-        zip_buffer.seek(0)
-        encoded_zip = base64.b64encode(zip_buffer.read()).decode('utf-8')
-        return encoded_zip
+        return self.segment_series(payload)
+
+    def unbatch(self, output: list[dict]) -> list[dict]:
+        # Return the segmentation results of each request of the batch
+        return list(output)
 
-    def predict(self, payload: tuple) -> dict:
+    def segment_series(self, payload: tuple) -> dict:
         dicom_folder, output_nifti_path, task, fast, statistics = payload
         
         # Convert DICOM folder to NIfTI
@@ -154,15 +178,22 @@ class TotalSegmentorAPI(ls.LitAPI):
         # Run TotalSegmentator
         self.run_totalsegmentor(nifti_path, output_folder, task, fast, statistics)
 
-        # Zip and encode the output folder
-        encoded_zip = self.zip_output_folder(output_folder)
-        return {"output": encoded_zip}
+        # Move the output files to the artifact store, the response only carries their manifest
+        artifacts = self.artifacts.put_folder(output_folder)
+        shutil.rmtree(output_folder, ignore_errors=True)
+        return {"output": artifacts or None}
 
     def encode_response(self, output: dict) -> dict:
-        # Return base64-encoded zipped segmentation results
+        # Return the manifest of the segmentation results, the files are downloaded from `/artifacts/{id}`
         return {"output": output["output"]}
 
 if __name__ == "__main__":
-    port, api_path = DLModelEndpoint.ABDOMINAL_ORGANS_SEGMENTATION.strip().split(":")[-1].split("/")
-    server = ls.LitServer(TotalSegmentorAPI(), accelerator='cuda', devices=1, max_batch_size=1, api_path="/{api_path}")
+    port, api_path = get_server_address("ABDOMINAL_ORGANS", DLModelEndpoint.ABDOMINAL_ORGANS_SEGMENTATION.value)
+    options = get_server_options("ABDOMINAL_ORGANS", max_batch_size=1)
+    api = TotalSegmentorAPI()
+    api.readiness = ReadinessGate(options["devices"] * options["workers_per_device"])
+    api.artifacts = get_artifact_store("ABDOMINAL_ORGANS")
+    server = ls.LitServer(api, api_path=api_path, **options)
+    api.readiness.add_endpoint(server.app)  # GET /ready reports ready once all the workers are set up
+    api.artifacts.add_endpoint(server.app)  # GET /artifacts/{id} streams an output file, with `Range` support
     server.run(port=port)
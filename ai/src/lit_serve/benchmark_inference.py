@@ -0,0 +1,106 @@
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+import torch
+import torchxrayvision as xrv
+from ultralytics import YOLO
+from enums import DLModelWeights
+from common import create_onnx_session, get_quantized_model_path
+
+
+def measure(run, batch_size: int, repeats: int) -> tuple[float, float]:
+    """
+    Measures the latency of a forward pass, after a warm-up pass.
+
+    Parameters:
+    - run: The function running a forward pass of the batch.
+    - batch_size: Number of slices of the batch.
+    - repeats: Number of measured forward passes.
+
+    Returns:
+    - A tuple containing the mean and the 95th percentile of the latency per slice in milliseconds.
+    """
+    run()  # Warm-up pass, excluded from the measures
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - start) * 1000 / batch_size)
+
+    return float(np.mean(latencies)), float(np.percentile(latencies, 95))
+
+
+def benchmark_chest_xray(batch_sizes: list[int], repeats: int, threads: int) -> list[tuple]:
+    """
+    Benchmarks the X-ray DenseNet with eager PyTorch and ONNX Runtime (FP32 and INT8) on the CPU.
+    """
+    rows = []
+    model = xrv.models.get_model(DLModelWeights.CHEST_XRAY.value).eval()
+    onnx_path = Path(DLModelWeights.CHEST_XRAY_ONNX.value)
+    sessions = {
+        name: create_onnx_session(path, intra_op_threads=threads)
+        for name, path in (("onnx", onnx_path), ("onnx-int8", get_quantized_model_path(onnx_path)))
+        if path.exists()
+    }
+
+    for batch_size in batch_sizes:
+        images = np.random.uniform(-1024, 1024, (batch_size, 1, 224, 224)).astype(np.float32)
+
+        def run_torch():
+            with torch.no_grad():
+                model(torch.from_numpy(images))
+
+        rows.append(("chest_xray", "torch", batch_size, *measure(run_torch, batch_size, repeats)))
+
+        for name, session in sessions.items():
+            input_name = session.get_inputs()[0].name
+            rows.append(("chest_xray", name, batch_size, *measure(lambda: session.run(None, {input_name: images}), batch_size, repeats)))
+
+    return rows
+
+
+def benchmark_lung_ct(batch_sizes: list[int], repeats: int) -> list[tuple]:
+    """
+    Benchmarks the YOLOv8 lung model with eager PyTorch and ONNX Runtime (FP32 and INT8) on the CPU,
+    including the YOLO pre and post processing.
+    """
+    rows = []
+    onnx_path = Path(DLModelWeights.LUNG_CT_ONNX.value)
+    models = {"torch": YOLO(DLModelWeights.LUNG_CT.value)}
+    models.update({
+        name: YOLO(str(path), task="segment")
+        for name, path in (("onnx", onnx_path), ("onnx-int8", get_quantized_model_path(onnx_path)))
+        if path.exists()
+    })
+
+    for batch_size in batch_sizes:
+        images = [np.random.randint(0, 255, (512, 512, 3), dtype=np.uint8) for _ in range(batch_size)]
+
+        for name, model in models.items():
+            run = lambda: list(model.predict(images, device="cpu", stream=True, verbose=False))
+            rows.append(("lung_ct", name, batch_size, *measure(run, batch_size, repeats)))
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the per-slice CPU latency of eager PyTorch and ONNX Runtime")
+    parser.add_argument("models", nargs="*", choices=["chest_xray", "lung_ct"], default=["chest_xray", "lung_ct"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32], help="Number of slices per forward pass")
+    parser.add_argument("--repeats", type=int, default=10, help="Number of measured forward passes per batch size")
+    parser.add_argument("--threads", type=int, default=0, help="Threads of PyTorch and ONNX Runtime, 0 for the default")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    rows = []
+    if "chest_xray" in args.models:
+        rows += benchmark_chest_xray(args.batch_sizes, args.repeats, args.threads)
+    if "lung_ct" in args.models:
+        rows += benchmark_lung_ct(args.batch_sizes, args.repeats)
+
+    print(f"{'model':<12}{'backend':<12}{'batch':>6}{'mean ms/slice':>16}{'p95 ms/slice':>16}")
+    for model_name, backend, batch_size, mean, p95 in rows:
+        print(f"{model_name:<12}{backend:<12}{batch_size:>6}{mean:>16.2f}{p95:>16.2f}")
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import litserve as ls
 import cv2
@@ -7,9 +8,14 @@ import tensorflow as tf
 from collections import Counter
 from tensorflow.keras.models import load_model
 from enums import DLModelEndpoint, DLModelWeights, LLMPPrompt
+from common import (
+    ReadinessGate, get_ordered_files, get_server_address, get_server_options, get_warmup_batch_sizes,
+    analyze_masks, get_masks_path, load_slice_index, load_volume, save_masks, scale_to_unit, split_batch, warm_up,
+)
 import requests
 
 class BrainMRIAPI(ls.LitAPI):
+    readiness: ReadinessGate | None = None  # Set by the server, the worker reports ready after its warm-up
 
     def load_segmentation_model(self) -> tf.keras.Model:
         """
@@ -32,8 +38,23 @@ class BrainMRIAPI(ls.LitAPI):
         self.model = self.load_segmentation_model()
         with tf.device('/cpu:0'): 
             self.tf_model = load_model(DLModelWeights.BRAIN_MRI_CLASSIFICATION.value)
+        self.classification_batch_size = int(os.getenv("BRAIN_MRI_CLASSIFICATION_BATCH_SIZE") or 32)
         print("[INFO]: Classification Model loaded")
         print('DEVICE: ', self.device)
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """
+        Runs the segmentation and classification models on blank slices at their input shapes,
+        so the TF graphs are built before the first request, then reports the worker as ready.
+        """
+        def run(batch_size: int):
+            self.model.predict(np.zeros((batch_size, 256, 256, 1), dtype=np.float32), verbose=0)
+            self.predict_classes(np.zeros((batch_size, 150, 150, 3), dtype=np.uint8))
+
+        warm_up("Brain MRI", run, get_warmup_batch_sizes("BRAIN_MRI", (1, 32)))
+        if self.readiness:
+            self.readiness.mark_ready()
 
     def normalize(self, data: np.ndarray) -> np.ndarray:
         """
@@ -45,7 +66,7 @@ class BrainMRIAPI(ls.LitAPI):
         Returns:
         - Normalized numpy array.
         """
-        return data.astype(np.float32) / np.max(data)
+        return scale_to_unit(data)
 
     def grab_and_resize_images(self, folder_path: str, img_size: tuple = (256, 256)) -> tuple:
         """
@@ -60,8 +81,7 @@ class BrainMRIAPI(ls.LitAPI):
         """
         all_images: list = []
         org_shape = None
-        for img_path in sorted(Path(folder_path).glob('*')):
-            if img_path.suffix.lower() not in ['.png', '.jpeg', '.jpg']: continue
+        for img_path in get_ordered_files(folder_path, ('.png', '.jpeg', '.jpg')):
             img: np.ndarray = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
             if org_shape is None: org_shape = img.shape[:2]
             img = cv2.resize(img, img_size)
@@ -69,77 +89,83 @@ class BrainMRIAPI(ls.LitAPI):
         
         return all_images, org_shape
 
-    def prepare_input(self, folder_path: str) -> tuple:
+    def grab_and_resize_volume(self, volume_path: str, img_size: tuple = (256, 256)) -> tuple:
+        """
+        Reads the slices of the memory-mapped `.npy` volume, resizes them, and returns the list of images and the original shape.
+        The volume holds the same grayscale pixels as the PNG images, without the PNG decoding.
+
+        Parameters:
+        - volume_path: Path to the `.npy` volume.
+        - img_size: Tuple specifying the resize dimensions (default: (256, 256)).
+
+        Returns:
+        - A tuple containing a list of resized images and the original image shape.
+        """
+        volume, _ = load_volume(volume_path)
+        all_images = [cv2.resize(np.asarray(img), img_size) for img in volume]
+        return all_images, volume.shape[1:3] if len(volume) else None
+
+    def prepare_input(self, folder_path: str, volume_path: str | None = None) -> tuple:
         """
         Prepares the input data for the model by loading and resizing the images,
         and normalizing the image array.
 
         Parameters:
         - folder_path: Path to the folder containing the images.
+        - volume_path: Optional path to the `.npy` volume, used instead of the images.
 
         Returns:
         - A tuple containing the normalized image array and the original image shape.
         """
-        all_images, org_image_shape = self.grab_and_resize_images(folder_path)
-        arr: np.ndarray = np.array(all_images, dtype=np.float64)
+        if volume_path:
+            all_images, org_image_shape = self.grab_and_resize_volume(volume_path)
+        else:
+            all_images, org_image_shape = self.grab_and_resize_images(folder_path)
+        arr: np.ndarray = np.array(all_images, dtype=np.float32)
         img = np.expand_dims(arr, axis=-1)
         img = self.normalize(img)
         
         return img, org_image_shape
 
-    def process_file(self, folder_path: str, accuracy_threshold: float) -> tuple:
+    def process_files(self, batch: list[tuple]) -> list[tuple]:
         """
-        Processes the input images, predicts the segmentation mask, and applies the accuracy threshold.
+        Processes the input images of the batched requests, predicts their segmentation masks in a single pass,
+        and applies the accuracy threshold of each request.
 
         Parameters:
-        - folder_path: Path to the folder containing the images.
-        - accuracy_threshold: Threshold for model prediction accuracy.
+        - batch: The decoded requests, each with folder path, accuracy threshold, pixel spacing and volume path.
 
         Returns:
-        - A tuple containing the input images, binary mask, and original image shape.
+        - A list containing the input images, binary mask, and original image shape of each request.
         """
         with torch.no_grad():
-            input_feed, org_image_shape = self.prepare_input(folder_path)
+            inputs = [self.prepare_input(folder_path, volume_path) for folder_path, _, _, volume_path in batch]
+            input_feeds = [input_feed for input_feed, _ in inputs]
+            input_feed = np.concatenate([feed for feed in input_feeds if len(feed)] or [np.empty((0, 256, 256, 1), dtype=np.float32)])
             print("Input loaded:", input_feed.shape)
 
-            output = self.model.predict(input_feed)
-            mask_binary = (output > accuracy_threshold).astype(np.uint8)
-            print("Output computed:", mask_binary.shape)
+            output = self.model.predict(input_feed) if len(input_feed) else np.empty((0, 256, 256, 1), dtype=np.float32)
+            print("Output computed:", output.shape)
 
-            return input_feed, mask_binary, org_image_shape
+            # Split the masks back to the requests and apply their thresholds
+            outputs = split_batch(output, [len(feed) for feed in input_feeds])
+            return [
+                (feed, (request_output > accuracy_threshold).astype(np.uint8), org_image_shape)
+                for (feed, org_image_shape), request_output, (_, accuracy_threshold, _, _) in zip(inputs, outputs, batch)
+            ]
         
     def decode_request(self, request: dict) -> tuple:
         """
-        Decodes the incoming request to extract folder path, accuracy threshold, and pixel spacing.
+        Decodes the incoming request to extract folder path, accuracy threshold, pixel spacing and the optional volume path.
 
         Parameters:
         - request: Dictionary containing the request parameters.
 
         Returns:
-        - A tuple containing folder path, accuracy threshold, and pixel spacing.
+        - A tuple containing folder path, accuracy threshold, pixel spacing and volume path.
         """
-        return request["folder_path"], request.get("accuracy_threshold", 0.85), request.get('pixel_spacing', [0.5,0.5])  # in mm
+        return request.get("folder_path"), request.get("accuracy_threshold", 0.85), request.get('pixel_spacing', [0.5,0.5]), request.get("volume_path")  # in mm
 
-    def filter_slices(self, numpy_array: np.ndarray) -> list:
-        """
-        Filters the slices based on the area of the detected tumor segmentation.
-
-        Parameters:
-        - numpy_array: Numpy array containing the segmentation masks.
-
-        Returns:
-        - A list of indices for slices with sufficient tumor area.
-        """
-        wanted_slices = []
-        for i in range(numpy_array.shape[0]):
-            target_slice = numpy_array[i].squeeze()
-            x = np.count_nonzero(target_slice)
-            mul = target_slice.shape[0] * target_slice.shape[1]
-            if round(x/mul, 2) >= 0.015:
-                wanted_slices.append(i)
-
-        return wanted_slices
-    
     def classify(self, normalized_input: np.ndarray, wanted_slices_indx: list, 
                  names: list = ["Glioma Tumor", "No Tumor", "Meningioma Tumor", "Pituitary Tumor"]) -> list:
         """
@@ -153,51 +179,78 @@ class BrainMRIAPI(ls.LitAPI):
         Returns:
         - List of classification results for each slice.
         """
-        slices = normalized_input[wanted_slices_indx].squeeze()
-        predictions = []
-        for indx, img in enumerate(slices):
-            norm_channel = cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-            opencvImage = cv2.cvtColor(norm_channel, cv2.COLOR_GRAY2RGB)
-            img = cv2.resize(opencvImage,(150,150))
-            img = img.reshape(1,150,150,3)
-            p = self.tf_model.predict(img)
-            p = np.argmax(p,axis=1)[0]
-
-            res = names[p]
-            predictions.append(res)
+        if not wanted_slices_indx:
+            return []
+        
+        images = self.prepare_classification_input(normalized_input[wanted_slices_indx, :, :, 0])
+        predictions = [names[p] for p in np.argmax(self.predict_classes(images), axis=1)]
+
+        for indx, res in enumerate(predictions):
             print(f'Slice #{indx:2d}: The model predicts that there is {res}')
 
         return predictions
+
+    def prepare_classification_input(self, slices: np.ndarray, img_size: tuple = (150, 150)) -> np.ndarray:
+        """
+        Prepares a stack of slices for the classification model at once:
+        scales each slice to 0-255 by its min and max, resizes it and repeats it to the RGB channels.
+
+        Parameters:
+        - slices: The slices to classify, of shape (slices, height, width).
+        - img_size: Tuple specifying the resize dimensions (default: (150, 150)).
+
+        Returns:
+        - The uint8 images of shape (slices, 150, 150, 3).
+        """
+        # Min-max scaling of each slice, a constant slice is black
+        mins = slices.min(axis=(1, 2), keepdims=True)
+        ranges = slices.max(axis=(1, 2), keepdims=True) - mins
+        scales = np.divide(255, ranges, out=np.zeros_like(ranges), where=ranges > 0)
+        scaled = ((slices - mins) * scales).astype(np.uint8)
+
+        # OpenCV resizes up to 512 channels at once, the slices are stacked as the channels of a single image
+        channels = np.ascontiguousarray(scaled.transpose(1, 2, 0))
+        resized = np.concatenate([
+            cv2.resize(channels[:, :, start:start + 512], img_size).reshape(*img_size[::-1], -1)
+            for start in range(0, channels.shape[2], 512)
+        ], axis=2)
+
+        # The grayscale slices repeated to the RGB channels
+        return np.repeat(resized.transpose(2, 0, 1)[..., None], 3, axis=-1)
+
+    def predict_classes(self, images: np.ndarray) -> np.ndarray:
+        """
+        Runs the classification model on all the images in a single call, split in batches of `BRAIN_MRI_CLASSIFICATION_BATCH_SIZE`.
+
+        Parameters:
+        - images: The uint8 images of shape (slices, 150, 150, 3).
+
+        Returns:
+        - The class probabilities of each image.
+        """
+        return self.tf_model.predict(images, batch_size=self.classification_batch_size, verbose=0)
     
-    def calculate_biggest_tumor_area(self, masks_array: np.ndarray, org_image_shape: tuple, pixel_spacing: list) -> float:
+    def measure_tumor(self, masks_array: np.ndarray, org_image_shape: tuple, pixel_spacing: list, series_folder: Path) -> dict:
         """
-        Calculates the area of the largest detected tumor in the MRI images.
+        Measures the segmentation masks in one pass: the slices with a tumor, the area of the largest tumor,
+        and the tumor volume of each slice and of the series.
 
         Parameters:
         - masks_array: Numpy array of segmentation masks.
         - org_image_shape: Tuple of the original image shape.
         - pixel_spacing: List of pixel spacing values.
+        - series_folder: Folder of the series, its slice index gives the slice thickness.
 
         Returns:
-        - The area of the largest tumor in mm².
+        - The measurements returned by `analyze_masks`, the areas in mm² and the volumes in mm³.
         """
-        flattened_masks = masks_array.squeeze(-1)
-        non_zero_counts = np.count_nonzero(flattened_masks, axis=(1, 2))
-
-        max_index = np.argmax(non_zero_counts)
-        print(f"Index of the mask with the largest non-zero values: {max_index}")
-
-        target_mask = masks_array[max_index].squeeze()
-        y_factor = target_mask.shape[0] / org_image_shape[0]
-        x_factor = target_mask.shape[1] / org_image_shape[1]
-        cnts = cv2.findContours(target_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
-        biggest_contour = max(cnts, key = cv2.contourArea)
-        area = cv2.contourArea(biggest_contour)
+        slice_index = load_slice_index(series_folder)
+        slice_thickness = (slice_index[0].get("slice_thickness") if slice_index else None) or 1.0
 
-        real_area = (area * x_factor * y_factor) * (pixel_spacing[0] * pixel_spacing[1])
+        # A mask pixel covers several pixels of the original image
+        scale = (org_image_shape[0] / masks_array.shape[1], org_image_shape[1] / masks_array.shape[2]) if org_image_shape else (1.0, 1.0)
+        return analyze_masks(masks_array, pixel_spacing or [0.5, 0.5], slice_thickness, scale)
 
-        return round(real_area, 2)
-    
     def call_llm(self, classifications: list, tumor_area: float) -> str:
         """
         Calls the LLM to generate a response based on the classifications and tumor area.
@@ -224,47 +277,88 @@ class BrainMRIAPI(ls.LitAPI):
 
         return response.json()['output']
 
-    def predict(self, payload: tuple) -> tuple:
+    def batch(self, inputs: list[tuple]) -> list[tuple]:
+        """
+        Keeps the decoded requests of the batch as a list, their images are stacked in `process_files`.
+
+        Parameters:
+        - inputs: The decoded requests.
+
+        Returns:
+        - The list of the decoded requests.
         """
-        Predicts the tumor segmentation and classification.
+        return list(inputs)
+
+    def predict(self, payload: tuple | list[tuple]) -> tuple | list[tuple]:
+        """
+        Predicts the tumor segmentation and classification of a request or of a batch of requests.
 
         Parameters:
-        - payload: A tuple containing folder path, accuracy threshold, and pixel spacing.
+        - payload: A tuple containing folder path, accuracy threshold, pixel spacing and volume path, or a list of them.
 
         Returns:
-        - A tuple containing saved path, wanted slice indices, classifications, and LLM response.
+        - A tuple containing saved path, wanted slice indices, classifications, LLM response and tumor measurements, for each request of a batch.
         """
-        folder_path, accuracy_threshold, pixel_spacing = payload
-        input_feed, masks_array, org_image_shape = self.process_file(folder_path, accuracy_threshold)
-        tumor_area = self.calculate_biggest_tumor_area(masks_array, org_image_shape, pixel_spacing)
+        batch = payload if isinstance(payload, list) else [payload]
+        outputs = []
+
+        for (folder_path, _, pixel_spacing, volume_path), (input_feed, masks_array, org_image_shape) in zip(batch, self.process_files(batch)):
+            series_folder = Path(volume_path or folder_path).parent
+            measurements = self.measure_tumor(masks_array, org_image_shape, pixel_spacing, series_folder)
+
+            wanted_slices_indx = measurements["wanted_slices"]
+            print('wanted_slices_indx: ', wanted_slices_indx)
 
-        wanted_slices_indx = self.filter_slices(masks_array)
-        print('wanted_slices_indx: ', wanted_slices_indx)
-        save_path = 'brain_tumor_masks.npy'
-        np.save(save_path, masks_array)
-        classifications = self.classify(input_feed, wanted_slices_indx)
+            # Save the bit-packed masks next to the series with a unique name, the requests of a batch can't share a file
+            masks_path = get_masks_path(series_folder, "brain_mri")
+            save_path = str(save_masks(masks_array[..., 0], masks_path, {"image_shape": list(org_image_shape or ())}).resolve())
+            classifications = self.classify(input_feed, wanted_slices_indx)
 
-        llm_response = self.call_llm(classifications, tumor_area)
+            llm_response = self.call_llm(classifications, measurements["largest_area"])
+            outputs.append((save_path, wanted_slices_indx, classifications, llm_response, measurements))
             
-        return save_path, wanted_slices_indx, classifications, llm_response
+        return outputs if isinstance(payload, list) else outputs[0]
+
+    def unbatch(self, output: list[tuple]) -> list[tuple]:
+        """
+        Returns the prediction results of each request of the batch.
+
+        Parameters:
+        - output: The list of the prediction results.
+
+        Returns:
+        - The prediction results of each request.
+        """
+        return list(output)
 
     def encode_response(self, output: tuple) -> dict:
         """
         Encodes the response for the API.
 
         Parameters:
-        - output: Tuple containing the saved path, slice indices, classifications, and LLM response.
+        - output: Tuple containing the saved path, slice indices, classifications, LLM response and tumor measurements.
 
         Returns:
-        - Dictionary containing the encoded response.
+        - Dictionary containing the encoded response, the tumor area in mm² and the tumor volumes in mm³.
         """
-        save_path, wanted_slices_indx, classifications, llm_response = output
+        save_path, wanted_slices_indx, classifications, llm_response, measurements = output
         prediction = [{"slice": indx, "classification": tumor} for (indx, tumor) in zip(wanted_slices_indx, classifications)]
         if not prediction: 
             save_path = None
-        return {"output": save_path, "predictions": prediction, 'llm': llm_response}
+        return {
+            "output": save_path,
+            "predictions": prediction,
+            'llm': llm_response,
+            "tumor_area": measurements["largest_area"],
+            "tumor_volume": measurements["total_volume"],
+            "slice_volumes": measurements["slice_volumes"],
+        }
 
 if __name__ == "__main__":
-    port, api_path = DLModelEndpoint.BRAIN_MRI.strip().split(":")[-1].split("/")
-    server = ls.LitServer(BrainMRIAPI(), accelerator='cuda', devices=1, max_batch_size=1, api_path=f'/{api_path}')
+    port, api_path = get_server_address("BRAIN_MRI", DLModelEndpoint.BRAIN_MRI.value)
+    options = get_server_options("BRAIN_MRI", max_batch_size=4, batch_timeout=0.05)
+    api = BrainMRIAPI()
+    api.readiness = ReadinessGate(options["devices"] * options["workers_per_device"])
+    server = ls.LitServer(api, api_path=api_path, **options)
+    api.readiness.add_endpoint(server.app)  # GET /ready reports ready once all the workers are warm
     server.run(port=port)
@@ -3,12 +3,18 @@ import litserve as ls
 import requests
 import torch
 import numpy as np
-from enums import DLModelEndpoint, DLModelWeights, LLMPPrompt
+from enums import DLModelEndpoint, DLModelWeights, InferenceBackend, LLMPPrompt
+from common import (
+    ReadinessGate, get_inference_backend, get_onnx_options, get_ordered_files, get_server_address,
+    get_masks_path, get_server_options, get_warmup_batch_sizes, load_volume, save_masks, split_batch, warm_up,
+)
 import cv2
 from ultralytics import YOLO
 
 # Define LitServe API for Chest CT
 class ChestCTAPI(ls.LitAPI):
+    readiness: ReadinessGate | None = None  # Set by the server, the worker reports ready after its warm-up
+
     def setup(self, device: str):
         """
         Setup the YOLO model for lung CT detection.
@@ -17,68 +23,143 @@ class ChestCTAPI(ls.LitAPI):
         - device: The device on which the model will be loaded (e.g., 'cuda' or 'cpu').
         """
         # Load the model globally
+        self.device = device if device.startswith("cuda") and torch.cuda.is_available() else "cpu"  # Each worker runs on its own device
+
+        if InferenceBackend(get_inference_backend("CHEST_CT")) == InferenceBackend.ONNX:
+            # The model exported by `export_onnx.py`, YOLO runs it with ONNX Runtime
+            weights = get_onnx_options("CHEST_CT", DLModelWeights.LUNG_CT_ONNX.value)["model_path"]
+            print("Loading YOLOv8 ONNX model...")
+            self.model = YOLO(str(weights), task="segment")
+            print(f"YOLOv8 ONNX Model Loaded For {self.device.upper()}.")
+            self.warm_up()
+            return
+
         weights = DLModelWeights.LUNG_CT.value
         print("Loading YOLOv8 model...")
         model = YOLO(weights)
-        if torch.cuda.is_available():
-            model = model.cuda()
+        model = model.to(self.device)
         
         print(f"YOLOv8 Model Loaded In {model.device.type.upper()}.")
         self.model = model
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """
+        Runs the model on blank CT slices, including the YOLO pre and post processing, then reports the worker as ready.
+        """
+        def run(batch_size: int):
+            images = [np.zeros((512, 512, 3), dtype=np.uint8) for _ in range(batch_size)]
+            list(self.model.predict(images, stream=True, device=self.device, verbose=False))
+
+        warm_up("Chest CT", run, get_warmup_batch_sizes("CHEST_CT", (1, 16)))
+        if self.readiness:
+            self.readiness.mark_ready()
 
     def decode_request(self, request: dict) -> tuple:
         """
-        Decodes the incoming request to extract folder path, accuracy threshold, and pixel spacing.
+        Decodes the incoming request to extract folder path, accuracy threshold, pixel spacing and the optional volume path.
 
         Parameters:
         - request: Dictionary containing the request parameters.
 
         Returns:
-        - A tuple containing folder path, accuracy threshold, and pixel spacing.
+        - A tuple containing folder path, accuracy threshold, pixel spacing and volume path.
+        """
+        return request.get("folder_path"), request.get("accuracy_threshold", 0.5), request.get('pixel_spacing', [0.5, 0.5]), request.get("volume_path")  # in mm
+
+    def get_source(self, folder_path: str, volume_path: str | None) -> tuple[list, Path]:
+        """
+        Get the slices of a request and the folder to save its masks.
+
+        Parameters:
+        - folder_path: Path to the folder containing the images.
+        - volume_path: Optional path to the `.npy` volume, used instead of the images.
+
+        Returns:
+        - A tuple containing the slices, as BGR images or image paths, and the folder to save the masks.
+        """
+        if volume_path:
+            # The volume slices as BGR images, the same pixels YOLO reads from the grayscale PNG images
+            volume, _ = load_volume(volume_path)
+            return [cv2.cvtColor(np.asarray(img), cv2.COLOR_GRAY2BGR) for img in volume], Path(volume_path).parent
+        
+        # The images in the slice order, YOLO sorts the files of a folder by name
+        return [str(path) for path in get_ordered_files(folder_path, ('.png', '.jpeg', '.jpg'))], Path(folder_path)
+
+    def batch(self, inputs: list[tuple]) -> list[tuple]:
+        """
+        Keeps the decoded requests of the batch as a list, their slices are predicted together in `predict`.
+
+        Parameters:
+        - inputs: The decoded requests.
+
+        Returns:
+        - The list of the decoded requests.
+        """
+        return list(inputs)
+
+    def predict(self, payload: tuple | list[tuple]) -> tuple | list[tuple]:
+        """
+        Run the YOLO model prediction of a request or of a batch of requests.
+        The slices of the requests having the same accuracy threshold are predicted in a single call.
+
+        Parameters:
+        - payload: A tuple containing folder path, accuracy threshold, pixel spacing and volume path, or a list of them.
+
+        Returns:
+        - A tuple containing the prediction results, pixel spacing and the folder to save the masks, for each request of a batch.
         """
-        return request["folder_path"], request.get("accuracy_threshold", 0.5), request.get('pixel_spacing', [0.5, 0.5])  # in mm
+        batch = payload if isinstance(payload, list) else [payload]
+        sources = [self.get_source(folder_path, volume_path) for folder_path, _, _, volume_path in batch]
+        outputs: list = [None] * len(batch)
+
+        for accuracy_threshold in {request[1] for request in batch}:
+            indices = [i for i, request in enumerate(batch) if request[1] == accuracy_threshold]
+            source = [image for i in indices for image in sources[i][0]]
+            results = list(self.model.predict(source, conf=accuracy_threshold, stream=True, device=self.device)) if source else []  # list of Results objects
+
+            for i, request_results in zip(indices, split_batch(results, [len(sources[i][0]) for i in indices])):
+                outputs[i] = (request_results, batch[i][2], sources[i][1])
+
+        return outputs if isinstance(payload, list) else outputs[0]
 
-    def predict(self, payload: tuple) -> tuple:
+    def unbatch(self, output: list[tuple]) -> list[tuple]:
         """
-        Run the YOLO model prediction.
+        Returns the prediction results of each request of the batch.
 
         Parameters:
-        - payload: A tuple containing folder path, accuracy threshold, and pixel spacing.
+        - output: The list of the prediction results.
 
         Returns:
-        - A tuple containing the prediction results and pixel spacing.
+        - The prediction results of each request.
         """
-        folder_path, accuracy_threshold, pixel_spacing = payload
-        results = self.model.predict(folder_path, conf=accuracy_threshold, stream=True)  # list of Results objects
-        return results, pixel_spacing
+        return list(output)
 
     def encode_response(self, payload: tuple) -> dict:
         """
         Encodes the response after model prediction.
 
         Parameters:
-        - payload: A tuple containing the model output and pixel spacing.
+        - payload: A tuple containing the model output, pixel spacing and the folder to save the masks.
 
         Returns:
         - Dictionary containing the generated mask, confidences, and LLM response.
         """
         masks = []
         confidences = []
-        save_folder = None
-        output, pixel_spacing = payload
+        output, pixel_spacing, save_folder = payload
         areas = []
         for result in output:
             gen_mask = np.zeros(result.orig_shape, dtype=np.uint8)
-            if save_folder is None:
-                save_folder = Path(result.path).parent
             if result.masks is not None:
                 for mask in result.masks:
                     points = np.array(mask.xy, dtype=int)
                     cv2.drawContours(gen_mask, [points], -1, 255, -1)
                     areas.append(cv2.contourArea(points))
 
-            # Resize the generated masks to have the same shape so that we can stack them in a single numpy array
-            gen_mask = cv2.resize(gen_mask, (640, 640))
+            # The masks stay at the resolution of the slices, a slice of another size is resized to the first one to stack them
+            if masks and gen_mask.shape != masks[0].shape:
+                gen_mask = cv2.resize(gen_mask, masks[0].shape[::-1], interpolation=cv2.INTER_NEAREST)
             masks.append(gen_mask)
             if result.boxes is not None and len(result.boxes) > 0:
                 confidences.extend(result.boxes.conf.cpu().numpy().tolist())
@@ -95,10 +176,9 @@ class ChestCTAPI(ls.LitAPI):
             json_data = {'input': prompt}
             llm_response = requests.post(DLModelEndpoint.LLM.value, json=json_data).json()['output']
         
+        # Bit-packed masks with a unique name, the requests of the same series don't overwrite each other
         masks_array = np.array(masks, dtype=np.uint8)
-        save_path = save_folder / 'chest_ct_masks.npy'
-        save_path = str(save_path.resolve())
-        np.save(save_path, masks_array)
+        save_path = str(save_masks(masks_array, get_masks_path(save_folder, "chest_ct")).resolve())
         print('llm_response: ', llm_response)
         
         return {
@@ -109,6 +189,10 @@ class ChestCTAPI(ls.LitAPI):
 
 if __name__ == "__main__":
     # Run the server with specified parameters
-    port, api_path = DLModelEndpoint.LUNG_CT.strip().split(":")[-1].split("/")
-    server = ls.LitServer(ChestCTAPI(), accelerator='cuda', devices=1, max_batch_size=1, api_path=f'/{api_path}')
+    port, api_path = get_server_address("CHEST_CT", DLModelEndpoint.LUNG_CT.value)
+    options = get_server_options("CHEST_CT", max_batch_size=4, batch_timeout=0.05)
+    api = ChestCTAPI()
+    api.readiness = ReadinessGate(options["devices"] * options["workers_per_device"])
+    server = ls.LitServer(api, api_path=api_path, **options)
+    api.readiness.add_endpoint(server.app)  # GET /ready reports ready once all the workers are warm
     server.run(port=port)
\ No newline at end of file
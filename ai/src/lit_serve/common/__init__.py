@@ -0,0 +1,10 @@
+from .artifact_store import *
+from .batching import *
+from .mask_analytics import *
+from .mask_codec import *
+from .normalization import *
+from .onnx_runtime import *
+from .readiness import *
+from .serving import *
+from .slice_index import *
+from .volume import *
\ No newline at end of file
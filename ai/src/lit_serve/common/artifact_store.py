@@ -0,0 +1,236 @@
+import mimetypes
+import os
+import re
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+"""A single byte range of the `Range` header, `bytes=start-end`, `bytes=start-` or `bytes=-suffix`"""
+
+_CHUNK_SIZE = 1024 * 1024
+"""Size of the chunks streamed to the client"""
+
+_SWEEP_INTERVAL = 600
+"""Minimum time in seconds between two removals of the expired artifacts"""
+
+class ArtifactStore(ABC):
+    """
+    Abstract store of the model outputs.
+    Stores the output files of a model once and serves them by ID, so the responses carry a small manifest
+    instead of the file contents. The files are streamed by the download endpoint with `Range` support.
+    The artifacts are resolved from the storage on each request, the worker processes writing them share nothing else with the server.
+    The download URLs are addresses of the model replica on the internal network, for the ML service and the backend,
+    not for the viewer, and the artifacts are removed once they expire.
+    """
+    @abstractmethod
+    def put(self, file_path: Path, name: str | None = None) -> dict:
+        """
+        Move a file to the store.
+
+        Parameters:
+        - file_path: Path of the file, it is moved, not copied.
+        - name: Name of the artifact in the manifest, the file name by default.
+
+        Returns:
+        - The manifest entry of the artifact, its `id`, `name`, `size`, `media_type` and download `path`.
+        """
+        pass
+
+    @abstractmethod
+    def open(self, artifact_id: str) -> tuple[BinaryIO, int, str] | None:
+        """
+        Open an artifact for reading.
+
+        Parameters:
+        - artifact_id: ID of the artifact.
+
+        Returns:
+        - A tuple containing the binary file, its size and its name, None if the artifact doesn't exist.
+        """
+        pass
+
+    def put_folder(self, folder: Path) -> list[dict]:
+        """
+        Move the files of a folder to the store, e.g. the output folder of a model.
+
+        Parameters:
+        - folder: Path of the folder.
+
+        Returns:
+        - The manifest entries of the files, named by their path relative to the folder.
+        """
+        if not folder.exists():
+            return []
+
+        files = sorted(path for path in folder.rglob("*") if path.is_file())
+        return [self.put(path, path.relative_to(folder).as_posix()) for path in files]
+
+    def add_endpoint(self, app: FastAPI, path: str = "/artifacts/{artifact_id}") -> None:
+        """
+        Add the download endpoint of the artifacts to the server.
+        A `Range` header with a single byte range returns 206 with the part of the file, an invalid range returns 416.
+
+        Parameters:
+        - app: The FastAPI app of the server, `server.app`.
+        - path: Path of the endpoint, with the `artifact_id` parameter.
+        """
+        def download(artifact_id: str, range_header: str | None = Header(default=None, alias="Range")):
+            artifact = self.open(artifact_id)
+
+            if artifact is None:
+                return JSONResponse({"detail": f"Artifact '{artifact_id}' not found"}, status_code=404)
+
+            file, size, name = artifact
+            byte_range = parse_range(range_header, size) if range_header else (0, size - 1)
+
+            if byte_range is None:
+                file.close()
+                return JSONResponse({"detail": "Invalid range"}, status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+            start, end = byte_range
+            headers = {
+                "Accept-Ranges": "bytes",
+                "Content-Length": str(end - start + 1),
+                "Content-Disposition": f'attachment; filename="{Path(name).name}"',
+            }
+
+            if range_header:
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            return StreamingResponse(
+                read_chunks(file, start, end), status_code=206 if range_header else 200, media_type=media_type, headers=headers,
+            )
+
+        app.add_api_route(path, download, methods=["GET"])
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Stores the artifacts in a folder, each artifact in its own subfolder named by its ID.
+    The folder must be on the same volume as the outputs for the files to be moved without copying.
+    The artifacts older than `ttl` seconds are not served anymore and are removed when new artifacts are stored.
+    """
+    def __init__(self, root: str | Path, ttl: float = 0) -> None:
+        """
+        Parameters:
+        - root: Path of the folder of the artifacts.
+        - ttl: Time to live of the artifacts in seconds, 0 keeps them forever.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._last_sweep = float("-inf")
+
+    def put(self, file_path: Path, name: str | None = None) -> dict:
+        self.remove_expired()
+        name = name or file_path.name
+        artifact_id = uuid.uuid4().hex
+        artifact_folder = self.root / artifact_id
+        artifact_folder.mkdir()
+
+        # The name is kept as the file name, the folders of a relative name are flattened
+        stored_path = Path(shutil.move(str(file_path), artifact_folder / Path(name).name))
+
+        return {
+            "id": artifact_id,
+            "name": name,
+            "size": stored_path.stat().st_size,
+            "media_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "path": f"/artifacts/{artifact_id}",
+        }
+
+    def open(self, artifact_id: str) -> tuple[BinaryIO, int, str] | None:
+        # The ID is a UUID, anything else could escape the root folder
+        if not re.fullmatch(r"[0-9a-f]{32}", artifact_id):
+            return None
+
+        artifact_folder = self.root / artifact_id
+        files = list(artifact_folder.glob("*")) if artifact_folder.is_dir() else []
+
+        if len(files) != 1 or self._is_expired(artifact_folder):
+            return None
+
+        return open(files[0], "rb"), files[0].stat().st_size, files[0].name
+
+    def remove_expired(self) -> int:
+        """
+        Remove the expired artifacts, at most once every few minutes, the other calls return immediately.
+
+        Returns:
+        - The number of the removed artifacts.
+        """
+        if not self.ttl or time.monotonic() - self._last_sweep < min(self.ttl, _SWEEP_INTERVAL):
+            return 0
+
+        self._last_sweep = time.monotonic()
+        expired_folders = [folder for folder in self.root.iterdir() if folder.is_dir() and self._is_expired(folder)]
+
+        for folder in expired_folders:
+            shutil.rmtree(folder, ignore_errors=True)
+
+        return len(expired_folders)
+
+    def _is_expired(self, artifact_folder: Path) -> bool:
+        """Check if an artifact is older than the TTL, by the time its folder was created"""
+        try:
+            return bool(self.ttl) and artifact_folder.stat().st_mtime < time.time() - self.ttl
+        except FileNotFoundError:
+            return True
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a `Range` header with a single byte range.
+
+    Parameters:
+    - range_header: Value of the header, e.g. `bytes=0-1023`, `bytes=1024-` or `bytes=-512`.
+    - size: Size of the file.
+
+    Returns:
+    - The first and the last byte of the range, inclusive, None if the range is invalid or not satisfiable.
+    """
+    match = _RANGE_PATTERN.match(range_header.strip())
+
+    if not match or match.groups() == ("", "") or size == 0:
+        return None
+
+    start, end = match.groups()
+
+    if not start:
+        # The last bytes of the file
+        suffix = int(end)
+        return (max(0, size - suffix), size - 1) if suffix else None
+
+    start, end = int(start), min(int(end), size - 1) if end else size - 1
+    return (start, end) if start <= end else None
+
+def read_chunks(file: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    """
+    Read the bytes of a file from `start` to `end`, inclusive, in chunks, then close the file.
+    """
+    with file:
+        file.seek(start)
+        remaining = end - start + 1
+
+        while remaining > 0:
+            chunk = file.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+def get_artifact_store(server_name: str) -> ArtifactStore:
+    """
+    Get the artifact store of a server, in the folder `{SERVER_NAME}_ARTIFACTS_DIR`, `artifacts` by default.
+    The artifacts expire after `{SERVER_NAME}_ARTIFACTS_TTL` seconds, one day by default, 0 keeps them forever.
+    """
+    return LocalArtifactStore(
+        os.getenv(f"{server_name.upper()}_ARTIFACTS_DIR") or "artifacts",
+        float(os.getenv(f"{server_name.upper()}_ARTIFACTS_TTL") or 24 * 60 * 60),
+    )
@@ -0,0 +1,19 @@
+def split_batch(items, sizes: list[int]) -> list:
+    """
+    Split the output of a fused forward pass back to the requests of the batch.
+
+    Parameters:
+    - items: The concatenated outputs, a list, numpy array or tensor.
+    - sizes: The number of items of each request, in the batch order.
+
+    Returns:
+    - The outputs of each request.
+    """
+    outputs = []
+    start = 0
+
+    for size in sizes:
+        outputs.append(items[start:start + size])
+        start += size
+
+    return outputs
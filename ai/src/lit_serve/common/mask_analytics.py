@@ -0,0 +1,60 @@
+import numpy as np
+from scipy import ndimage
+
+_SLICE_CONNECTIVITY = np.zeros((3, 3, 3), dtype=bool)
+_SLICE_CONNECTIVITY[1] = ndimage.generate_binary_structure(2, 2)
+"""8-connectivity inside a slice only, the components of a 3D mask are labeled slice by slice in a single pass"""
+
+def analyze_masks(masks: np.ndarray, pixel_spacing: list[float], slice_thickness: float = 1.0,
+                  scale: tuple[float, float] = (1.0, 1.0), min_foreground_ratio: float = 0.015) -> dict:
+    """
+    Measure the segmentation masks of a series in one pass over the 3D mask:
+    the foreground ratio of each slice, the connected components of each slice and their areas,
+    the tumor volume of each slice and the total volume.
+
+    Parameters:
+    - masks: The binary masks of shape (slices, rows, columns), an optional trailing channel is dropped.
+    - pixel_spacing: The row and column spacing in mm of the original image.
+    - slice_thickness: The thickness of a slice in mm.
+    - scale: The original rows and columns of a mask pixel, (original rows / mask rows, original columns / mask columns).
+    - min_foreground_ratio: The foreground ratio, rounded to 2 decimals, of the slices with a tumor.
+
+    Returns:
+    - A dictionary containing:
+      - `foreground_ratios`: The foreground ratio of each slice.
+      - `wanted_slices`: The indices of the slices with a tumor.
+      - `largest_areas`: The area in mm² of the largest component of each slice.
+      - `largest_area`: The area in mm² of the largest component of the series.
+      - `slice_volumes`: The tumor volume in mm³ of each slice.
+      - `total_volume`: The tumor volume in mm³ of the series.
+    """
+    if masks.ndim == 4:
+        masks = masks[..., 0]
+
+    slices, rows, columns = masks.shape
+    foreground = masks > 0
+    pixel_area = float(pixel_spacing[0]) * float(pixel_spacing[1]) * scale[0] * scale[1]  # mm² of a mask pixel
+
+    # Foreground of each slice
+    counts = np.count_nonzero(foreground, axis=(1, 2))
+    ratios = counts / (rows * columns)
+    wanted_slices = np.flatnonzero(np.round(ratios, 2) >= min_foreground_ratio)
+
+    # Connected components of all the slices, then the size of each component and its slice
+    labels, components = ndimage.label(foreground, structure=_SLICE_CONNECTIVITY)
+    sizes = np.bincount(labels.ravel(), minlength=components + 1)
+    component_slices = np.zeros(components + 1, dtype=np.intp)
+    component_slices[labels[foreground]] = np.nonzero(foreground)[0]
+
+    largest = np.zeros(slices, dtype=np.int64)
+    np.maximum.at(largest, component_slices[1:], sizes[1:])
+
+    slice_volumes = counts * pixel_area * slice_thickness
+    return {
+        "foreground_ratios": ratios.tolist(),
+        "wanted_slices": wanted_slices.tolist(),
+        "largest_areas": (largest * pixel_area).round(2).tolist(),
+        "largest_area": round(float(largest.max(initial=0)) * pixel_area, 2),
+        "slice_volumes": slice_volumes.round(2).tolist(),
+        "total_volume": round(float(slice_volumes.sum()), 2),
+    }
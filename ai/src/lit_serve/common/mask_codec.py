@@ -0,0 +1,87 @@
+import json
+import os
+import uuid
+import numpy as np
+from pathlib import Path
+
+MASKS_FILE_SUFFIX = ".masks.npz"
+"""Suffix of the compact mask files, a `.npz` archive with the bit-packed masks, their shape and metadata"""
+
+def pack_masks(masks: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Pack binary masks to 1 bit per pixel, any non-zero pixel is foreground.
+
+    Parameters:
+    - masks: The masks of any shape, e.g. (slices, rows, columns).
+
+    Returns:
+    - A dictionary containing the packed `bits` and the `shape` of the masks.
+    """
+    masks = np.asarray(masks)
+    return {"bits": np.packbits(masks != 0, axis=None), "shape": np.asarray(masks.shape, dtype=np.int64)}
+
+def unpack_masks(bits: np.ndarray, shape: tuple | np.ndarray) -> np.ndarray:
+    """
+    Unpack the masks packed by `pack_masks`.
+
+    Parameters:
+    - bits: The packed bits.
+    - shape: The shape of the masks.
+
+    Returns:
+    - The uint8 masks, 1 for the foreground and 0 for the background.
+    """
+    shape = tuple(int(size) for size in shape)
+    return np.unpackbits(bits, count=int(np.prod(shape))).reshape(shape)
+
+def get_masks_path(series_folder: str | Path, model_name: str) -> Path:
+    """
+    Get a unique path for the masks of a prediction in the folder of its series,
+    concurrent predictions of the same series never write the same file.
+
+    Parameters:
+    - series_folder: The folder of the series.
+    - model_name: The name of the model, e.g. `chest_ct`.
+
+    Returns:
+    - The path of the mask file.
+    """
+    return Path(series_folder) / f"{model_name}_{uuid.uuid4().hex}{MASKS_FILE_SUFFIX}"
+
+def save_masks(masks: np.ndarray, masks_path: str | Path, metadata: dict | None = None) -> Path:
+    """
+    Save the bit-packed masks with their metadata in a compressed `.npz` archive.
+    The archive is written to a temporary file first, a reader never sees a partial file.
+
+    Parameters:
+    - masks: The binary masks, e.g. (slices, rows, columns).
+    - masks_path: The path of the mask file, see `get_masks_path`.
+    - metadata: Optional JSON serializable metadata, e.g. the shape of the original images.
+
+    Returns:
+    - The path of the mask file.
+    """
+    masks_path = Path(masks_path)
+    temp_path = masks_path.with_name(f".{masks_path.name}.tmp")
+
+    with open(temp_path, "wb") as file:
+        np.savez_compressed(file, **pack_masks(masks), metadata=np.asarray(json.dumps(metadata or {})))
+
+    os.replace(temp_path, masks_path)
+    return masks_path
+
+def load_masks(masks_path: str | Path) -> tuple[np.ndarray, dict]:
+    """
+    Load the masks saved by `save_masks`.
+
+    Parameters:
+    - masks_path: The path of the mask file.
+
+    Returns:
+    - A tuple containing the uint8 masks, 1 for the foreground, and their metadata.
+    """
+    with np.load(masks_path, allow_pickle=False) as archive:
+        masks = unpack_masks(archive["bits"], archive["shape"])
+        metadata = json.loads(archive["metadata"].item()) if "metadata" in archive else {}
+
+    return masks, metadata
@@ -0,0 +1,57 @@
+import numpy as np
+
+def normalize_to_uint8(pixel_array: np.ndarray, window: tuple[float, float] | None = None,
+                       slope: float = 1, intercept: float = 0) -> np.ndarray:
+    """
+    Normalize the pixel values of a slice to 0-255.
+    With a window, the modality LUT (`RescaleSlope` and `RescaleIntercept`) is applied first and the values
+    between the window bounds are mapped to 0-255, so all the slices of a series have the same contrast.
+    Without a window, the negative values are clamped and the values are divided by the maximum of the slice.
+    The computation is done in place on a single float32 copy of the slice.
+
+    Parameters:
+    - pixel_array: The pixel array of the slice.
+    - window: The lowest and highest values of the window, e.g. `WindowPreset.LUNG.bounds`.
+    - slope: The rescale slope of the slice.
+    - intercept: The rescale intercept of the slice.
+
+    Returns:
+    - The normalized uint8 slice.
+    """
+    values = pixel_array.astype(np.float32)
+
+    if window is None:
+        np.maximum(values, 0, out=values)
+        low, high = 0.0, float(values.max())
+    else:
+        if slope != 1:
+            values *= slope
+        if intercept != 0:
+            values += intercept
+        low, high = window
+
+    if high <= low:
+        return np.zeros(values.shape, dtype=np.uint8)
+
+    values -= low
+    values *= 255.0 / (high - low)
+    np.clip(values, 0, 255, out=values)
+    return values.astype(np.uint8)
+
+def scale_to_unit(data: np.ndarray) -> np.ndarray:
+    """
+    Scale the values of an array to [0, 1] by dividing them by its maximum, in float32.
+
+    Parameters:
+    - data: The array to scale, cast to float32 once and scaled in place.
+
+    Returns:
+    - The scaled float32 array.
+    """
+    values = data.astype(np.float32, copy=data.dtype != np.float32)
+    maximum = values.max() if values.size else 0
+
+    if maximum > 0:
+        values /= maximum
+
+    return values
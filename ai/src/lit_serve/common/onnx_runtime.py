@@ -0,0 +1,37 @@
+from pathlib import Path
+
+def get_quantized_model_path(model_path: str | Path) -> Path:
+    """
+    Get the path of the INT8 dynamically quantized model, e.g. `model.int8.onnx` for `model.onnx`.
+    """
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.int8.onnx")
+
+def create_onnx_session(model_path: str | Path, intra_op_threads: int = 0, device: str = "cpu"):
+    """
+    Create an ONNX Runtime session with all the graph optimizations.
+    `onnxruntime` is imported here, so the servers running PyTorch don't need it.
+
+    Parameters:
+    - model_path: Path of the `.onnx` model.
+    - intra_op_threads: Number of threads of an operator, 0 for the number of physical cores.
+      Set it to the cores divided by the workers of the server to avoid oversubscribing the CPU.
+    - device: The device of the worker, the CUDA provider is used for `cuda` devices when it's installed.
+
+    Returns:
+    - The `onnxruntime.InferenceSession`.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = 1
+
+    providers = ["CPUExecutionProvider"]
+    if device.startswith("cuda") and "CUDAExecutionProvider" in ort.get_available_providers():
+        device_id = int(device.split(":")[1]) if ":" in device else 0
+        providers.insert(0, ("CUDAExecutionProvider", {"device_id": device_id}))
+
+    return ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
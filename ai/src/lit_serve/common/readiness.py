@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import time
+from typing import Callable
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+class ReadinessGate:
+    """
+    Counts the workers of a LitServe server that finished their setup and warm-up.
+    The counter is shared with the worker processes, the server reports ready once all of them are warm.
+    """
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._ready_workers = multiprocessing.get_context("spawn").Value("i", 0)
+
+    @property
+    def ready(self) -> bool:
+        """Whether all the workers are warm"""
+        return self._ready_workers.value >= self.workers
+
+    def mark_ready(self) -> None:
+        """Called by a worker at the end of its setup"""
+        with self._ready_workers.get_lock():
+            self._ready_workers.value += 1
+
+    def add_endpoint(self, app: FastAPI, path: str = "/ready") -> None:
+        """
+        Add the readiness endpoint to the server, 200 once all the workers are warm, 503 before.
+
+        Parameters:
+        - app: The FastAPI app of the server, `server.app`.
+        - path: Path of the endpoint.
+        """
+        def ready() -> JSONResponse:
+            content = {"ready": self.ready, "readyWorkers": self._ready_workers.value, "workers": self.workers}
+            return JSONResponse(content, status_code=200 if self.ready else 503)
+
+        app.add_api_route(path, ready, methods=["GET"])
+
+def get_warmup_batch_sizes(server_name: str, default: tuple[int, ...] = (1,)) -> list[int]:
+    """
+    Get the batch sizes of the warm-up passes of a server from the environment variable
+    `{SERVER_NAME}_WARMUP_BATCH_SIZES`, e.g. `1,8`.
+    """
+    value = os.getenv(f"{server_name.upper()}_WARMUP_BATCH_SIZES")
+    return [int(size) for size in value.split(",") if size.strip()] if value else list(default)
+
+def warm_up(server_name: str, run: Callable[[int], object], batch_sizes: list[int]) -> None:
+    """
+    Run the model on synthetic inputs of each batch size, so the first request doesn't pay
+    for the lazy initialization of the runtime (CUDA context, cuDNN algorithms, TF graphs, allocator growth).
+
+    Parameters:
+    - server_name: Name of the server, used in the logs.
+    - run: Runs a forward pass on synthetic inputs of the given batch size.
+    - batch_sizes: The batch sizes of the warm-up passes.
+    """
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        run(batch_size)
+        print(f"[INFO]: {server_name} warm-up with batch size {batch_size} took {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+from .onnx_runtime import get_quantized_model_path
+
+def get_server_options(server_name: str, max_batch_size: int = 1, batch_timeout: float = 0.0) -> dict:
+    """
+    Get the deployment and dynamic batching options of a LitServe server, overridden by the environment variables
+    `{SERVER_NAME}_ACCELERATOR`, `{SERVER_NAME}_DEVICES`, `{SERVER_NAME}_WORKERS_PER_DEVICE`,
+    `{SERVER_NAME}_MAX_BATCH_SIZE` and `{SERVER_NAME}_BATCH_TIMEOUT`,
+    e.g. `CHEST_XRAY_ACCELERATOR=cpu` and `CHEST_XRAY_WORKERS_PER_DEVICE=4` to serve with 4 CPU workers.
+
+    Parameters:
+    - server_name: Name of the server, the prefix of its environment variables.
+    - max_batch_size: Default maximum number of requests predicted together.
+    - batch_timeout: Default time in seconds to wait for the batch to fill.
+
+    Returns:
+    - The keyword arguments of `ls.LitServer`.
+    """
+    prefix = server_name.upper()
+    return {
+        "accelerator": os.getenv(f"{prefix}_ACCELERATOR") or "cuda",
+        "devices": int(os.getenv(f"{prefix}_DEVICES") or 1),
+        "workers_per_device": int(os.getenv(f"{prefix}_WORKERS_PER_DEVICE") or 1),
+        "max_batch_size": int(os.getenv(f"{prefix}_MAX_BATCH_SIZE") or max_batch_size),
+        "batch_timeout": float(os.getenv(f"{prefix}_BATCH_TIMEOUT") or batch_timeout),
+    }
+
+def get_server_address(server_name: str, endpoint_url: str) -> tuple[int, str]:
+    """
+    Get the port and the API path of a LitServe server from its endpoint URL,
+    the port is overridden by the environment variable `{SERVER_NAME}_PORT` to run several replicas on a host.
+
+    Parameters:
+    - server_name: Name of the server, the prefix of its environment variables.
+    - endpoint_url: The URL of the server endpoint, e.g. `http://localhost:8010/chest_xray`.
+
+    Returns:
+    - A tuple containing the port and the API path.
+    """
+    url = urlsplit(endpoint_url.strip())
+    port = int(os.getenv(f"{server_name.upper()}_PORT") or url.port)
+    return port, url.path
+
+def get_inference_backend(server_name: str) -> str:
+    """
+    Get the runtime of the model of a server from the environment variable `{SERVER_NAME}_BACKEND`,
+    `torch` (default) or `onnx`.
+    """
+    return (os.getenv(f"{server_name.upper()}_BACKEND") or "torch").lower()
+
+def get_onnx_options(server_name: str, model_path: str | Path) -> dict:
+    """
+    Get the ONNX Runtime options of the model of a server, overridden by the environment variables
+    `{SERVER_NAME}_ONNX_MODEL`, `{SERVER_NAME}_ONNX_INT8` and `{SERVER_NAME}_ONNX_THREADS`.
+
+    Parameters:
+    - server_name: Name of the server, the prefix of its environment variables.
+    - model_path: Default path of the exported `.onnx` model.
+
+    Returns:
+    - The keyword arguments of `create_onnx_session`, without the device.
+    """
+    prefix = server_name.upper()
+    model_path = Path(os.getenv(f"{prefix}_ONNX_MODEL") or model_path)
+
+    # The INT8 dynamically quantized model exported next to the FP32 model
+    if (os.getenv(f"{prefix}_ONNX_INT8") or "").lower() in ("1", "true", "yes"):
+        model_path = get_quantized_model_path(model_path)
+
+    return {
+        "model_path": model_path,
+        "intra_op_threads": int(os.getenv(f"{prefix}_ONNX_THREADS") or 0),
+    }
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+SLICE_INDEX_FILE_NAME = "slices.json"
+"""File name of the slice index of a series, the slices in the order shown by the viewer"""
+
+def get_slice_stem(file_name: str | Path) -> str:
+    """
+    Get the name of a slice file without its `.dcm` suffix, its converted image is named `{stem}.png`.
+    The other suffixes are kept, the files can have no suffix or be named by their dotted UID,
+    e.g. `1.2.840.1` and `1.2.840.2` would both be `1.2.840` with `Path.stem`.
+    """
+    name = Path(file_name).name
+    return name[:-4] if name.lower().endswith(".dcm") else name
+
+def save_slice_index(folder_path: str | Path, slices: list[dict]) -> Path:
+    """
+    Save the sorted slice index of a series in its folder.
+
+    Parameters:
+    - folder_path: Path of the folder containing the DICOM files of the series.
+    - slices: The slice headers in the slice order, each with the `file` name of its DICOM file.
+
+    Returns:
+    - Path of the slice index.
+    """
+    index_path = Path(folder_path) / SLICE_INDEX_FILE_NAME
+
+    with open(index_path, "w") as file:
+        json.dump(slices, file)
+
+    return index_path
+
+def load_slice_index(folder_path: str | Path) -> list[dict] | None:
+    """
+    Load the slice index of a series from its folder or from the parent folder,
+    the converted images are saved in a subfolder of the DICOM folder.
+
+    Parameters:
+    - folder_path: Path of the folder containing the slices.
+
+    Returns:
+    - The slice headers in the slice order, None if the series has no index.
+    """
+    folder_path = Path(folder_path)
+
+    for index_path in (folder_path / SLICE_INDEX_FILE_NAME, folder_path.parent / SLICE_INDEX_FILE_NAME):
+        if index_path.exists():
+            with open(index_path, "r") as file:
+                return json.load(file)
+
+    return None
+
+def get_ordered_files(folder_path: str | Path, suffixes: tuple[str, ...]) -> list[Path]:
+    """
+    Get the slice files of a folder in the slice order of the series index.
+    The indexed DICOM files are read by their names whatever their suffixes, the other files are matched
+    to the index by the name of their DICOM file, e.g. `CT_2.png` for `CT_2.dcm`, see `get_slice_stem`.
+    Without an index the files are sorted by name.
+
+    Parameters:
+    - folder_path: Path of the folder containing the slices.
+    - suffixes: The lower case suffixes of the slice files, e.g. ('.png',).
+
+    Returns:
+    - The paths of the slice files in the slice order.
+    """
+    folder_path = Path(folder_path)
+    files = sorted(file for file in folder_path.iterdir() if file.is_file() and file.suffix.lower() in suffixes)
+    slices = load_slice_index(folder_path)
+
+    if not slices:
+        return files
+
+    files_by_stem = {file.stem: file for file in files}
+    ordered_files = []
+
+    for entry in slices:
+        indexed_file = folder_path / entry["file"]
+
+        if indexed_file.is_file():
+            ordered_files.append(indexed_file)
+        elif get_slice_stem(entry["file"]) in files_by_stem:
+            ordered_files.append(files_by_stem[get_slice_stem(entry["file"])])
+
+    return ordered_files
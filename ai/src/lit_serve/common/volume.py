@@ -0,0 +1,64 @@
+import json
+import numpy as np
+from pathlib import Path
+
+VOLUME_FILE_NAME = "volume.npy"
+"""File name of the series volume, a `.npy` array of shape (slices, rows, columns)"""
+
+def create_volume(volume_path: str | Path, shape: tuple, dtype: type = np.uint8) -> np.memmap:
+    """
+    Create a memory-mapped `.npy` volume filled with zeros.
+
+    Parameters:
+    - volume_path: Path of the `.npy` file to create.
+    - shape: Shape of the volume, (slices, rows, columns).
+    - dtype: Data type of the voxels.
+
+    Returns:
+    - The writable memory-mapped volume.
+    """
+    return np.lib.format.open_memmap(volume_path, mode="w+", dtype=dtype, shape=shape)
+
+def get_metadata_path(volume_path: str | Path) -> Path:
+    """
+    Get the path of the JSON sidecar of the volume, e.g. `volume.json` for `volume.npy`.
+    """
+    return Path(volume_path).with_suffix(".json")
+
+def save_volume_metadata(volume_path: str | Path, metadata: dict) -> Path:
+    """
+    Save the JSON sidecar of the volume with its spacing, orientation and slice order.
+
+    Parameters:
+    - volume_path: Path of the `.npy` volume.
+    - metadata: Metadata of the volume.
+
+    Returns:
+    - Path of the JSON sidecar.
+    """
+    metadata_path = get_metadata_path(volume_path)
+
+    with open(metadata_path, "w") as file:
+        json.dump(metadata, file)
+
+    return metadata_path
+
+def load_volume(volume_path: str | Path) -> tuple[np.ndarray, dict]:
+    """
+    Load a volume as a read-only memory map together with its JSON sidecar.
+
+    Parameters:
+    - volume_path: Path of the `.npy` volume.
+
+    Returns:
+    - A tuple containing the memory-mapped volume and its metadata.
+    """
+    volume = np.load(volume_path, mmap_mode="r")
+    metadata_path = get_metadata_path(volume_path)
+    metadata = {}
+
+    if metadata_path.exists():
+        with open(metadata_path, "r") as file:
+            metadata = json.load(file)
+
+    return volume, metadata
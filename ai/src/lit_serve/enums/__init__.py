@@ -1,3 +1,5 @@
 from .dl_models_endpoints import DLModelEndpoint
 from .pretrained_weights import DLModelWeights
-from .llm_pormpt import LLMPPrompt
\ No newline at end of file
+from .llm_pormpt import LLMPPrompt
+from .window_preset import WindowPreset
+from .inference_backend import InferenceBackend
\ No newline at end of file
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class InferenceBackend(str, Enum):
+    """Runtime executing a model"""
+    TORCH = "torch" # Eager PyTorch
+    ONNX = "onnx" # ONNX Runtime, the model exported by `export_onnx.py`
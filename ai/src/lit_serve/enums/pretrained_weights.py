@@ -6,5 +6,7 @@ class DLModelWeights(str, Enum):
     BRAIN_MRI_SEGMENTATION = __root_folder__ / "brain_tumor_segementation_model.hdf5" # brain tumor segmentation model
     BRAIN_MRI_CLASSIFICATION = __root_folder__ / "brain_tumor_classification.h5" # brain tumor classification model
     LUNG_CT = __root_folder__ / "lung_segmentation-best-yolov8-91_map_100_epochs.pt" # lung tumor segmentation model
+    LUNG_CT_ONNX = __root_folder__ / "lung_segmentation-best-yolov8-91_map_100_epochs.onnx" # lung tumor segmentation model exported by `export_onnx.py`
     CHEST_XRAY = "densenet121-res224-all"
+    CHEST_XRAY_ONNX = __root_folder__ / "densenet121-res224-all.onnx" # Chest X-ray classification model exported by `export_onnx.py`
     LLM = "llama3:8b" # Ollama LLM LLama3
@@ -0,0 +1,13 @@
+from enum import Enum
+
+class WindowPreset(Enum):
+    """Window level and width presets in Hounsfield units, (center, width)"""
+    LUNG = (-600, 1500)
+    MEDIASTINUM = (50, 350)
+    BRAIN = (40, 80)
+
+    @property
+    def bounds(self) -> tuple[float, float]:
+        """The lowest and highest values of the window"""
+        center, width = self.value
+        return center - width / 2, center + width / 2
@@ -0,0 +1,98 @@
+import argparse
+import json
+from pathlib import Path
+import onnx
+import torch
+import torchxrayvision as xrv
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from ultralytics import YOLO
+from enums import DLModelWeights
+from common import get_quantized_model_path
+
+
+def export_chest_xray(output_path: Path) -> Path:
+    """
+    Exports the torchxrayvision DenseNet to ONNX with a dynamic batch size.
+    The pathologies of the model are saved in the metadata of the ONNX model, the server reads them from there.
+
+    Parameters:
+    - output_path: Path of the `.onnx` model.
+
+    Returns:
+    - Path of the exported model.
+    """
+    model: torch.nn.Module = xrv.models.get_model(DLModelWeights.CHEST_XRAY.value).eval()
+    dummy_input = torch.zeros((1, 1, 224, 224), dtype=torch.float32)
+
+    torch.onnx.export(
+        model, dummy_input, str(output_path),
+        input_names=["images"], output_names=["predictions"],
+        dynamic_axes={"images": {0: "batch"}, "predictions": {0: "batch"}},
+        opset_version=17,
+    )
+
+    onnx_model = onnx.load(str(output_path))
+    onnx.helper.set_model_props(onnx_model, {"pathologies": json.dumps(list(model.pathologies))})
+    onnx.save(onnx_model, str(output_path))
+    return output_path
+
+
+def export_lung_ct(output_path: Path) -> Path:
+    """
+    Exports the YOLOv8 lung segmentation model to ONNX with a dynamic batch size.
+    YOLO keeps the class names, stride and task in the metadata of the ONNX model.
+
+    Parameters:
+    - output_path: Path of the `.onnx` model.
+
+    Returns:
+    - Path of the exported model.
+    """
+    exported_path = Path(YOLO(DLModelWeights.LUNG_CT.value).export(format="onnx", dynamic=True, simplify=True, opset=17))
+
+    if exported_path.resolve() != output_path.resolve():
+        exported_path.replace(output_path)
+
+    return output_path
+
+
+def quantize(model_path: Path) -> Path:
+    """
+    Quantizes the weights of an ONNX model to INT8, the activations are quantized dynamically at runtime.
+    The metadata of the model is copied to the quantized model.
+
+    Parameters:
+    - model_path: Path of the FP32 `.onnx` model.
+
+    Returns:
+    - Path of the quantized model.
+    """
+    quantized_path = get_quantized_model_path(model_path)
+    quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+
+    metadata = {prop.key: prop.value for prop in onnx.load(str(model_path)).metadata_props}
+    quantized_model = onnx.load(str(quantized_path))
+    onnx.helper.set_model_props(quantized_model, metadata)
+    onnx.save(quantized_model, str(quantized_path))
+    return quantized_path
+
+
+EXPORTERS = {
+    "chest_xray": (export_chest_xray, DLModelWeights.CHEST_XRAY_ONNX),
+    "lung_ct": (export_lung_ct, DLModelWeights.LUNG_CT_ONNX),
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the X-ray and lung CT models to ONNX for the CPU inference")
+    parser.add_argument("models", nargs="*", choices=list(EXPORTERS), default=list(EXPORTERS), help="The models to export, all by default")
+    parser.add_argument("--int8", action="store_true", help="Also save the INT8 dynamically quantized models")
+    args = parser.parse_args()
+
+    for name in args.models:
+        exporter, weights = EXPORTERS[name]
+        output_path = Path(weights.value)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        print(f"[INFO]: Exporting {name} to {exporter(output_path)}")
+        if args.int8:
+            print(f"[INFO]: Quantized {name} to {quantize(output_path)}")
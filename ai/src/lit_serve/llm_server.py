@@ -1,11 +1,15 @@
 # server.py
 import litserve as ls  # Import litserve library with alias ls
 import ollama  # Import ollama library
+from concurrent.futures import ThreadPoolExecutor
 from enums import DLModelEndpoint, DLModelWeights
+from common import ReadinessGate, get_server_address, get_server_options
 
 
 # (STEP 1) - DEFINE THE API (compound AI system)
 class LLMAPI(ls.LitAPI):
+    readiness: ReadinessGate | None = None  # Set by the server, the worker reports ready after its warm-up
+
     def ask_ollama(self, prompt: str) -> str:
         """
         Sends a prompt to the Ollama model and retrieves the response.
@@ -37,6 +41,8 @@ class LLMAPI(ls.LitAPI):
         """
         self.verify_llm_download()
         self.ask_ollama("")  # Load the model by sending an initial prompt
+        if self.readiness:
+            self.readiness.mark_ready()
 
     def decode_request(self, request: dict) -> str:
         """
@@ -45,14 +51,31 @@ class LLMAPI(ls.LitAPI):
         """
         return request["input"]  # Extract and return the input prompt
 
-    def predict(self, prompt: str) -> str:
+    def batch(self, inputs: list[str]) -> list[str]:
+        """
+        Keeps the prompts of the batch as a list.
+        """
+        return list(inputs)
+
+    def predict(self, prompt: str | list[str]) -> str | list[str]:
         """
-        Runs inference using the Ollama model with the provided prompt.
-        Returns the response from the model as a string.
+        Runs inference using the Ollama model with the provided prompt, or with the prompts of a batch.
+        The prompts of a batch are sent together so Ollama can serve them in parallel.
+        Returns the response from the model as a string, for each prompt of a batch.
         """
+        if isinstance(prompt, list):
+            with ThreadPoolExecutor(max_workers=len(prompt) or 1) as executor:
+                return list(executor.map(self.ask_ollama, prompt))  # Get the responses from the Ollama model
+        
         response: str = self.ask_ollama(prompt)  # Get the response from the Ollama model
         return response  # Return the model's response
 
+    def unbatch(self, output: list[str]) -> list[str]:
+        """
+        Returns the response of each prompt of the batch.
+        """
+        return list(output)
+
     def encode_response(self, output: str) -> dict:
         """
         Encodes the model's response into a dictionary to be sent as a payload.
@@ -62,7 +85,11 @@ class LLMAPI(ls.LitAPI):
 
 # (STEP 2) - START THE SERVER
 if __name__ == "__main__":
-    port, api_path = DLModelEndpoint.LLM.strip().split(":")[-1].split("/")
+    port, api_path = get_server_address("LLM", DLModelEndpoint.LLM.value)
     # Scale with advanced features (batching, GPUs, etc...)
-    server: ls.LitServer = ls.LitServer(LLMAPI(), accelerator='cuda', devices=1, max_batch_size=1, api_path=f'/{api_path}')  # Initialize and configure the server
+    options = get_server_options("LLM", max_batch_size=4, batch_timeout=0.05)
+    api = LLMAPI()
+    api.readiness = ReadinessGate(options["devices"] * options["workers_per_device"])
+    server: ls.LitServer = ls.LitServer(api, api_path=api_path, **options)  # Initialize and configure the server
+    api.readiness.add_endpoint(server.app)  # GET /ready reports ready once all the workers are warm
     server.run(port=port)
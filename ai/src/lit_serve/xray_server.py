@@ -5,56 +5,90 @@ import requests
 import torch
 import torchxrayvision as xrv
 import numpy as np
+import json
 import skimage
-from enums import DLModelEndpoint, DLModelWeights, LLMPPrompt
+from enums import DLModelEndpoint, DLModelWeights, InferenceBackend, LLMPPrompt
+from common import (
+    ReadinessGate, create_onnx_session, get_inference_backend, get_onnx_options, get_ordered_files,
+    get_server_address, get_server_options, get_warmup_batch_sizes, load_volume, split_batch, warm_up,
+)
 
 
 # Define LitServe API for processing chest X-ray images
 class ChestXRayAPI(ls.LitAPI):
+    readiness: ReadinessGate | None = None  # Set by the server, the worker reports ready after its warm-up
 
-    def predict_skimage(self, folder_path: str, accuracy_threshold: float) -> tuple:
+    def predict_skimage(self, batch: list[tuple]) -> list[tuple]:
         """
-        Predicts the presence of pathologies in X-ray images from a given folder.
-        Takes the folder path containing the images and an accuracy threshold.
-        Returns a list of dictionaries, each containing slice index, classification, and accuracy.
+        Predicts the presence of pathologies in X-ray images of the batched requests in a single forward pass.
+        Takes the decoded requests, each with the folder path containing the images, an accuracy threshold and the optional `.npy` volume path.
+        Returns the output of each request, a list of dictionaries containing slice index, classification, and accuracy.
         """
-        img: np.ndarray = self.preprocess(folder_path)  # Preprocess images from the folder
+        images: list[np.ndarray] = [self.preprocess(folder_path, volume_path) for folder_path, _, volume_path in batch]  # Preprocess images from the folders or volumes
+        sizes: list[int] = [len(img) for img in images]  # Number of images of each request
+        images = [img for img in images if len(img)]
 
-        with torch.no_grad():  # Disable gradient calculation for inference
-            img = torch.from_numpy(img)  # Convert numpy array to torch tensor
-            
-            if len(img.shape) == 3:  # Check if the image has 3 dimensions (H, W, C)
-                img = img.unsqueeze(0)  # Add a batch dimension
+        if not images:
+            return [self.postprocess(torch.empty((0, len(self.pathologies))), accuracy_threshold) for _, accuracy_threshold, _ in batch]
 
-            if torch.cuda.is_available():  # Check if CUDA (GPU) is available
-                img = img.cuda()  # Move image tensor to GPU
+        preds: torch.Tensor = self.forward(np.concatenate(images))  # Stack the images of all the requests in a single forward pass
 
-            preds: torch.Tensor = self.model(img).cpu()  # Get model predictions and move them to CPU
-            return self.postprocess(preds, accuracy_threshold)  # Postprocess predictions
+        # Split the predictions back to the requests and postprocess them
+        return [
+            self.postprocess(request_preds, accuracy_threshold)
+            for request_preds, (_, accuracy_threshold, _) in zip(split_batch(preds, sizes), batch)
+        ]
+
+    def forward(self, images: np.ndarray) -> torch.Tensor:
+        """
+        Runs the model on the stacked images with the configured backend.
+        Returns the predictions of the images as a CPU tensor.
+        """
+        if self.backend == InferenceBackend.ONNX:
+            return torch.from_numpy(self.session.run(None, {self.session.get_inputs()[0].name: images})[0])  # Run the exported model with ONNX Runtime
+
+        with torch.no_grad():  # Disable gradient calculation for inference
+            img = torch.from_numpy(images).to(self.device)  # Move image tensor to the device of the model
+            return self.model(img).cpu()  # Get model predictions and move them to CPU
 
     def grab_and_resize_images(self, folder_path: str, img_size: tuple = (224, 224)) -> list:
         """
         Grab all the images in the given folder name, then resize each image to the specified `img_size`.
         """
         all_images: list = []  # Initialize list to store images
-        for img_path in Path(folder_path).glob('*'):  # Iterate over all files in the folder
-            if img_path.suffix.lower() not in ['.png', '.jpeg', '.jpg']: 
-                continue  # Filter images by extension
+        for img_path in get_ordered_files(folder_path, ('.png', '.jpeg', '.jpg')):  # Iterate over the images in the slice order
             img: np.ndarray = skimage.io.imread(img_path, as_gray=True)  # Read image as grayscale
-            img = skimage.transform.resize(img, img_size, anti_aliasing=True)  # Resize image to 224x224
-            img = img[None, :, :]  # Add color channel as 1 (for grayscale)
-            all_images.append(img)  # Append processed image to list
+            all_images.append(self.resize_image(img, img_size))  # Append processed image to list
         
         return all_images
     
-    def preprocess(self, folder_path: str) -> np.ndarray:
+    def grab_and_resize_volume(self, volume_path: str, img_size: tuple = (224, 224)) -> list:
+        """
+        Read the slices of the memory-mapped `.npy` volume, then resize each slice to the specified `img_size`.
+        The volume holds the same grayscale pixels as the PNG images, without the PNG decoding.
+        """
+        volume, _ = load_volume(volume_path)
+        return [self.resize_image(np.asarray(img), img_size) for img in volume]
+    
+    def resize_image(self, img: np.ndarray, img_size: tuple) -> np.ndarray:
+        """
+        Resize a grayscale image to the specified `img_size` and add the color channel.
+        """
+        img = skimage.transform.resize(img, img_size, anti_aliasing=True, preserve_range=True)  # Resize image to 224x224, keeping 0-255
+        img = img.astype(np.float32)
+        return img[None, :, :]  # Add color channel as 1 (for grayscale)
+    
+    def preprocess(self, folder_path: str, volume_path: str | None = None) -> np.ndarray:
         """
-        Preprocesses all images in the specified folder.
+        Preprocesses all images in the specified folder or volume.
         Converts images to grayscale, resizes them, and normalizes the pixel values.
         Returns the processed images as a numpy array.
         """
-        all_images = self.grab_and_resize_images(folder_path)
-        arr: np.ndarray = np.array(all_images, dtype=np.uint8)  # Convert list to numpy array
+        if volume_path:
+            all_images = self.grab_and_resize_volume(volume_path)
+        else:
+            all_images = self.grab_and_resize_images(folder_path)
+        arr: np.ndarray = np.array(all_images, dtype=np.float32)  # Convert list to numpy array
         arr = xrv.datasets.normalize(arr, 255)  # Normalize the array values
         return arr  # Return the preprocessed images as numpy array
     
@@ -93,7 +127,7 @@ class ChestXRayAPI(ls.LitAPI):
         Returns a list of dictionaries with slice index, classification, and accuracy.
         """
         output: list = []  # Initialize output list
-        pathologies: list = self.model.pathologies  # Get the list of pathologies from the model
+        pathologies: list = self.pathologies  # Get the list of pathologies of the model
         all_predictions: np.ndarray = model_output_tensor.detach().numpy()  # Convert tensor to numpy array
         top_ones = []
         
@@ -117,30 +151,65 @@ class ChestXRayAPI(ls.LitAPI):
     def setup(self, device: str) -> None:
         """
         Sets up the model for inference by loading the pre-trained weights.
-        If a GPU is available, the model is moved to the GPU.
+        The model is moved to the device of the worker, the CPU if no GPU is available.
+        With the ONNX backend, the model exported by `export_onnx.py` runs with ONNX Runtime.
         """
+        self.device: str = device if device.startswith("cuda") and torch.cuda.is_available() else "cpu"  # Each worker runs on its own device
+        self.backend = InferenceBackend(get_inference_backend("CHEST_XRAY"))
+
+        if self.backend == InferenceBackend.ONNX:
+            self.session = create_onnx_session(device=self.device, **get_onnx_options("CHEST_XRAY", DLModelWeights.CHEST_XRAY_ONNX.value))
+            self.pathologies: list = json.loads(self.session.get_modelmeta().custom_metadata_map["pathologies"])  # Saved in the model by the export
+            print("[INFO]: X-Ray ONNX Model Loaded")  # Print a loading confirmation message
+            self.warm_up()
+            return
+
         weights: str = DLModelWeights.CHEST_XRAY.value  # Define the weights to be loaded
         model: torch.nn.Module = xrv.models.get_model(weights)  # Load the model with the specified weights
-        if torch.cuda.is_available():  # Check if CUDA (GPU) is available
-            model = model.cuda()  # Move the model to GPU
+        model = model.to(self.device)  # Move the model to the device
         
         print("[INFO]: X-Ray Model Loaded")  # Print a loading confirmation message
         self.model: torch.nn.Module = model  # Store the model as a class attribute
+        self.pathologies: list = model.pathologies  # Get the list of pathologies from the model
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """
+        Runs the model on blank images at the expected input shape, then reports the worker as ready.
+        """
+        warm_up("X-Ray", lambda batch_size: self.forward(np.zeros((batch_size, 1, 224, 224), dtype=np.float32)),
+                get_warmup_batch_sizes("CHEST_XRAY", (1, 8)))
+        if self.readiness:
+            self.readiness.mark_ready()
 
     def decode_request(self, request: dict) -> tuple:
         """
         Decodes the incoming request to extract necessary parameters.
-        Returns a tuple containing the folder path and accuracy threshold.
+        Returns a tuple containing the folder path, accuracy threshold and the optional volume path.
+        """
+        return (request.get("folder_path"), request.get('accuracy_threshold', 0.6), request.get("volume_path"))  # Extract and return parameters
+
+    def batch(self, inputs: list[tuple]) -> list[tuple]:
+        """
+        Keeps the decoded requests of the batch as a list, their images are stacked in `predict`.
+        """
+        return list(inputs)
+
+    def predict(self, params: tuple | list[tuple]) -> tuple | list[tuple]:
+        """
+        Receives the parameters of a request or of a batch of requests and calls the prediction method.
+        Returns the prediction results as a list of dictionaries, for each request of a batch.
         """
-        return (request["folder_path"], request.get('accuracy_threshold', 0.6))  # Extract and return parameters
+        if isinstance(params, list):
+            return self.predict_skimage(params)  # Make predictions of the batch and return the results
+        
+        return self.predict_skimage([params])[0]  # Make predictions and return the result
 
-    def predict(self, params: tuple) -> tuple:
+    def unbatch(self, output: list[tuple]) -> list[tuple]:
         """
-        Receives the parameters and calls the prediction method.
-        Returns the prediction results as a list of dictionaries.
+        Returns the prediction results of each request of the batch.
         """
-        folder_path, accuracy_threshold = params  # Unpack parameters
-        return self.predict_skimage(folder_path, accuracy_threshold)  # Make predictions and return the result
+        return list(output)
 
     def encode_response(self, payload: tuple) -> dict:
         """
@@ -152,6 +221,10 @@ class ChestXRayAPI(ls.LitAPI):
 
 # Start the server
 if __name__ == "__main__":
-    port, api_path = DLModelEndpoint.CHEST_XRAY.strip().split(":")[-1].split("/")
-    server: ls.LitServer = ls.LitServer(ChestXRayAPI(), accelerator='cuda', devices=1, max_batch_size=1, api_path=f'/{api_path}')  # Initialize and configure the server
+    port, api_path = get_server_address("CHEST_XRAY", DLModelEndpoint.CHEST_XRAY.value)
+    options = get_server_options("CHEST_XRAY", max_batch_size=8, batch_timeout=0.05)  # Fuse concurrent requests in one forward pass
+    api = ChestXRayAPI()
+    api.readiness = ReadinessGate(options["devices"] * options["workers_per_device"])
+    server: ls.LitServer = ls.LitServer(api, api_path=api_path, **options)  # Initialize and configure the server
+    api.readiness.add_endpoint(server.app)  # GET /ready reports ready once all the workers are warm
     server.run(port=port)
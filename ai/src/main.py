@@ -1,8 +1,8 @@
 import logging
 from typing import Annotated
-from fastapi import BackgroundTasks, Depends, FastAPI, UploadFile
-from dto import PredictSeriesQuery, Result, ResultWithData
-from services import PredictionService
+from fastapi import Depends, FastAPI, HTTPException, UploadFile
+from dto import PredictSeriesQuery, Result, ResultWithData, StagedSeries
+from services import PredictionQueue, PredictionService
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:    %(message)s")
 
@@ -16,14 +16,37 @@ async def root() -> ResultWithData[str]:
 async def predict(
     query: Annotated[PredictSeriesQuery, Depends()],
     file: UploadFile, # The zip file containing instances of the series, CT_1.dcm, CT_2.dcm, etc.
-    background_tasks: BackgroundTasks,
+    prediction_queue: Annotated[PredictionQueue, Depends()],
     prediction_service: Annotated[PredictionService, Depends()],
 ) -> Result:
     # Save the uploaded file to the temp directory and get the file path
     zip_filepath = prediction_service.save_upload_file(file)
 
-    # Process prediction in the background to avoid blocking the API
+    # Process prediction in the model queue to avoid blocking the API
     # When the prediction is completed, notify the backend about the status via the API
-    background_tasks.add_task(prediction_service.predict, query.model_type, query.series_id, query.modality, query.body_part, zip_filepath)
+    prediction_queue.submit(
+        query.model_type, prediction_service.predict,
+        query.model_type, query.series_id, query.modality, query.body_part, zip_filepath, query.dicom_url,
+    )
+
+    return Result.succeed()
+
+@app.post("/predict/staged")
+async def predict_staged(
+    query: Annotated[PredictSeriesQuery, Depends()],
+    staged_series: StagedSeries, # The manifest of the series instances staged in the shared staging directory
+    prediction_queue: Annotated[PredictionQueue, Depends()],
+    prediction_service: Annotated[PredictionService, Depends()],
+) -> Result:
+    # Resolve the staged series folder, the instances are read in place without copying them
+    result = prediction_service.resolve_staged_series(staged_series.manifest_path)
+
+    if not result.success or not result.data:
+        raise HTTPException(status_code=400, detail=result.error)
+
+    prediction_queue.submit(
+        query.model_type, prediction_service.predict,
+        query.model_type, query.series_id, query.modality, query.body_part, result.data, query.dicom_url,
+    )
 
     return Result.succeed()
@@ -1,2 +1,5 @@
 from .prediction_service import *
 from .storage_service import *
+from .prediction_queue import *
+from .model_load_balancer import *
+from .segmentation_export_service import *
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+import requests
+from typing import Any
+from urllib.parse import urlsplit
+from lit_serve.enums import DLModelEndpoint
+
+class ModelReplica:
+    """A replica of a model server with its health and number of requests in flight"""
+    def __init__(self, url: str) -> None:
+        parsed_url = urlsplit(url)
+        self.url = url
+        self.health_url = f"{parsed_url.scheme}://{parsed_url.netloc}/ready"
+        self.in_flight = 0
+        self.healthy = True
+        self.checked_at = 0.0
+
+class ModelLoadBalancer:
+    """
+    Spreads the requests of each model across the URLs of its replicas, listed in `{ENDPOINT}_REPLICAS`
+    (e.g. `CHEST_XRAY_REPLICAS=http://ml-1:8010/chest_xray,http://ml-2:8010/chest_xray`), the endpoint URL by default.
+    A request goes to the healthy replica with the fewest requests in flight, and to the next one if the replica is unreachable.
+    The health of a replica is checked on its `/ready` endpoint at most once per interval, a cold replica gets no requests.
+    """
+    _logger = logging.getLogger(__name__)
+    _health_check_interval = float(os.getenv("MODEL_HEALTH_CHECK_INTERVAL") or 10)
+    _health_check_timeout = float(os.getenv("MODEL_HEALTH_CHECK_TIMEOUT") or 2)
+    _replicas: dict[DLModelEndpoint, list[ModelReplica]] = {}
+    _next_replica: dict[DLModelEndpoint, int] = {}
+    _lock = threading.Lock()
+
+    def post(self, model_endpoint: DLModelEndpoint, payload: dict[str, Any]) -> requests.Response:
+        """
+        Send a prediction request to a replica of the model server.
+        Args:
+            model_endpoint: The endpoint of the model.
+            payload: The JSON payload of the request.
+        Returns:
+            requests.Response: The response of the replica.
+        Raises:
+            requests.ConnectionError: If none of the replicas can be reached.
+        """
+        error: Exception | None = None
+
+        for replica in self._get_candidates(model_endpoint):
+            with self._lock:
+                replica.in_flight += 1
+
+            try:
+                response = requests.post(replica.url, json=payload)
+            except requests.ConnectionError as e:
+                self._logger.warning(f"Model replica {replica.url} is unreachable, trying the next one: {e}")
+                self._set_health(replica, False)
+                error = e
+                continue
+            finally:
+                with self._lock:
+                    replica.in_flight -= 1
+
+            # The replica is not ready or overloaded, the request is not processed
+            if response.status_code == 503:
+                self._logger.warning(f"Model replica {replica.url} is unavailable, trying the next one")
+                self._set_health(replica, False)
+                error = requests.ConnectionError(f"Model replica {replica.url} is unavailable")
+                continue
+
+            return response
+
+        raise error or requests.ConnectionError(f"No replica of the model {model_endpoint.name}")
+
+    def get_replicas(self, model_endpoint: DLModelEndpoint) -> list[ModelReplica]:
+        """Get the replicas of the model server"""
+        with self._lock:
+            if model_endpoint not in self._replicas:
+                urls = os.getenv(f"{model_endpoint.name}_REPLICAS") or model_endpoint.value
+                self._replicas[model_endpoint] = [ModelReplica(url.strip()) for url in urls.split(",") if url.strip()]
+                self._next_replica[model_endpoint] = 0
+            return self._replicas[model_endpoint]
+
+    def _get_candidates(self, model_endpoint: DLModelEndpoint) -> list[ModelReplica]:
+        """Get the replicas in the order to try them, the healthy ones with the fewest requests in flight first"""
+        replicas = self.get_replicas(model_endpoint)
+        now = time.monotonic()
+
+        if not replicas:
+            return []
+
+        for replica in replicas:
+            if now - replica.checked_at >= self._health_check_interval:
+                self._check_health(replica)
+
+        with self._lock:
+            # Rotate the replicas so the ties are broken in a round-robin order
+            start = self._next_replica[model_endpoint]
+            self._next_replica[model_endpoint] = (start + 1) % len(replicas)
+            rotated = replicas[start:] + replicas[:start]
+
+            # The unhealthy replicas are tried last, in case the health checks are wrong
+            return sorted(rotated, key=lambda replica: (not replica.healthy, replica.in_flight))
+
+    def _check_health(self, replica: ModelReplica) -> None:
+        try:
+            healthy = requests.get(replica.health_url, timeout=self._health_check_timeout).ok
+        except requests.RequestException:
+            healthy = False
+
+        if not healthy:
+            self._logger.warning(f"Model replica {replica.url} failed the health check")
+
+        self._set_health(replica, healthy)
+
+    def _set_health(self, replica: ModelReplica, healthy: bool) -> None:
+        with self._lock:
+            replica.healthy = healthy
+            replica.checked_at = time.monotonic()
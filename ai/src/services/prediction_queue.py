@@ -0,0 +1,44 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+from dto.ml_model_type import MLModelType
+
+class PredictionQueue:
+    """
+    Runs the predictions in a bounded thread pool per model instead of the unbounded background tasks,
+    so a burst of requests waits in the queue instead of oversubscribing the model servers.
+    The queue is in memory, the backend re-sends the jobs lost on restart when their lease expires.
+    """
+    _logger = logging.getLogger(__name__)
+    _model_concurrency = int(os.getenv("PREDICTION_MODEL_CONCURRENCY") or 1)
+    _executors: dict[MLModelType, ThreadPoolExecutor] = {}
+    _lock = threading.Lock()
+
+    def submit(self, model_type: MLModelType, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        Submit a prediction to the thread pool of the model.
+        Args:
+            model_type: The type of the ML model used by the prediction.
+            func: The prediction function to run.
+            args: The arguments of the prediction function.
+        Returns:
+            Future: The future of the prediction.
+        """
+        future = self._get_executor(model_type).submit(func, *args)
+        future.add_done_callback(lambda f: self._log_error(model_type, f))
+        return future
+
+    def _get_executor(self, model_type: MLModelType) -> ThreadPoolExecutor:
+        with self._lock:
+            if model_type not in self._executors:
+                self._executors[model_type] = ThreadPoolExecutor(
+                    max_workers=self._model_concurrency,
+                    thread_name_prefix=f"predict-{model_type.value}",
+                )
+            return self._executors[model_type]
+
+    def _log_error(self, model_type: MLModelType, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self._logger.error(f"Prediction with model '{model_type.value}' failed: {future.exception()}")
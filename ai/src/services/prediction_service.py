@@ -1,25 +1,60 @@
+import json
 import requests
 import logging
 import os
 import shutil
 import cxr
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import repeat
 from fastapi import UploadFile
 from uuid import UUID, uuid4
+from urllib.parse import urljoin
 from zipfile import ZipFile
-from dto import Result, UpdatePredictStatus
+from dto import ModelInputFormat, Result, ResultWithData, UpdatePredictStatus
 from dto.prediction_status import PredictionStatus
 from dto.ml_model_type import MLModelType
-from utils.dicom_utils import dicom_to_png
+from utils.dicom_utils import dicom_to_png, dicom_to_volume_slice, read_slice_header, sort_slices
 from utils.env_utils import getenv_required
-from lit_serve.enums import DLModelEndpoint
+from lit_serve.enums import DLModelEndpoint, WindowPreset
+from services.model_load_balancer import ModelLoadBalancer
+from services.segmentation_export_service import SegmentationExportService
+from lit_serve.common import (
+    SLICE_INDEX_FILE_NAME, VOLUME_FILE_NAME, create_volume, get_metadata_path, save_slice_index, save_volume_metadata,
+)
 from pathlib import Path
 
+def _parse_window_presets(value: str | None) -> dict[str, WindowPreset]:
+    """Parse the per-model window presets in the format `model_type=preset,model_type=preset`"""
+    presets: dict[str, WindowPreset] = {}
+
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+
+        model_type, preset = item.split("=", 1)
+        presets[model_type.strip()] = WindowPreset[preset.strip().upper()]
+
+    return presets
+
 class PredictionService:
     _backend_url = getenv_required("BACKEND_URL")
     _logger = logging.getLogger(__name__)
     _temp_dir = Path("./temp")
+    _shared_staging_dir = os.getenv("SHARED_STAGING_DIR")
+    _conversion_workers = int(os.getenv("DICOM_CONVERSION_WORKERS") or os.cpu_count() or 1)
+    _conversion_pool: ProcessPoolExecutor | None = None
+    _model_input_format = ModelInputFormat(os.getenv("MODEL_INPUT_FORMAT") or ModelInputFormat.VOLUME.value)
+    _window_presets = _parse_window_presets(os.getenv("MODEL_WINDOW_PRESETS"))
+    _conversion_pool_lock = threading.Lock()
+    _load_balancer = ModelLoadBalancer()
+    _segmentation_export = SegmentationExportService()
+    _non_dicom_file_names = {
+        SLICE_INDEX_FILE_NAME, VOLUME_FILE_NAME, get_metadata_path(VOLUME_FILE_NAME).name, "manifest.json",
+    }
+    """The files written to the series folder by the backend staging and the conversion, never read as slices"""
 
     def __init__(self) -> None:
         self._temp_dir.mkdir(exist_ok=True, parents=True)
@@ -41,14 +76,66 @@ class PredictionService:
         return str(file_path.resolve())
 
 
-    def process_zip_file(self, zip_filepath: str, convert_dicom_to_png=True) -> tuple | str | None:
-        """Extracts a zip file then processes DICOM files to PNG.
+    def resolve_staged_series(self, manifest_path: str) -> ResultWithData[str]:
+        """
+        Resolve the folder of a series staged by the backend in the shared staging directory.
+        Args:
+            manifest_path (str): The path of the series manifest relative to the shared staging directory.
+        Returns:
+            ResultWithData[str]: The result with the full path of the staged series folder.
+        """
+        if not self._shared_staging_dir:
+            return ResultWithData.fail("The shared staging directory is not configured, set the SHARED_STAGING_DIR environment variable")
+        
+        staging_dir = Path(self._shared_staging_dir).resolve()
+        manifest_file = (staging_dir / manifest_path).resolve()
+
+        if not manifest_file.is_relative_to(staging_dir) or not manifest_file.is_file():
+            return ResultWithData.fail(f"Manifest '{manifest_path}' not found in the shared staging directory")
+
+        try:
+            with open(manifest_file, "r") as file:
+                manifest = json.load(file)
+
+            missing_files = [item["name"] for item in manifest["files"] if not (manifest_file.parent / item["name"]).is_file()]
+        except (ValueError, KeyError, TypeError) as e:
+            return ResultWithData.fail(f"Invalid manifest '{manifest_path}': {e}")
+        
+        if missing_files:
+            return ResultWithData.fail(f"Staged series is incomplete, missing files: {missing_files}")
+        
+        return ResultWithData[str].succeed(str(manifest_file.parent))
+
+    def process_series(self, series_path: str, input_format: ModelInputFormat = ModelInputFormat.PNG, window: tuple[float, float] | None = None) -> tuple[str, list[float] | None, ModelInputFormat] | None:
+        """Prepares the DICOM files of a series for the models.
+
+        Args:
+            series_path (str): The path to the uploaded zip file or to the folder of the staged series.
+            input_format (ModelInputFormat): The format of the series expected by the model.
+            window (tuple[float, float] | None): The window of the series, the slice maximum is used if None.
+
+        Returns:
+            tuple | None: The result of `process_dicom_folder`, None if processing failed.
+        """
+        if Path(series_path).is_dir():
+            try:
+                return self.process_dicom_folder(Path(series_path), input_format, window)
+            except Exception as e:
+                self._logger.error(f"Error processing the staged series folder {series_path}: {e}")
+                return None
+
+        return self.process_zip_file(series_path, input_format, window)
+
+    def process_zip_file(self, zip_filepath: str, input_format: ModelInputFormat = ModelInputFormat.PNG, window: tuple[float, float] | None = None) -> tuple[str, list[float] | None, ModelInputFormat] | None:
+        """Extracts a zip file then processes DICOM files to the model input format.
 
         Args:
             zip_filepath (str): The path to the zip file to be extracted.
+            input_format (ModelInputFormat): The format of the series expected by the model.
+            window (tuple[float, float] | None): The window of the series, the slice maximum is used if None.
 
         Returns:
-            str: The full path of the converted PNG images folder.
+            tuple | None: The result of `process_dicom_folder`, None if processing failed.
         """
 
         # Convert paths to pathlib.Path objects
@@ -69,17 +156,7 @@ class PredictionService:
             with ZipFile(zip_filepath, "r") as zip_ref:
                 zip_ref.extractall(extract_path)
 
-            if convert_dicom_to_png:
-                # Process the DICOM files in the extracted folder
-                dicom_files = extract_path.iterdir()
-                spacing = None
-                images_folder = extract_path / "images"
-                for dicom_file in dicom_files:
-                    file_path, spacing = dicom_to_png(dicom_file, images_folder, calc_pixel_spacing=spacing is None)
-
-                return str(images_folder.resolve()), spacing
-            else:
-                return str(extract_folder.resolve())
+            return self.process_dicom_folder(extract_path, input_format, window)
             
         except Exception as e:
             self._logger.error(f"Error processing the zip file: {e}")
@@ -87,6 +164,153 @@ class PredictionService:
             zip_filepath.unlink()
             shutil.rmtree(extract_path)
             return None
+        
+    def process_dicom_folder(self, folder_path: Path, input_format: ModelInputFormat = ModelInputFormat.PNG, window: tuple[float, float] | None = None) -> tuple[str, list[float] | None, ModelInputFormat]:
+        """Processes the DICOM files of a folder to the model input format.
+
+        Args:
+            folder_path (Path): The folder containing the DICOM files of the series.
+            input_format (ModelInputFormat): The format of the series expected by the model.
+            window (tuple[float, float] | None): The window of the series, the slice maximum is used if None.
+
+        Returns:
+            tuple: The full path of the model input, the pixel spacing and the format of the input.
+            The volume format falls back to PNG images if the slices can't be stacked to a volume.
+        """
+        # Index the slices once from their headers, the model servers read the files in the order of the index
+        # and the geometry of the series comes from the index, so no slice is decoded only to read its tags
+        slices = self.index_series(folder_path)
+        spacing = self.get_pixel_spacing(slices)
+
+        if input_format == ModelInputFormat.DICOM:
+            return str(folder_path.resolve()), spacing, ModelInputFormat.DICOM
+
+        if input_format == ModelInputFormat.VOLUME:
+            volume_path = self.convert_to_volume(folder_path, slices, window)
+
+            if volume_path is not None:
+                return volume_path, spacing, ModelInputFormat.VOLUME
+            
+            self._logger.info(f"The slices of {folder_path} can't be stacked to a volume, converting them to PNG images")
+
+        dicom_files = [folder_path / entry["file"] for entry in slices]
+        return self.convert_to_png(folder_path, dicom_files, window), spacing, ModelInputFormat.PNG
+
+    def index_series(self, folder_path: Path) -> list[dict]:
+        """Reads the headers of the DICOM files without their pixel data, sorts the slices
+        by their position or instance number and saves the slice index in the folder.
+
+        Args:
+            folder_path (Path): The folder containing the DICOM files of the series.
+                The files are indexed whatever their names, the files which are not DICOM images are skipped.
+
+        Returns:
+            list[dict]: The slice headers in the slice order.
+        """
+        files = [file for file in folder_path.iterdir() if file.is_file() and file.name not in self._non_dicom_file_names]
+        headers = self._get_conversion_pool().map(read_slice_header, files, chunksize=self._get_chunksize(len(files)))
+        slices = sort_slices([header for header in headers if header is not None])
+
+        for index, entry in enumerate(slices):
+            entry["index"] = index
+
+        save_slice_index(folder_path, slices)
+        return slices
+
+    @staticmethod
+    def get_pixel_spacing(slices: list[dict]) -> list[float] | None:
+        """Get the pixel spacing of the series from the first slice having it in the index"""
+        if not slices:
+            return None
+        
+        return next((entry["pixel_spacing"] for entry in slices if entry["pixel_spacing"]), [0.5, 0.5])
+
+    def convert_to_png(self, folder_path: Path, dicom_files: list[Path], window: tuple[float, float] | None = None) -> str:
+        """Converts the DICOM files to PNG images in the `images` subfolder.
+
+        Args:
+            folder_path (Path): The folder containing the DICOM files of the series.
+            dicom_files (list[Path]): The DICOM files in the slice order.
+            window (tuple[float, float] | None): The window of the series, the slice maximum is used if None.
+
+        Returns:
+            str: The full path of the converted PNG images folder.
+        """
+        images_folder = folder_path / "images"
+        images_folder.mkdir(parents=True, exist_ok=True)
+
+        # Convert the slices in parallel, the spacing is already in the slice index
+        list(self._get_conversion_pool().map(
+            dicom_to_png, dicom_files, repeat(images_folder), repeat(window),
+            chunksize=self._get_chunksize(len(dicom_files)),
+        ))
+
+        return str(images_folder.resolve())
+
+    def convert_to_volume(self, folder_path: Path, slices: list[dict], window: tuple[float, float] | None = None) -> str | None:
+        """Decodes the DICOM files into a memory-mapped `.npy` volume with a JSON sidecar,
+        so the model servers read the pixels directly without the PNG encoding and decoding.
+
+        Args:
+            folder_path (Path): The folder containing the DICOM files of the series.
+            slices (list[dict]): The slice headers in the slice order.
+            window (tuple[float, float] | None): The window of the series, the slice maximum is used if None.
+
+        Returns:
+            str | None: The full path of the volume,
+            None if a file has no pixel data or the slices have different shapes.
+        """
+        if not slices:
+            return None
+        
+        header = slices[0]
+        rows, columns = header["rows"], header["columns"]
+
+        if any(entry["rows"] != rows or entry["columns"] != columns for entry in slices):
+            return None
+
+        # The workers write the slices directly to the memory-mapped file
+        dicom_files = [folder_path / entry["file"] for entry in slices]
+        volume_path = folder_path / VOLUME_FILE_NAME
+        volume = create_volume(volume_path, (len(dicom_files), rows, columns))
+        del volume
+
+        written = list(self._get_conversion_pool().map(
+            dicom_to_volume_slice, dicom_files, repeat(volume_path), range(len(dicom_files)), repeat(window),
+            chunksize=self._get_chunksize(len(dicom_files)),
+        ))
+
+        if not all(written):
+            volume_path.unlink()
+            return None
+
+        save_volume_metadata(volume_path, {
+            "shape": [len(dicom_files), rows, columns],
+            "dtype": "uint8",
+            "window": list(window) if window else None,
+            "spacing": self.get_pixel_spacing(slices),
+            "slice_thickness": header["slice_thickness"] or 1,
+            "orientation": header["orientation"] or [1, 0, 0, 0, 1, 0],
+            "slice_order": [entry["file"] for entry in slices],
+        })
+
+        return str(volume_path.resolve())
+
+    def _get_chunksize(self, files_count: int) -> int:
+        """Get the number of files sent to a conversion worker at once"""
+        return max(1, files_count // (self._conversion_workers * 4))
+
+    @classmethod
+    def _get_conversion_pool(cls) -> ProcessPoolExecutor:
+        """Get the process pool converting the DICOM slices, shared by all the predictions"""
+        with cls._conversion_pool_lock:
+            if cls._conversion_pool is None:
+                # Spawn the workers, forking a process with running threads is unsafe
+                cls._conversion_pool = ProcessPoolExecutor(
+                    max_workers=cls._conversion_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return cls._conversion_pool
 
     def predict(
             self, 
@@ -94,7 +318,8 @@ class PredictionService:
             series_id: UUID,
             modality: str,
             body_part: str | None,
-            zip_file: str,
+            series_path: str,
+            dicom_url: str | None = None,
             accuracy_threshold: float = 0.7
         ) -> None:
         """
@@ -104,16 +329,29 @@ class PredictionService:
             series_id: The ID of the series.
             modality: The modality of the series.
             body_part: The body part of the series.
-            zip_file: The zip file containing the DICOM images.
+            series_path: The zip file or the staged folder containing the DICOM images.
+            dicom_url: The DICOMweb URL of the PACS of the series, the DICOM SEG of the masks are stored to it.
         """
         
         if any(model_type == e for e in MLModelType):
-            self.call_dl_model_api(model_type, zip_file, accuracy_threshold, series_id, modality, body_part)
+            self.call_dl_model_api(model_type, series_path, accuracy_threshold, series_id, modality, body_part, dicom_url)
         else:
             self._logger.error(f"Model type not supported: {model_type}")
             self._send_prediction_status(series_id, UpdatePredictStatus(model_type=model_type, status=PredictionStatus.FAILED))
 
 
+    def get_window(self, model_type: MLModelType) -> tuple[float, float] | None:
+        """Get the window of the series of the model, None to normalize each slice by its maximum"""
+        preset = self._window_presets.get(MLModelType(model_type).value)
+        return preset.bounds if preset else None
+
+    def get_model_input_format(self, model_endpoint: DLModelEndpoint) -> ModelInputFormat:
+        """Get the format of the series expected by the model server"""
+        if model_endpoint == DLModelEndpoint.ABDOMINAL_ORGANS_SEGMENTATION:
+            return ModelInputFormat.DICOM
+        
+        return self._model_input_format
+
     def get_model_endpoint(self, model_type: MLModelType) -> DLModelEndpoint:
         if model_type == MLModelType.CHEST_XRAY_CLASSIFICATION: 
             return DLModelEndpoint.CHEST_XRAY
@@ -134,11 +372,12 @@ class PredictionService:
     def call_dl_model_api(
             self,
             model_type: MLModelType,
-            zip_filepath: str,
+            series_path: str,
             accuracy_threshold: float,
             series_id: UUID,
             modality: str,
             body_part: str | None,
+            dicom_url: str | None = None,
         ) -> None:
         """
         Predict the X-ray images in the series.
@@ -146,30 +385,44 @@ class PredictionService:
             series_id: The ID of the series.
             modality: The modality of the series.
             body_part: The body part of the series.
-            zip_filepath: The path to the zip file containing the DICOM images.
+            series_path: The path to the zip file or the staged folder containing the DICOM images.
+            dicom_url: The DICOMweb URL of the PACS of the series, the DICOM SEG of the masks are stored to it.
         """
-        self._logger.info(f"Started predicting series: {series_id}, modality: {modality}, body_part: {body_part}, zip_filepath: {zip_filepath}")
+        self._logger.info(f"Started predicting series: {series_id}, modality: {modality}, body_part: {body_part}, series_path: {series_path}")
         detected_diseases: dict[str, float] = {}        
 
         try:
             model_endpoint = self.get_model_endpoint(model_type)
-            convert_dicom_to_png = (model_endpoint != DLModelEndpoint.ABDOMINAL_ORGANS_SEGMENTATION)
-            result = self.process_zip_file(zip_filepath, convert_dicom_to_png=convert_dicom_to_png)
+            window = self.get_window(model_type)
+            result = self.process_series(series_path, self.get_model_input_format(model_endpoint), window)
             if result is None:
                 raise ValueError("images_folder doesn't exist and is None.")
             
-            if convert_dicom_to_png: 
-                images_folder, spacing = result
+            model_input, spacing, input_format = result
+            payload = {'accuracy_threshold':accuracy_threshold, 'pixel_spacing':spacing}
+
+            if input_format == ModelInputFormat.VOLUME:
+                payload['volume_path'] = model_input
+                payload['folder_path'] = str(Path(model_input).parent)
             else:
-                images_folder = result
+                payload['folder_path'] = model_input
+
+            response = self._load_balancer.post(model_endpoint, payload)
+            prediction_result = response.json()
+
+            if isinstance(prediction_result.get("output"), list):
+                # The output files stay on the replica that produced them, they are downloaded from its artifact endpoint
+                self.resolve_artifact_urls(prediction_result["output"], response.url)
+
+            if self._segmentation_export.supports(model_type) and prediction_result.get("output"):
+                # The DICOM folder of the series, the converted inputs are saved in it
+                series_folder = Path(model_input) if input_format == ModelInputFormat.DICOM else Path(model_input).parent
+                prediction_result["dicom_seg"] = self.export_segmentation(model_type, series_folder, prediction_result["output"], dicom_url)
 
-            payload = {'folder_path':images_folder, 'accuracy_threshold':accuracy_threshold, 'pixel_spacing':spacing}
-            response = requests.post(model_endpoint.value, json=payload)
-            
             predict_status = UpdatePredictStatus(
                 model_type=model_type,
                 status=PredictionStatus.COMPLETED,
-                result=response.json(),
+                result=prediction_result,
             )
             self._send_prediction_status(series_id, predict_status)
             self._logger.info(f"Prediction completed for series: {series_id}, modality: {modality}, predicted images: {len(detected_diseases)}")
@@ -181,6 +434,42 @@ class PredictionService:
             )
             self._send_prediction_status(series_id, predict_status)
         
+    @staticmethod
+    def resolve_artifact_urls(artifacts: list[dict], model_url: str) -> None:
+        """
+        Add the download URL of each artifact of a prediction result, the artifact paths are relative to the model server.
+        The URLs are internal addresses of the replicas, reachable by the backend but not by the viewer, and expire with the artifacts.
+        Args:
+            artifacts: The manifest of the artifacts returned by the model server.
+            model_url: The URL of the model replica that returned the result.
+        """
+        for artifact in artifacts:
+            if isinstance(artifact, dict) and "path" in artifact:
+                artifact["url"] = urljoin(model_url, artifact["path"])
+
+    def export_segmentation(self, model_type: MLModelType, series_folder: Path, masks_path: str, dicom_url: str | None = None) -> dict | None:
+        """
+        Export the masks of a segmentation model as a DICOM SEG, a failed export doesn't fail the prediction.
+        Args:
+            model_type: The type of the segmentation model.
+            series_folder: The folder containing the DICOM files of the series.
+            masks_path: The path of the mask file returned by the model server.
+            dicom_url: The DICOMweb URL of the PACS of the series, the DICOM SEG is only saved locally if None.
+        Returns:
+            dict | None: The path and the UIDs of the DICOM SEG, None if the export failed.
+        """
+        try:
+            result = self._segmentation_export.export(model_type, series_folder, masks_path, dicom_url)
+        except Exception as e:
+            self._logger.error(f"Failed to export the masks {masks_path} as DICOM SEG: {e}")
+            return None
+
+        if not result.success:
+            self._logger.warning(f"Masks {masks_path} not exported as DICOM SEG: {result.error}")
+            return None
+
+        return result.data
+
     def _send_prediction_status(self, series_id: UUID, status: UpdatePredictStatus) -> Result:
         """
         Send the prediction status to the backend.
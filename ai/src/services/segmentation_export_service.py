@@ -0,0 +1,105 @@
+import logging
+import os
+import uuid
+import requests
+from pathlib import Path
+from dto import Result, ResultWithData
+from dto.ml_model_type import MLModelType
+from utils.dicom_seg import create_segmentation
+from lit_serve.common import load_masks, load_slice_index
+
+_NEOPLASM_PROPERTY = (("49755003", "SCT", "Morphologically Altered Structure"), ("108369006", "SCT", "Neoplasm"))
+"""The segmented property category and type of the tumor segments"""
+
+class SegmentationExportService:
+    """
+    Converts the masks of the segmentation models to DICOM SEG objects referencing the source instances,
+    and stores them with STOW-RS to the PACS of the series, the viewer loads the overlays through DICOMweb.
+    The DICOM SEG objects are saved in the `seg` subfolder of the series, the slice index skips the subfolders.
+    """
+    _logger = logging.getLogger(__name__)
+    _stow_timeout = float(os.getenv("DICOM_SEG_STOW_TIMEOUT") or 60)
+    _segments: dict[MLModelType, tuple[str, tuple]] = {
+        MLModelType.LUNG_TUMOR_SEGMENTATION: ("Lung Tumor", _NEOPLASM_PROPERTY),
+        MLModelType.BRAIN_TUMOR_SEGMENTATION: ("Brain Tumor", _NEOPLASM_PROPERTY),
+    }
+
+    def supports(self, model_type: MLModelType) -> bool:
+        """Check if the masks of the model can be exported as DICOM SEG"""
+        return model_type in self._segments
+
+    def export(self, model_type: MLModelType, series_folder: Path, masks_path: str, dicom_url: str | None = None) -> ResultWithData[dict]:
+        """
+        Create the DICOM SEG of the masks of a series and store it to the PACS of the series.
+        Args:
+            model_type: The type of the segmentation model.
+            series_folder: The folder containing the DICOM files and the slice index of the series.
+            masks_path: The path of the mask file returned by the model server, the masks in the slice order.
+            dicom_url: The DICOMweb URL of the PACS of the series, the DICOM SEG is only saved locally if None.
+        Returns:
+            ResultWithData[dict]: The result with the path and the UIDs of the DICOM SEG, and whether it was stored to the PACS.
+        """
+        if not self.supports(model_type):
+            return ResultWithData.fail(f"The masks of the model '{model_type}' can't be exported as DICOM SEG")
+
+        slices = load_slice_index(series_folder)
+
+        if not slices:
+            return ResultWithData.fail(f"The series {series_folder} has no slice index")
+
+        masks, _ = load_masks(masks_path)
+        segment_label, segmented_property = self._segments[model_type]
+        seg = create_segmentation(
+            series_folder / slices[0]["file"], slices, masks, segment_label, segmented_property, MLModelType(model_type).value,
+        )
+
+        if seg is None:
+            return ResultWithData.fail(f"The masks of the series {series_folder} have no foreground or don't match the slices")
+
+        seg_folder = series_folder / "seg"
+        seg_folder.mkdir(exist_ok=True)
+        seg_path = seg_folder / f"{seg.SOPInstanceUID}.dcm"
+        seg.save_as(seg_path, enforce_file_format=True)
+
+        stored = False
+        if dicom_url:
+            result = self.store(seg_path, dicom_url)
+            stored = result.success
+
+            if not result.success:
+                self._logger.warning(f"Failed to store the DICOM SEG {seg_path} to the PACS: {result.error}")
+
+        return ResultWithData[dict].succeed({
+            "path": str(seg_path.resolve()),
+            "study_instance_uid": str(seg.get("StudyInstanceUID", "")),
+            "series_instance_uid": str(seg.SeriesInstanceUID),
+            "sop_instance_uid": str(seg.SOPInstanceUID),
+            "stored": stored,
+        })
+
+    def store(self, file_path: Path, dicom_url: str) -> Result:
+        """
+        Store a DICOM file to the PACS with a STOW-RS request to `{dicom_url}/studies`.
+        Args:
+            file_path: The path of the DICOM file.
+            dicom_url: The DICOMweb URL of the PACS.
+        Returns:
+            Result: The result of the request.
+        """
+        boundary = uuid.uuid4().hex
+        headers = {"Content-Type": f'multipart/related; type="application/dicom"; boundary={boundary}', "Accept": "application/dicom+json"}
+
+        with open(file_path, "rb") as file:
+            body = b"".join([
+                f"--{boundary}\r\nContent-Type: application/dicom\r\n\r\n".encode(),
+                file.read(),
+                f"\r\n--{boundary}--\r\n".encode(),
+            ])
+
+        try:
+            response = requests.post(f"{dicom_url.rstrip('/')}/studies", data=body, headers=headers, timeout=self._stow_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            return Result.fail(str(e))
+
+        return Result.succeed()
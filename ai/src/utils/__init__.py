@@ -1,2 +1,3 @@
 from .env_utils import *
 from .dicom_utils import *
+from .dicom_seg import *
\ No newline at end of file
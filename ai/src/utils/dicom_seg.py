@@ -0,0 +1,223 @@
+import numpy as np
+import pydicom
+import pydicom.uid
+from datetime import datetime
+from pathlib import Path
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.pixels import pack_bits
+from pydicom.sequence import Sequence
+from .dicom_utils import read_dicom_header
+
+SEGMENTATION_STORAGE_UID = "1.2.840.10008.5.1.4.1.1.66.4"
+"""SOP Class UID of the DICOM Segmentation Storage"""
+
+_SOURCE_HEADER_TAGS = [
+    "SOPClassUID", "StudyInstanceUID", "SeriesInstanceUID", "FrameOfReferenceUID",
+    "PatientName", "PatientID", "PatientBirthDate", "PatientSex",
+    "StudyDate", "StudyTime", "StudyID", "AccessionNumber", "ReferringPhysicianName",
+]
+"""The tags copied from the source series to the segmentation, the patient, study and frame of reference"""
+
+def create_segmentation(
+        source_file: Path,
+        slices: list[dict],
+        masks: np.ndarray,
+        segment_label: str,
+        segmented_property: tuple[tuple[str, str, str], tuple[str, str, str]],
+        algorithm_name: str,
+    ) -> Dataset | None:
+    """
+    Create a binary DICOM SEG of a single segment from the masks of a series,
+    each frame references the SOP Instance UID of its source slice so the viewer overlays it on the slice.
+    Only the slices with a foreground are saved as frames.
+
+    Args:
+        source_file (Path): A DICOM file of the series, its patient, study and frame of reference are copied.
+        slices (list[dict]): The slice headers of the series in the slice order, from the slice index.
+        masks (np.ndarray): The binary masks in the slice order, (slices, rows, columns), resized to the slices if needed.
+        segment_label (str): The label of the segment, e.g. `Lung Tumor`.
+        segmented_property (tuple): The (code value, coding scheme, meaning) of the category and of the type of the segment.
+        algorithm_name (str): The name of the model.
+
+    Returns:
+        Dataset: The DICOM SEG dataset, None if the masks have no foreground or don't match the slices.
+    """
+    if len(masks) != len(slices) or not slices:
+        return None
+
+    rows, columns = slices[0]["rows"], slices[0]["columns"]
+    frames = resize_masks(masks, rows, columns) != 0
+    frame_indices = np.flatnonzero(frames.any(axis=(1, 2)))
+
+    if not len(frame_indices):
+        return None
+
+    source = read_dicom_header(source_file, _SOURCE_HEADER_TAGS)
+    now = datetime.now()
+
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = SEGMENTATION_STORAGE_UID
+    file_meta.MediaStorageSOPInstanceUID = pydicom.uid.generate_uid()
+    file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+
+    seg = Dataset()
+    seg.file_meta = file_meta
+    seg.SOPClassUID = SEGMENTATION_STORAGE_UID
+    seg.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+
+    # Patient and study of the source series, the segmentation is a new series of the study
+    for keyword in _SOURCE_HEADER_TAGS[1:]:
+        if keyword != "SeriesInstanceUID" and keyword in source:
+            setattr(seg, keyword, source[keyword].value)
+
+    seg.Modality = "SEG"
+    seg.SeriesInstanceUID = pydicom.uid.generate_uid()
+    seg.SeriesNumber = 9000
+    seg.SeriesDescription = f"{segment_label} ({algorithm_name})"
+    seg.InstanceNumber = 1
+    seg.ContentDate = seg.SeriesDate = now.strftime("%Y%m%d")
+    seg.ContentTime = seg.SeriesTime = now.strftime("%H%M%S")
+    seg.ContentLabel = "SEGMENTATION"
+    seg.ContentDescription = segment_label
+    seg.ContentCreatorName = ""
+    seg.Manufacturer = "Med Image Scanner"
+    seg.ManufacturerModelName = algorithm_name
+    seg.DeviceSerialNumber = "1"
+    seg.SoftwareVersions = "1"
+    seg.ImageType = ["DERIVED", "PRIMARY"]
+    seg.SegmentationType = "BINARY"
+    seg.LossyImageCompression = "00"
+
+    # Bit-packed frames, 1 bit per pixel without padding between the frames
+    seg.SamplesPerPixel = 1
+    seg.PhotometricInterpretation = "MONOCHROME2"
+    seg.Rows, seg.Columns = rows, columns
+    seg.BitsAllocated = seg.BitsStored = 1
+    seg.HighBit = 0
+    seg.PixelRepresentation = 0
+    seg.NumberOfFrames = len(frame_indices)
+    seg.PixelData = pack_bits(frames[frame_indices].astype(np.uint8))
+
+    category, property_type = segmented_property
+    segment = Dataset()
+    segment.SegmentNumber = 1
+    segment.SegmentLabel = segment_label
+    segment.SegmentAlgorithmType = "AUTOMATIC"
+    segment.SegmentAlgorithmName = algorithm_name
+    segment.SegmentedPropertyCategoryCodeSequence = Sequence([_create_code(*category)])
+    segment.SegmentedPropertyTypeCodeSequence = Sequence([_create_code(*property_type)])
+    seg.SegmentSequence = Sequence([segment])
+
+    # The frames are indexed by their segment and their position
+    dimension_organization_uid = pydicom.uid.generate_uid()
+    dimension_organization = Dataset()
+    dimension_organization.DimensionOrganizationUID = dimension_organization_uid
+    seg.DimensionOrganizationSequence = Sequence([dimension_organization])
+    seg.DimensionIndexSequence = Sequence([
+        _create_dimension_index(dimension_organization_uid, 0x0062000B, 0x0062000A, "ReferencedSegmentNumber"),
+        _create_dimension_index(dimension_organization_uid, 0x00200032, 0x00209113, "ImagePositionPatient"),
+    ])
+
+    shared_groups = Dataset()
+    first_slice = slices[0]
+
+    if first_slice["pixel_spacing"]:
+        pixel_measures = Dataset()
+        pixel_measures.PixelSpacing = first_slice["pixel_spacing"]
+        pixel_measures.SliceThickness = first_slice["slice_thickness"] or 1
+        shared_groups.PixelMeasuresSequence = Sequence([pixel_measures])
+
+    if first_slice["orientation"]:
+        plane_orientation = Dataset()
+        plane_orientation.ImageOrientationPatient = first_slice["orientation"]
+        shared_groups.PlaneOrientationSequence = Sequence([plane_orientation])
+
+    seg.SharedFunctionalGroupsSequence = Sequence([shared_groups])
+
+    source_class_uid = source.get("SOPClassUID", "")
+    seg.PerFrameFunctionalGroupsSequence = Sequence([
+        _create_frame_groups(slices[index], source_class_uid, frame_number)
+        for frame_number, index in enumerate(frame_indices, start=1)
+    ])
+
+    # The source instances of the frames
+    referenced_series = Dataset()
+    referenced_series.SeriesInstanceUID = source.get("SeriesInstanceUID", "")
+    referenced_series.ReferencedInstanceSequence = Sequence([
+        _create_source_image(slices[index], source_class_uid) for index in frame_indices
+    ])
+    seg.ReferencedSeriesSequence = Sequence([referenced_series])
+
+    return seg
+
+def resize_masks(masks: np.ndarray, rows: int, columns: int) -> np.ndarray:
+    """
+    Resize the masks to the slices with the nearest neighbor, the masks of a model working at a lower resolution.
+
+    Args:
+        masks (np.ndarray): The masks, (slices, mask rows, mask columns).
+        rows (int): The rows of the slices.
+        columns (int): The columns of the slices.
+
+    Returns:
+        np.ndarray: The masks, (slices, rows, columns).
+    """
+    if masks.shape[1:] == (rows, columns):
+        return masks
+
+    row_indices = np.arange(rows) * masks.shape[1] // rows
+    column_indices = np.arange(columns) * masks.shape[2] // columns
+    return masks[:, row_indices][:, :, column_indices]
+
+def _create_code(value: str, scheme: str, meaning: str) -> Dataset:
+    """Create a code sequence item"""
+    code = Dataset()
+    code.CodeValue = value
+    code.CodingSchemeDesignator = scheme
+    code.CodeMeaning = meaning
+    return code
+
+def _create_dimension_index(dimension_organization_uid: str, index_pointer: int, group_pointer: int, description: str) -> Dataset:
+    """Create an item of the dimension index sequence"""
+    dimension_index = Dataset()
+    dimension_index.DimensionOrganizationUID = dimension_organization_uid
+    dimension_index.DimensionIndexPointer = index_pointer
+    dimension_index.FunctionalGroupPointer = group_pointer
+    dimension_index.DimensionDescriptionLabel = description
+    return dimension_index
+
+def _create_source_image(slice_header: dict, source_class_uid: str) -> Dataset:
+    """Create a reference to the source instance of a frame"""
+    source_image = Dataset()
+    source_image.ReferencedSOPClassUID = source_class_uid
+    source_image.ReferencedSOPInstanceUID = slice_header["sop_instance_uid"] or ""
+    return source_image
+
+def _create_frame_groups(slice_header: dict, source_class_uid: str, frame_number: int) -> Dataset:
+    """Create the functional groups of a frame, its source slice, segment and position"""
+    source_image = _create_source_image(slice_header, source_class_uid)
+    source_image.PurposeOfReferenceCodeSequence = Sequence([
+        _create_code("121322", "DCM", "Source image for image processing operation"),
+    ])
+
+    derivation_image = Dataset()
+    derivation_image.SourceImageSequence = Sequence([source_image])
+    derivation_image.DerivationCodeSequence = Sequence([_create_code("113076", "DCM", "Segmentation")])
+
+    segment_identification = Dataset()
+    segment_identification.ReferencedSegmentNumber = 1
+
+    frame_content = Dataset()
+    frame_content.DimensionIndexValues = [1, frame_number]
+
+    frame_groups = Dataset()
+    frame_groups.DerivationImageSequence = Sequence([derivation_image])
+    frame_groups.FrameContentSequence = Sequence([frame_content])
+    frame_groups.SegmentIdentificationSequence = Sequence([segment_identification])
+
+    if slice_header["position"]:
+        plane_position = Dataset()
+        plane_position.ImagePositionPatient = slice_header["position"]
+        frame_groups.PlanePositionSequence = Sequence([plane_position])
+
+    return frame_groups
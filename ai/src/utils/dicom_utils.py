@@ -3,89 +3,243 @@ import numpy as np
 import pydicom
 import pydicom.uid
 
+from io import BytesIO
 from pathlib import Path
+from pydicom.errors import InvalidDicomError
+from lit_serve.common import normalize_to_uint8, get_slice_stem
 
-def dicom_to_png(file_path: Path, save_folder_path: Path = None, calc_pixel_spacing: bool = False) -> str | None:
+_MIME_HEADERS_MAX_SIZE = 4096
+"""Maximum size of the MIME headers at the start of a DICOM file"""
+
+_SLICE_HEADER_TAGS = [
+    "SOPInstanceUID", "InstanceNumber", "ImagePositionPatient", "ImageOrientationPatient",
+    "Rows", "Columns", "PixelSpacing", "SliceThickness",
+]
+"""The tags of the slice headers, the geometry used to order and stack the slices"""
+
+def dicom_to_png(file_path: Path, save_folder_path: Path = None, window: tuple[float, float] | None = None) -> str | None:
     """
     Convert a DICOM file to a PNG file and save it to the output directory.
 
     Args:
         file_path (Path): Path to the DICOM file.
         save_folder_path (Path, optional): Path to save the PNG file. Defaults to None.
+        window (tuple[float, float], optional): The window of the series, the slice maximum is used if None.
 
     Returns:
         str: Path to the PNG file if successful, None otherwise.
     """
 
-    # Read the raw byte content of the DICOM file
-    with open(file_path, "rb") as f:
-        dicom_bytes = f.read()
-
-    # Remove MIME headers if present
-    cleaned_dicom_bytes = remove_mime_headers(dicom_bytes)
-
-    # Save cleaned DICOM content to a temporary file
-    temp_file_path = file_path.parent / f"temp_{file_path.name}"
-
-    with open(temp_file_path, "wb") as temp_file:
-        temp_file.write(cleaned_dicom_bytes)
-
-    # Read the DICOM file
-    dicom = pydicom.dcmread(temp_file_path, force=True)
+    # Decode the DICOM file from memory without writing a cleaned copy to the disk
+    dicom = read_dicom(file_path)
         
     # Ensure the DICOM file has pixel data
     if "PixelData" not in dicom:
-        temp_file_path.unlink()  # Remove temporary file
         return None
 
-    # Get the pixel array from the DICOM file
-    pixel_array = dicom.pixel_array
-
-    # Normalize the pixel array values to 0-255
-    image_2d = pixel_array.astype(float)
-    image_2d_scaled = (np.maximum(image_2d, 0) / image_2d.max()) * 255.0
-    image_2d_scaled = np.uint8(image_2d_scaled)
+    # Get the pixel array from the DICOM file normalized to 0-255
+    image_2d_scaled = normalize_slice(dicom, window)
 
     # Convert the numpy array to a PIL Image
     image = Image.fromarray(image_2d_scaled)
 
     # Define the output file path
+    # Keep the dotted names whole, only the `.dcm` suffix is replaced
+    output_file_name = f"{get_slice_stem(file_path)}.png"
+
     if save_folder_path:
         save_folder_path.mkdir(parents=True, exist_ok=True)  # Ensure the save directory exists
-        output_file_path = save_folder_path / file_path.with_suffix(".png").name
+        output_file_path = save_folder_path / output_file_name
     else:
-        output_file_path = file_path.with_suffix(".png")
+        output_file_path = file_path.with_name(output_file_name)
 
     # Save the image as PNG
     image.save(output_file_path)
+    return str(output_file_path)
 
-    # Clean up temporary file
-    temp_file_path.unlink()
+def dicom_to_volume_slice(file_path: Path, volume_path: Path, index: int, window: tuple[float, float] | None = None) -> bool:
+    """
+    Decode a DICOM file and write its pixels to a slice of a memory-mapped `.npy` volume.
 
-    if calc_pixel_spacing:
-        spacing = getattr(dicom, "PixelSpacing" , [0.5,0.5]) #mm
-        return str(output_file_path), spacing
+    Args:
+        file_path (Path): Path to the DICOM file.
+        volume_path (Path): Path to the `.npy` volume created by the caller.
+        index (int): Index of the slice in the volume.
+        window (tuple[float, float], optional): The window of the series, the slice maximum is used if None.
 
-    return str(output_file_path)
+    Returns:
+        bool: True if the slice is written, False if the file has no pixel data or its shape doesn't match the volume.
+    """
+    dicom = read_dicom(file_path)
 
-def remove_mime_headers(dicom_bytes: bytes) -> bytes:
+    if "PixelData" not in dicom:
+        return False
+
+    volume = np.load(volume_path, mmap_mode="r+")
+    image_2d_scaled = normalize_slice(dicom, window)
+
+    if image_2d_scaled.shape != volume.shape[1:]:
+        return False
+
+    # The same pixels as the PNG image, without the PNG encoding
+    volume[index] = image_2d_scaled
+    volume.flush()
+    return True
+
+def normalize_slice(dicom: pydicom.Dataset, window: tuple[float, float] | None = None) -> np.ndarray:
     """
-    Remove MIME headers if present from a DICOM file.
+    Normalize the pixels of a DICOM slice to 0-255 with the rescale slope and intercept of the slice.
+
+    Args:
+        dicom (pydicom.Dataset): The DICOM dataset with its pixel data.
+        window (tuple[float, float], optional): The window of the series, the slice maximum is used if None.
+
+    Returns:
+        np.ndarray: The normalized uint8 slice.
+    """
+    slope = float(getattr(dicom, "RescaleSlope", None) or 1)
+    intercept = float(getattr(dicom, "RescaleIntercept", None) or 0)
+    return normalize_to_uint8(dicom.pixel_array, window, slope, intercept)
+
+def read_slice_header(file_path: Path) -> dict | None:
+    """
+    Read the header of a DICOM file without its pixel data and get the tags used to order and stack the slices.
+
+    Args:
+        file_path (Path): Path to the DICOM file.
+
+    Returns:
+        dict: The slice header, None if the file is not a DICOM image.
+    """
+    try:
+        dicom = read_dicom_header(file_path, _SLICE_HEADER_TAGS)
+    except (InvalidDicomError, EOFError, ValueError):
+        # Any file can be in the series folder, forcing the read of a non-DICOM file fails on its malformed elements
+        return None
+
+    if "Rows" not in dicom or "Columns" not in dicom:
+        return None
+    
+    instance_number = getattr(dicom, "InstanceNumber", None)
+    slice_thickness = getattr(dicom, "SliceThickness", None)
+
+    return {
+        "file": file_path.name,
+        "sop_instance_uid": str(dicom.SOPInstanceUID) if "SOPInstanceUID" in dicom else None,
+        "instance_number": int(instance_number) if instance_number not in (None, "") else None,
+        "position": _to_floats(getattr(dicom, "ImagePositionPatient", None)),
+        "orientation": _to_floats(getattr(dicom, "ImageOrientationPatient", None)),
+        "rows": int(dicom.Rows),
+        "columns": int(dicom.Columns),
+        "pixel_spacing": _to_floats(getattr(dicom, "PixelSpacing", None)),
+        "slice_thickness": float(slice_thickness) if slice_thickness not in (None, "") else None,
+    }
+
+def sort_slices(slices: list[dict]) -> list[dict]:
+    """
+    Sort the slice headers of a series in the order shown by the viewer.
+    The slices are sorted by their position along the slice normal when all of them have a position and an orientation,
+    in the direction of the instance numbers, otherwise by the instance number, then by the file name.
+
+    Args:
+        slices (list[dict]): The slice headers returned by `read_slice_header`.
+
+    Returns:
+        list[dict]: The sorted slice headers.
+    """
+    by_instance_number = sorted(slices, key=lambda s: (s["instance_number"] is None, s["instance_number"] or 0, s["file"]))
+
+    if len(slices) < 2 or any(s["position"] is None or s["orientation"] is None for s in slices):
+        return by_instance_number
+
+    # The distance of each slice along the normal of the image plane
+    orientation = np.array(slices[0]["orientation"])
+    normal = np.cross(orientation[:3], orientation[3:])
+    distances = {s["file"]: float(np.dot(normal, s["position"])) for s in slices}
+
+    if len(set(distances.values())) < len(slices):
+        return by_instance_number
+
+    by_position = sorted(by_instance_number, key=lambda s: distances[s["file"]])
+
+    # Keep the direction of the instance numbers, the viewer shows the first instance first
+    first, last = by_position[0]["instance_number"], by_position[-1]["instance_number"]
+    if first is not None and last is not None and first > last:
+        by_position.reverse()
+
+    return by_position
+
+def _to_floats(value) -> list[float] | None:
+    """Convert a multi-valued DICOM tag to a list of floats"""
+    return [float(v) for v in value] if value else None
+
+def read_dicom(file_path: Path, stop_before_pixels: bool = False) -> pydicom.Dataset:
+    """
+    Read a DICOM file from an in-memory buffer, skipping the MIME headers if present.
+    Args:
+        file_path (Path): Path to the DICOM file.
+        stop_before_pixels (bool): Stop reading before the pixel data.
+    Returns:
+        pydicom.Dataset: The DICOM dataset.
+    """
+    if stop_before_pixels:
+        return read_dicom_header(file_path)
+
+    # Read the raw byte content of the DICOM file once
+    with open(file_path, "rb") as f:
+        dicom_bytes = f.read()
+
+    offset = find_dicom_offset(dicom_bytes)
+
+    # BytesIO shares the bytes without copying, only the slice after the MIME headers is copied
+    buffer = BytesIO(dicom_bytes if offset == 0 else memoryview(dicom_bytes)[offset:])
+    return pydicom.dcmread(buffer, force=True, stop_before_pixels=stop_before_pixels)
+
+def read_dicom_header(file_path: Path, specific_tags: list[str] | None = None) -> pydicom.Dataset:
+    """
+    Read the header of a DICOM file, skipping the MIME headers if present.
+    Only the bytes before the pixel data are read from the disk, and the values of the other tags are skipped when `specific_tags` is given.
+    Args:
+        file_path (Path): Path to the DICOM file.
+        specific_tags (list[str], optional): Keywords of the only tags to parse. Defaults to all tags.
+    Returns:
+        pydicom.Dataset: The DICOM dataset without the pixel data.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(find_dicom_offset(f.read(_MIME_HEADERS_MAX_SIZE)))
+        return pydicom.dcmread(f, force=True, stop_before_pixels=True, specific_tags=specific_tags)
+
+def find_dicom_offset(dicom_bytes: bytes) -> int:
+    """
+    Find the start of the DICOM content after the MIME headers.
     Args:
         dicom_bytes (bytes): The raw byte content of the DICOM file.
     Returns:
-        bytes: The cleaned DICOM content.
+        int: The offset of the DICOM content, 0 if there are no MIME headers.
     """
-    # Check for MIME headers (e.g., "Content-Type: application/dicom")
-    if dicom_bytes.startswith(b"--") or b"Content-Type" in dicom_bytes:
+    # Check for MIME headers (e.g., "Content-Type: application/dicom"), they can only be at the start of the file
+    head = dicom_bytes[:_MIME_HEADERS_MAX_SIZE]
+
+    if head.startswith(b"--") or b"Content-Type" in head:
         # Find the first occurrence of two consecutive newlines, indicating end of headers
-        header_end_index = dicom_bytes.find(b"\r\n\r\n")
-        if header_end_index == -1:
-            header_end_index = dicom_bytes.find(b"\n\n")
-        
-        # Remove headers if found
+        header_end_index = head.find(b"\r\n\r\n")
         if header_end_index != -1:
-            return dicom_bytes[header_end_index + 4:]
+            return header_end_index + 4
+
+        header_end_index = head.find(b"\n\n")
+        if header_end_index != -1:
+            return header_end_index + 2
     
-    # No headers found; return original bytes
-    return dicom_bytes
+    # No headers found
+    return 0
+
+def remove_mime_headers(dicom_bytes: bytes) -> bytes:
+    """
+    Remove MIME headers if present from a DICOM file.
+    Args:
+        dicom_bytes (bytes): The raw byte content of the DICOM file.
+    Returns:
+        bytes: The cleaned DICOM content.
+    """
+    offset = find_dicom_offset(dicom_bytes)
+    return dicom_bytes[offset:] if offset else dicom_bytes
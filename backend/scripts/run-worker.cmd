@@ -0,0 +1 @@
+cd src && poetry run python worker.py && cd ..
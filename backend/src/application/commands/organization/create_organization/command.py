@@ -9,3 +9,5 @@ class CreateOrganizationCommand(Command[Result]):
     email: str | None = None
     address: str | None = None
     dicom_url: str
+    dicom_cache_ttl: int | None = None
+    prediction_weight: int | None = None
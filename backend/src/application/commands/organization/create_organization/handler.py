@@ -31,6 +31,12 @@ class CreateOrganizationHandler(RequestHandler[CreateOrganizationCommand, Result
         
         if req.email and not valid_email(req.email):
             return Result.fail("Invalid email address")
+        
+        if req.dicom_cache_ttl is not None and req.dicom_cache_ttl < 0:
+            return Result.fail("DICOM cache TTL must be a non-negative number of seconds")
+        
+        if req.prediction_weight is not None and req.prediction_weight < 1:
+            return Result.fail("Prediction weight must be a positive number")
 
         if org_repo.exists(Organization.name == req.name):
             return Result.fail("Organization with the same name already exists")
@@ -43,6 +49,8 @@ class CreateOrganizationHandler(RequestHandler[CreateOrganizationCommand, Result
             email=req.email,
             address=req.address,
             dicom_url=req.dicom_url,
+            dicom_cache_ttl=req.dicom_cache_ttl,
+            prediction_weight=req.prediction_weight,
         )
 
         org_repo.add(organization)
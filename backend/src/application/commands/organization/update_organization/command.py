@@ -9,6 +9,8 @@ class UpdateOrganizationPayload(Command[Result]):
     email: str | None = None
     address: str | None = None
     dicom_url: str | None = None
+    dicom_cache_ttl: int | None = None
+    prediction_weight: int | None = None
 
 
 class UpdateOrganizationCommand(UpdateOrganizationPayload):
@@ -54,8 +54,22 @@ class UpdateOrganizationHandler(RequestHandler[UpdateOrganizationCommand, Result
             if not self.dicom_service.verify_qido_support(req.dicom_url):
                 return Result.fail("The DICOM server does not support QIDO-RS, make sure the provided URL is accessible by /studies endpoint")
             
+            self.dicom_service.invalidate_cache(organization.dicom_url)
             organization.dicom_url = req.dicom_url
 
+        if req.dicom_cache_ttl is not None and req.dicom_cache_ttl != organization.dicom_cache_ttl:
+            if req.dicom_cache_ttl < 0:
+                return Result.fail("DICOM cache TTL must be a non-negative number of seconds")
+            
+            self.dicom_service.invalidate_cache(organization.dicom_url)
+            organization.dicom_cache_ttl = req.dicom_cache_ttl
+
+        if req.prediction_weight is not None:
+            if req.prediction_weight < 1:
+                return Result.fail("Prediction weight must be a positive number")
+            
+            organization.prediction_weight = req.prediction_weight
+
         org_repo.update(organization)
         self.uow.commit()
         return Result.succeed()
@@ -1,7 +1,7 @@
-from core import Command, Result
-from domain.enums import MLModelType
+from core import Command, ResultWithData
+from domain.enums import MLModelType, PredictionStatus
 
-class PredictSeriesCommand(Command[Result]):
+class PredictSeriesCommand(Command[ResultWithData[PredictionStatus]]):
     organization: str
     study_instance_uid: str
     series_instance_uid: str
@@ -1,6 +1,7 @@
 import logging
 import os
-from core import RequestHandler, Result, Mediator
+from sqlmodel import and_
+from core import RequestHandler, Result, ResultWithData, Mediator
 from application.services import OrganizationService, MLService, PatientService
 from application.services.dicom import DicomService
 from domain.entities import Series, Study, Organization
@@ -9,7 +10,7 @@ from infrastructure import UnitOfWork
 from .command import PredictSeriesCommand
 
 @Mediator.register_handler(PredictSeriesCommand)
-class PredictSeriesHandler(RequestHandler[PredictSeriesCommand, Result]):
+class PredictSeriesHandler(RequestHandler[PredictSeriesCommand, ResultWithData[PredictionStatus]]):
     def __init__(
             self,
             uow: UnitOfWork,
@@ -25,21 +26,41 @@ class PredictSeriesHandler(RequestHandler[PredictSeriesCommand, Result]):
         self.patient_service = patient_service
         self.logger = logging.getLogger(__name__)
 
-    def handle(self, req: PredictSeriesCommand) -> Result:
+    def handle(self, req: PredictSeriesCommand) -> ResultWithData[PredictionStatus]:
         if not MLModelType.has_value(req.model_type):
-            return Result.fail("Invalid model type")
+            return ResultWithData[PredictionStatus].fail("Invalid model type")
 
         organization = self.org_service.get_organization(req.organization)
 
         if not organization:
-            return Result.fail("Organization with ID '{req.organization}' not found")
+            return ResultWithData[PredictionStatus].fail(f"Organization with ID '{req.organization}' not found")
 
         series = self.get_series_from_db(req)
 
         if series and series.prediction_status == PredictionStatus.COMPLETED and not req.predict_again:
-            return Result.succeed()
+            return ResultWithData[PredictionStatus].succeed(PredictionStatus.COMPLETED)
 
-        # Download the DICOM instances and zip them
+        # Create a new series if it does not exist
+        if not series:
+            series = self.create_series(req, organization)
+
+        # Mark the series before the download, so the other requests see the prediction is in flight
+        self.update_predict_status(series, PredictionStatus.IN_PROGRESS)
+
+        if self.ml_service.shared_staging_dir:
+            send_result = self.send_staged_series(req, organization, series)
+        else:
+            send_result = self.send_zipped_series(req, organization, series)
+
+        if not send_result.success and send_result.error:
+            self.update_predict_status(series, PredictionStatus.FAILED)
+            return ResultWithData[PredictionStatus].fail(send_result.error)
+        
+        self.logger.info(f"Prediction started for series with ID '{req.series_instance_uid}'")
+        return ResultWithData[PredictionStatus].succeed(PredictionStatus.IN_PROGRESS)
+    
+    def send_zipped_series(self, req: PredictSeriesCommand, organization: Organization, series: Series) -> Result:
+        """Download the DICOM instances, zip them and upload the zip file to the ML service"""
         download_result = self.dicom_service.download_and_zip_instances(organization.dicom_url, req.study_instance_uid, req.series_instance_uid)
 
         if not download_result.success and download_result.error:
@@ -49,23 +70,27 @@ class PredictSeriesHandler(RequestHandler[PredictSeriesCommand, Result]):
             return Result.fail("Could not download DICOM instances and zip them")
         
         self.logger.info(f"Downloaded and zipped DICOM instances for series with ID '{req.series_instance_uid}'")
-        
-        # Create a new series if it does not exist
-        if not series:
-            series = self.create_series(req, organization)
 
         # Send the zip file of the series to the ML service for prediction
-        send_result = self.ml_service.send_for_prediction(series, req.model_type, download_result.data)
+        send_result = self.ml_service.send_for_prediction(series, req.model_type, download_result.data, organization.dicom_url)
+        self.remove_file(download_result.data, req.series_instance_uid)
+        return send_result
+    
+    def send_staged_series(self, req: PredictSeriesCommand, organization: Organization, series: Series) -> Result:
+        """Download the DICOM instances to the shared staging directory and send only the manifest path to the ML service"""
+        stage_result = self.dicom_service.download_and_stage_instances(
+            organization.dicom_url,
+            req.study_instance_uid,
+            req.series_instance_uid,
+            self.ml_service.shared_staging_dir or "",
+            req.model_type,
+        )
 
-        if not send_result.success and send_result.error:
-            self.update_predict_status(series, PredictionStatus.FAILED)
-            self.remove_file(download_result.data, req.series_instance_uid)
-            return Result.fail(send_result.error)
+        if not stage_result.success or not stage_result.data:
+            return Result.fail(stage_result.error or "Could not download DICOM instances and stage them")
         
-        self.update_predict_status(series, PredictionStatus.IN_PROGRESS)
-        self.remove_file(download_result.data, req.series_instance_uid)
-        self.logger.info(f"Prediction started for series with ID '{req.series_instance_uid}'")
-        return Result.succeed()
+        self.logger.info(f"Downloaded and staged DICOM instances for series with ID '{req.series_instance_uid}'")
+        return self.ml_service.send_staged_for_prediction(series, req.model_type, stage_result.data, organization.dicom_url)
     
     def create_series(self, req: PredictSeriesCommand, organization: Organization) -> Series:
         study_repo = self.uow.get_repository(Study)
@@ -90,8 +115,10 @@ class PredictSeriesHandler(RequestHandler[PredictSeriesCommand, Result]):
     def get_series_from_db(self, req: PredictSeriesCommand) -> Series | None:
         series_repo = self.uow.get_repository(Series)
         series = series_repo.get_one(
-            Series.study_instance_uid == req.study_instance_uid and 
-            Series.series_instance_uid == req.series_instance_uid
+            and_(
+                Series.study_instance_uid == req.study_instance_uid,
+                Series.series_instance_uid == req.series_instance_uid,
+            )
         )
         return series
     
@@ -0,0 +1,2 @@
+from .command import *
+from .handler import *
@@ -0,0 +1,6 @@
+from domain.enums import PredictionPriority
+from ..predict_series import PredictSeriesCommand
+
+class QueuePredictSeriesCommand(PredictSeriesCommand):
+    priority: PredictionPriority = PredictionPriority.ROUTINE
+    """Priority class of the prediction, stat requests are scheduled before routine and backfill ones"""
@@ -0,0 +1,38 @@
+import logging
+from core import RequestHandler, ResultWithData, Mediator
+from application.services import OrganizationService
+from application.services.jobs import PredictionJobQueue
+from domain.enums import MLModelType, PredictionPriority, PredictionStatus
+from .command import QueuePredictSeriesCommand
+
+@Mediator.register_handler(QueuePredictSeriesCommand)
+class QueuePredictSeriesHandler(RequestHandler[QueuePredictSeriesCommand, ResultWithData[PredictionStatus]]):
+    def __init__(self, org_service: OrganizationService, job_queue: PredictionJobQueue) -> None:
+        self.org_service = org_service
+        self.job_queue = job_queue
+        self.logger = logging.getLogger(__name__)
+
+    def handle(self, req: QueuePredictSeriesCommand) -> ResultWithData[PredictionStatus]:
+        if not MLModelType.has_value(req.model_type):
+            return ResultWithData[PredictionStatus].fail("Invalid model type")
+        
+        if not PredictionPriority.has_value(req.priority):
+            return ResultWithData[PredictionStatus].fail("Invalid prediction priority")
+
+        organization = self.org_service.get_organization(req.organization)
+
+        if not organization:
+            return ResultWithData[PredictionStatus].fail(f"Organization with ID '{req.organization}' not found")
+        
+        # The prediction workers pick up the queued job, a request of the series already in flight attaches to its job
+        job = self.job_queue.enqueue(
+            req.model_type,
+            req.series_instance_uid,
+            req.model_dump(mode="json", exclude={"priority"}),
+            organization_id=str(organization.id),
+            priority=req.priority,
+            weight=organization.prediction_weight or 1,
+        )
+
+        self.logger.info(f"Queued prediction job '{job.id}' for series '{req.series_instance_uid}' with priority '{job.priority.value}'")
+        return ResultWithData[PredictionStatus].succeed(PredictionStatus.IN_PROGRESS)
@@ -1,5 +1,8 @@
 import logging
 from core import RequestHandler, Result, Mediator
+from application.services import MLService
+from application.services.dicom import DicomService
+from application.services.jobs import PredictionJobQueue
 from domain.entities import Series, Report, Finding
 from domain.enums import PredictionStatus, MLModelType
 from infrastructure import UnitOfWork
@@ -7,8 +10,11 @@ from .command import UpdatePredictionStatusCommand
 
 @Mediator.register_handler(UpdatePredictionStatusCommand)
 class UpdatePredictStatusHandler(RequestHandler[UpdatePredictionStatusCommand, Result]):
-    def __init__(self, uow: UnitOfWork) -> None:
+    def __init__(self, uow: UnitOfWork, job_queue: PredictionJobQueue, dicom_service: DicomService, ml_service: MLService) -> None:
         self.uow = uow
+        self.job_queue = job_queue
+        self.dicom_service = dicom_service
+        self.ml_service = ml_service
         self.logger = logging.getLogger(__name__)
 
     def handle(self, req: UpdatePredictionStatusCommand) -> Result:
@@ -35,8 +41,32 @@ class UpdatePredictStatusHandler(RequestHandler[UpdatePredictionStatusCommand, R
         series_repo.update(series)
         self.uow.commit()
         self.logger.info(f"Updated prediction status for series '{series.id}' to '{req.status}', model type '{req.model_type}', and result '{req.result}'")
+        self.finish_prediction_job(series, req)
+        self.remove_staged_series(series, req)
         return Result.succeed()
     
+    def finish_prediction_job(self, series: Series, req: UpdatePredictionStatusCommand) -> None:
+        """Release the model slot of the queued job once the ML service reports the final status"""
+        if req.status == PredictionStatus.IN_PROGRESS:
+            return
+        
+        job = self.job_queue.get_running(series.series_instance_uid, req.model_type)
+
+        if not job:
+            return
+        
+        if req.status == PredictionStatus.COMPLETED:
+            self.job_queue.complete(job.id)
+        else:
+            self.job_queue.fail(job.id, f"The ML service reported the prediction status '{req.status.value}'")
+    
+    def remove_staged_series(self, series: Series, req: UpdatePredictionStatusCommand) -> None:
+        """Remove the instances staged for the ML service once it reports the final status, its outputs are kept"""
+        if req.status == PredictionStatus.IN_PROGRESS or not self.ml_service.shared_staging_dir:
+            return
+        
+        self.dicom_service.remove_staged_instances(self.ml_service.shared_staging_dir, series.series_instance_uid, req.model_type)
+    
     def create_report(self, series: Series) -> Report:
         report_repo = self.uow.get_repository(Report)
         new_report = Report(
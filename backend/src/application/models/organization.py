@@ -12,6 +12,8 @@ class OrganizationDto(BaseModel):
     email: str | None = None
     address: str | None = None
     dicom_url: str
+    dicom_cache_ttl: int | None = None
+    prediction_weight: int | None = None
 
     @staticmethod
     def from_entity(entity: Organization) -> "OrganizationDto":
@@ -24,6 +26,8 @@ class OrganizationDto(BaseModel):
             email=entity.email,
             address=entity.address,
             dicom_url=entity.dicom_url,
+            dicom_cache_ttl=entity.dicom_cache_ttl,
+            prediction_weight=entity.prediction_weight,
         )
     
 class OrgShortDetailsDto(BaseModel):
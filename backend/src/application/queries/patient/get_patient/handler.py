@@ -48,7 +48,7 @@ class GetPatientHandler(RequestHandler[GetPatientQuery, ResultWithData[PatientDt
         if not organization.dicom_url:
             return ResultWithData.fail("Organization does not have a DICOM URL")
 
-        result = self.dicom_service.get_patient(organization.dicom_url, patient_id)
+        result = self.dicom_service.get_patient(organization.dicom_url, patient_id, organization.dicom_cache_ttl)
 
         if not result.success and result.error:
             return ResultWithData.fail(result.error)
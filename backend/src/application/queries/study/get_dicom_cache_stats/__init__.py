@@ -0,0 +1,2 @@
+from .handler import *
+from .query import *
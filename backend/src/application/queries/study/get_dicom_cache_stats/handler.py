@@ -0,0 +1,12 @@
+from core import RequestHandler, ResultWithData, Mediator
+from application.services.dicom import DicomService, DicomCacheStats
+from .query import GetDicomCacheStatsQuery
+
+
+@Mediator.register_handler(GetDicomCacheStatsQuery)
+class GetDicomCacheStatsHandler(RequestHandler[GetDicomCacheStatsQuery, ResultWithData[DicomCacheStats]]):
+    def __init__(self, dicom_service: DicomService) -> None:
+        self.dicom_service = dicom_service
+
+    def handle(self, req: GetDicomCacheStatsQuery) -> ResultWithData[DicomCacheStats]:
+        return ResultWithData[DicomCacheStats].succeed(self.dicom_service.get_cache_stats())
@@ -0,0 +1,6 @@
+from core import Query, ResultWithData
+from application.services.dicom import DicomCacheStats
+
+
+class GetDicomCacheStatsQuery(Query[ResultWithData[DicomCacheStats]]):
+    pass
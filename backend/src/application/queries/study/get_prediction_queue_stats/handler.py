@@ -0,0 +1,12 @@
+from core import RequestHandler, ResultWithArray, Mediator
+from application.services.jobs import PredictionJobQueue, PredictionQueueStats
+from .query import GetPredictionQueueStatsQuery
+
+
+@Mediator.register_handler(GetPredictionQueueStatsQuery)
+class GetPredictionQueueStatsHandler(RequestHandler[GetPredictionQueueStatsQuery, ResultWithArray[PredictionQueueStats]]):
+    def __init__(self, job_queue: PredictionJobQueue) -> None:
+        self.job_queue = job_queue
+
+    def handle(self, req: GetPredictionQueueStatsQuery) -> ResultWithArray[PredictionQueueStats]:
+        return ResultWithArray[PredictionQueueStats].succeed(self.job_queue.get_stats())
@@ -0,0 +1,6 @@
+from core import Query, ResultWithArray
+from application.services.jobs import PredictionQueueStats
+
+
+class GetPredictionQueueStatsQuery(Query[ResultWithArray[PredictionQueueStats]]):
+    pass
@@ -64,7 +64,7 @@ class GetStudiesHandler(RequestHandler[GetStudiesQuery, ResultWithArray[StudyDto
         if not organization.dicom_url:
             return ResultWithArray.fail("Organization does not have a DICOM URL")
 
-        result = self.dicom_service.get_studies(organization.dicom_url, patient_id)
+        result = self.dicom_service.get_studies(organization.dicom_url, patient_id, organization.dicom_cache_ttl)
 
         if not result.success:
             return ResultWithArray.fail(result.error)
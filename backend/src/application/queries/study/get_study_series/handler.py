@@ -69,7 +69,7 @@ class GetStudySeriesHandler(RequestHandler[GetStudySeriesQuery, ResultWithArray[
         if not organization.dicom_url:
             return ResultWithArray.fail("Organization does not have a DICOM URL")
 
-        result = self.dicom_service.get_series(organization.dicom_url, study_instance_uid)
+        result = self.dicom_service.get_series(organization.dicom_url, study_instance_uid, organization.dicom_cache_ttl)
 
         if not result.success:
             return ResultWithArray.fail(result.error)
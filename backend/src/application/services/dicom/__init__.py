@@ -5,3 +5,10 @@ from .dicom_patient import *
 from .dicom_value_type import *
 from .dicom_series import *
 from .dicom_instance import *
+from .dicom_client_settings import *
+from .dicom_session_manager import *
+from .dicomweb_client import *
+from .multipart_reader import *
+from .dicom_metadata_cache import *
+from .dicom_instance_store import *
+from .dicom_cache_stats import *
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+class DicomCacheStats(BaseModel):
+    """Size and hit metrics of the DICOM metadata cache"""
+    size: int = 0
+    """Number of the cached query results"""
+
+    hits: int = 0
+    """Number of the queries served from the cache"""
+
+    misses: int = 0
+    """Number of the queries sent to the DICOM server"""
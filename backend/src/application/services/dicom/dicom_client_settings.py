@@ -0,0 +1,36 @@
+import os
+
+class DicomClientSettings:
+    """HTTP client settings for the DICOMweb (QIDO-RS/WADO-RS) requests"""
+    pool_size: int = int(os.getenv("DICOM_POOL_SIZE") or 16)
+    """Maximum number of keep-alive connections per DICOM server"""
+
+    max_concurrent_requests: int = int(os.getenv("DICOM_MAX_CONCURRENT_REQUESTS") or 8)
+    """Maximum number of in-flight WADO-RS requests per DICOM server shared by all the callers"""
+
+    series_retrieve: bool = (os.getenv("DICOM_SERIES_RETRIEVE") or "true").lower() == "true"
+    """Retrieve a whole series in a single multipart WADO-RS request instead of a request per instance"""
+
+    metadata_cache_size: int = int(os.getenv("DICOM_CACHE_SIZE") or 1024)
+    """Maximum number of QIDO-RS query results kept in the metadata cache"""
+
+    metadata_cache_ttl: int = int(os.getenv("DICOM_CACHE_TTL") or 60)
+    """Default time to live in seconds of the cached QIDO-RS query results, organizations can override it"""
+
+    instance_store_dir: str = os.getenv("DICOM_INSTANCE_STORE_DIR") or "temp/instances"
+    """Directory of the local store of the downloaded DICOM instances"""
+
+    instance_store_size: int = int(os.getenv("DICOM_INSTANCE_STORE_SIZE_MB") or 10240) * 1024 * 1024
+    """Maximum total size in bytes of the local DICOM instance store"""
+
+    max_retries: int = int(os.getenv("DICOM_MAX_RETRIES") or 3)
+    """Number of retries on 5xx responses and connection resets"""
+
+    backoff_factor: float = float(os.getenv("DICOM_BACKOFF_FACTOR") or 0.5)
+    """Exponential backoff factor between retries in seconds"""
+
+    connect_timeout: float = float(os.getenv("DICOM_CONNECT_TIMEOUT") or 5)
+    """Timeout in seconds to establish a connection to the DICOM server"""
+
+    read_timeout: float = float(os.getenv("DICOM_READ_TIMEOUT") or 60)
+    """Timeout in seconds to wait for the DICOM server response data"""
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+from uuid import uuid4
+
+class DicomInstanceWriter:
+    """
+    Writer of a single DICOM instance to the instance store.
+    The instance is written to a temporary file and becomes visible in the store only after `commit`.
+    """
+
+    def __init__(self, store: "DicomInstanceStore", sop_instance_uid: str, path: Path) -> None:
+        self._store = store
+        self._sop_instance_uid = sop_instance_uid
+        self._path = path
+        self._temp_path = path.with_name(f"{path.name}.{uuid4().hex}.part")
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._temp_path, "wb")
+
+    def write(self, data: bytes) -> int:
+        """Write the next chunk of the instance"""
+        return self._file.write(data)
+    
+    def commit(self) -> Path:
+        """
+        Complete the instance and add it to the store.
+        Returns:
+            Path: The path of the stored instance.
+        """
+        self._file.close()
+        os.replace(self._temp_path, self._path)
+        self._store._add_to_index(self._sop_instance_uid, self._path.stat().st_size)
+        return self._path
+    
+    def discard(self) -> None:
+        """Remove the incomplete instance"""
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+class DicomInstanceStore:
+    """
+    Persistent on-disk store of the downloaded DICOM instances, content-addressed by the SOP Instance UID.
+    Running several models on the same series or predicting it again reads the instances locally
+    instead of retrieving them from the DICOM server.
+    The total size of the store is bounded, the least recently used instances are evicted first.
+    The instances of a series being downloaded, zipped or staged are leased and never evicted,
+    so the store can exceed its size limit while the leased series are larger than it.
+    """
+
+    def __init__(self, root_dir: str, max_size: int) -> None:
+        """
+        Args:
+            root_dir (str): The directory of the store.
+            max_size (int): Maximum total size of the stored instances in bytes.
+        """
+        self._root_dir = Path(root_dir)
+        self._max_size = max_size
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_size = 0
+        self._pins: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+        self._load_index()
+
+    def get(self, sop_instance_uid: str) -> Path | None:
+        """
+        Get the path of a stored instance and mark it as recently used.
+        Args:
+            sop_instance_uid (str): The SOP Instance UID of the instance.
+        Returns:
+            Path | None: The path of the instance file if it is stored, otherwise None.
+        """
+        with self._lock:
+            if sop_instance_uid not in self._index:
+                return None
+            
+            self._index.move_to_end(sop_instance_uid)
+
+        path = self._get_path(sop_instance_uid)
+
+        if not path.exists():
+            self._remove_from_index(sop_instance_uid)
+            return None
+        
+        os.utime(path) # Persist the recent use for the index loaded after restart
+        return path
+    
+    def contains(self, sop_instance_uid: str) -> bool:
+        """Check if the instance is stored"""
+        with self._lock:
+            return sop_instance_uid in self._index
+
+    def create_writer(self, sop_instance_uid: str) -> DicomInstanceWriter:
+        """
+        Create a writer to add an instance to the store.
+        Args:
+            sop_instance_uid (str): The SOP Instance UID of the instance.
+        Returns:
+            DicomInstanceWriter: The writer of the instance, call `commit` to add the instance or `discard` to drop it.
+        """
+        return DicomInstanceWriter(self, sop_instance_uid, self._get_path(sop_instance_uid))
+
+    @contextmanager
+    def lease(self, sop_instance_uids: Iterable[str]) -> Iterator[None]:
+        """
+        Pin the instances for the duration of the context, they are not evicted until the lease is released.
+        The leases are reference-counted, the same instances can be leased by several requests at the same time.
+        Args:
+            sop_instance_uids (Iterable[str]): The SOP Instance UIDs of the instances, stored or not yet downloaded.
+        """
+        uids = list(sop_instance_uids)
+
+        with self._lock:
+            for uid in uids:
+                self._pins[uid] = self._pins.get(uid, 0) + 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                for uid in uids:
+                    if self._pins[uid] > 1:
+                        self._pins[uid] -= 1
+                    else:
+                        del self._pins[uid]
+
+    def _add_to_index(self, sop_instance_uid: str, size: int) -> None:
+        """
+        Helper method to register an instance in the index and evict the least recently used instances over the size limit.
+        The added instance and the leased instances are never evicted.
+        """
+        evicted: list[str] = []
+
+        with self._lock:
+            self._total_size += size - self._index.pop(sop_instance_uid, 0)
+            self._index[sop_instance_uid] = size
+
+            if self._total_size > self._max_size:
+                for uid in list(self._index):
+                    if self._total_size <= self._max_size:
+                        break
+
+                    if uid == sop_instance_uid or uid in self._pins:
+                        continue
+
+                    self._total_size -= self._index.pop(uid)
+                    evicted.append(uid)
+
+        for uid in evicted:
+            self._get_path(uid).unlink(missing_ok=True)
+
+        if evicted:
+            self._logger.info(f"Evicted {len(evicted)} DICOM instances from the instance store")
+
+    def _remove_from_index(self, sop_instance_uid: str) -> None:
+        """Helper method to remove an instance from the index."""
+        with self._lock:
+            self._total_size -= self._index.pop(sop_instance_uid, 0)
+
+    def _load_index(self) -> None:
+        """Helper method to load the index of the stored instances ordered by the last use."""
+        self._root_dir.mkdir(parents=True, exist_ok=True)
+        files = [(path, path.stat()) for path in self._root_dir.glob("*/*.dcm")]
+
+        for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+            self._index[path.stem] = stat.st_size
+            self._total_size += stat.st_size
+
+        # Remove the incomplete instances left by a crash
+        for path in self._root_dir.glob("*/*.part"):
+            path.unlink(missing_ok=True)
+
+        self._logger.info(f"Loaded {len(self._index)} DICOM instances from the instance store '{self._root_dir}'")
+
+    def _get_path(self, sop_instance_uid: str) -> Path:
+        """Helper method to get the path of an instance, the files are sharded by the hash of the UID."""
+        shard = hashlib.sha1(sop_instance_uid.encode()).hexdigest()[:2]
+        return self._root_dir / shard / f"{sop_instance_uid}.dcm"
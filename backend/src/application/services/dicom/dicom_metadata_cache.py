@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+type CacheKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+class DicomMetadataCache:
+    """
+    Bounded LRU cache with per-entry TTL for the QIDO-RS query results.
+    Entries are keyed by the DICOM server URL and the query, so repeated page loads and predictions
+    of the same study do not turn into round trips to the DICOM server.
+    """
+
+    def __init__(self, max_size: int, default_ttl: int) -> None:
+        self._max_size = max_size
+        self._default_ttl = default_ttl
+        self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        """Number of the queries served from the cache"""
+
+        self.misses = 0
+        """Number of the queries sent to the DICOM server"""
+
+    @staticmethod
+    def create_key(dicom_url: str, url: str, params: dict[str, str] | None = None) -> CacheKey:
+        """
+        Create a cache key for a QIDO-RS query.
+        Args:
+            dicom_url (str): The URL of the DICOM server.
+            url (str): The URL of the query.
+            params (dict[str, str], optional): The query parameters.
+        Returns:
+            CacheKey: The key of the query in the cache.
+        """
+        return (dicom_url, url, tuple(sorted((params or {}).items())))
+
+    def get(self, key: CacheKey) -> Any | None:
+        """
+        Get the cached query result if it has not expired yet.
+        Args:
+            key (CacheKey): The key of the query.
+        Returns:
+            Any | None: The cached result, otherwise None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+    def set(self, key: CacheKey, value: Any, ttl: int | None = None) -> None:
+        """
+        Store the query result in the cache and evict the least recently used entries over the size limit.
+        Args:
+            key (CacheKey): The key of the query.
+            value (Any): The result of the query.
+            ttl (int, optional): Time to live in seconds, uses the default TTL if not specified. Zero disables caching.
+        """
+        ttl = self._default_ttl if ttl is None else ttl
+
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dicom_url: str | None = None) -> int:
+        """
+        Remove the cached query results.
+        Args:
+            dicom_url (str, optional): Remove only the results of this DICOM server.
+        Returns:
+            int: Number of the removed entries.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if dicom_url is None or key[0] == dicom_url]
+
+            for key in keys:
+                del self._entries[key]
+
+            return len(keys)
+
+    def get_stats(self) -> dict[str, int]:
+        """Get the number of entries, hits and misses of the cache"""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -1,22 +1,45 @@
+import asyncio
+import json
+import logging
 import os
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import shutil
 from datetime import date, datetime
+from pathlib import Path
+from uuid import uuid4
 from zipfile import ZipFile
 from core import DIContainer, ResultWithArray, ResultWithData
-from domain.enums import Gender
+from domain.enums import Gender, MLModelType
 from .dicom_study import DicomStudy
 from .dicom_tag import DicomTag
 from .dicom_patient import DicomPatient
 from .dicom_value_type import DicomValueType
 from .dicom_series import DicomSeries
 from .dicom_instance import DicomInstance
+from .dicom_client_settings import DicomClientSettings
+from .dicom_instance_store import DicomInstanceStore, DicomInstanceWriter
+from .dicom_cache_stats import DicomCacheStats
+from .dicom_metadata_cache import DicomMetadataCache
+from .dicom_session_manager import DicomSessionManager
+from .dicomweb_client import DicomWebClient
+from .multipart_reader import MultipartPart, MultipartReader, get_multipart_boundary
 
 @DIContainer.register_singleton()
 class DicomService:
     _dicom_content = "application/dicom+json"
     _headers = {"Accept": _dicom_content}
 
+    _dicom_multipart_content = 'multipart/related; type="application/dicom"'
+    _chunk_size = 64 * 1024
+
+    def __init__(self) -> None:
+        self._settings = DicomClientSettings()
+        self._session_manager = DicomSessionManager(self._settings)
+        self._dicomweb_client = DicomWebClient(self._settings)
+        self._series_retrieve_unsupported: set[str] = set()
+        self._metadata_cache = DicomMetadataCache(self._settings.metadata_cache_size, self._settings.metadata_cache_ttl)
+        self._instance_store = DicomInstanceStore(self._settings.instance_store_dir, self._settings.instance_store_size)
+        self._logger = logging.getLogger(__name__)
+
     def verify_qido_support(self, dicom_url: str) -> bool:
         """
         Verify if the DICOM server supports QIDO-RS.
@@ -25,32 +48,33 @@ class DicomService:
         Returns:
             bool: True if QIDO-RS is supported, otherwise False.
         """
-        response = requests.get(f"{dicom_url}/studies", headers=self._headers)
+        response = self._session_manager.get(dicom_url, f"{dicom_url}/studies", headers=self._headers)
         
         return response.status_code == 200 and self._dicom_content in response.headers.get("Content-Type", "")
 
 
-    def get_patient(self, dicom_url: str, patient_id: str) -> ResultWithData[DicomPatient]:
+    def get_patient(self, dicom_url: str, patient_id: str, cache_ttl: int | None = None) -> ResultWithData[DicomPatient]:
         """
         Retrieve a patient from the DICOM server by patient ID.
         Args:
             dicom_url (str): The URL of the DICOM server.
             patient_id (str): The patient ID to retrieve.
+            cache_ttl (int, optional): Time to live in seconds of the cached query result, uses the default TTL if not specified.
         Returns:
             ResultWithData[DicomPatient]: A result object containing the patient data.
         """
         # Query the DICOM server for studies associated with the patient ID
-        response = requests.get(
+        response = self._query(
+            dicom_url,
             f"{dicom_url}/studies",
-            headers=self._headers,
-            params={"PatientID": patient_id}
+            params={"PatientID": patient_id},
+            cache_ttl=cache_ttl,
         )
 
-        if response.status_code != 200:
-            return ResultWithData.fail(f"Failed to retrieve patient with ID '{patient_id}'. Error: {response.text}")
+        if not response.success:
+            return ResultWithData.fail(f"Failed to retrieve patient with ID '{patient_id}'. Error: {response.error}")
         
-        # Parse the response JSON
-        studies_data = response.json()
+        studies_data = response.data or []
 
         if len(studies_data) == 0:
             return ResultWithData.fail(f"Patient with ID '{patient_id}' not found")
@@ -69,29 +93,31 @@ class DicomService:
 
         return ResultWithData[DicomPatient].succeed(patient)
     
-    def get_study(self, dicom_url: str, study_instance_uid: str) -> ResultWithData[DicomStudy]:
+    def get_study(self, dicom_url: str, study_instance_uid: str, cache_ttl: int | None = None) -> ResultWithData[DicomStudy]:
         """
         Retrieve a study from the DICOM server by study instance UID.
         Args:
             dicom_url (str): The URL of the DICOM server.
             study_instance_uid (str): The study instance UID to retrieve.
+            cache_ttl (int, optional): Time to live in seconds of the cached query result, uses the default TTL if not specified.
         Returns:
             ResultWithData[DicomStudy]: A result object containing the study data including patient information.
         """
         # Query the DICOM server for the study by StudyInstanceUID
-        response = requests.get(
+        response = self._query(
+            dicom_url,
             f"{dicom_url}/studies?StudyInstanceUID={study_instance_uid}",
-            headers=self._headers,
             params={
                 "includefield": "all",
                 "includefield": DicomTag.REQUESTED_PROCEDURE_DESCRIPTION
-            }
+            },
+            cache_ttl=cache_ttl,
         )
 
-        if response.status_code != 200:
-            return ResultWithData.fail(f"Failed to retrieve study with ID '{study_instance_uid}'. Error: {response.text}")
+        if not response.success:
+            return ResultWithData.fail(f"Failed to retrieve study with ID '{study_instance_uid}'. Error: {response.error}")
         
-        studies_data = response.json()
+        studies_data = response.data or []
 
         if len(studies_data) == 0:
             return ResultWithData.fail(f"Study with ID '{study_instance_uid}' not found")
@@ -127,31 +153,32 @@ class DicomService:
         return ResultWithData[DicomStudy].succeed(study)
 
 
-    def get_studies(self, dicom_url: str, patient_id: str) -> ResultWithArray[DicomStudy]:
+    def get_studies(self, dicom_url: str, patient_id: str, cache_ttl: int | None = None) -> ResultWithArray[DicomStudy]:
         """
         Retrieve studies associated with a patient from the DICOM server.
         Args:
             dicom_url (str): The URL of the DICOM server.
             patient_id (str): The patient ID to retrieve studies for.
+            cache_ttl (int, optional): Time to live in seconds of the cached query result, uses the default TTL if not specified.
         Returns:
             ResultWithArray[DicomStudy]: A result object containing the list of studies.
         """
         # Query the DICOM server for studies associated with the patient ID
-        response = requests.get(
+        response = self._query(
+            dicom_url,
             f"{dicom_url}/studies",
-            headers=self._headers,
             params={
                 "PatientID": patient_id,
                 "includefield": "all",
                 "includefield": DicomTag.REQUESTED_PROCEDURE_DESCRIPTION
-            }
+            },
+            cache_ttl=cache_ttl,
         )
 
-        if response.status_code != 200:
-            return ResultWithArray.fail(f"Failed to retrieve studies for patient ID '{patient_id}'. Error: {response.text}")
+        if not response.success:
+            return ResultWithArray.fail(f"Failed to retrieve studies for patient ID '{patient_id}'. Error: {response.error}")
 
-        # Parse the response JSON
-        studies_data = response.json()
+        studies_data = response.data or []
         studies: list[DicomStudy] = []
 
         if len(studies_data) == 0:
@@ -187,30 +214,31 @@ class DicomService:
 
         return ResultWithArray[DicomStudy].succeed(studies)
     
-    def get_series(self, dicom_url: str, study_instance_uid: str) -> ResultWithArray[DicomSeries]:
+    def get_series(self, dicom_url: str, study_instance_uid: str, cache_ttl: int | None = None) -> ResultWithArray[DicomSeries]:
         """
         Retrieve a list of series associated with a study from the DICOM server.
         Args:
             dicom_url (str): The URL of the DICOM server.
             study_instance_uid (str): The study instance UID to retrieve series for.
+            cache_ttl (int, optional): Time to live in seconds of the cached query result, uses the default TTL if not specified.
         Returns:
             ResultWithArray[DicomSeries]: A result object containing the list of series.
         """
         # Query the DICOM server for series associated with the study ID
-        response = requests.get(
+        response = self._query(
+            dicom_url,
             f"{dicom_url}/series",
-            headers=self._headers,
             params={
                 "StudyInstanceUID": study_instance_uid,
                 "includefield": DicomTag.BODY_PART_EXAMINED
-            }
+            },
+            cache_ttl=cache_ttl,
         )
 
-        if response.status_code != 200:
-            return ResultWithArray.fail(f"Failed to retrieve series for study ID '{study_instance_uid}'. Error: {response.text}")
+        if not response.success:
+            return ResultWithArray.fail(f"Failed to retrieve series for study ID '{study_instance_uid}'. Error: {response.error}")
 
-        # Parse the response JSON
-        series_data = response.json()
+        series_data = response.data or []
         series: list[DicomSeries] = []
 
         if len(series_data) == 0:
@@ -235,27 +263,28 @@ class DicomService:
 
         return ResultWithArray[DicomSeries].succeed(series)
     
-    def get_instances(self, dicom_url: str, study_instance_id: str, series_instance_id: str) -> ResultWithArray[DicomInstance]:
+    def get_instances(self, dicom_url: str, study_instance_id: str, series_instance_id: str, cache_ttl: int | None = None) -> ResultWithArray[DicomInstance]:
         """
         Retrieve instances associated with a series from the DICOM server.
         Args:
             dicom_url (str): The URL of the DICOM server.
             study_instance_id (str): The study instance UID to retrieve instances for.
             series_instance_id (str): The series instance UID to retrieve instances for.
+            cache_ttl (int, optional): Time to live in seconds of the cached query result, uses the default TTL if not specified.
         Returns:
             ResultWithArray[DicomInstance]: A result object containing the list of instances.
         """
         # Query the DICOM server for instances associated with the series ID
-        response = requests.get(
+        response = self._query(
+            dicom_url,
             f"{dicom_url}/studies/{study_instance_id}/series/{series_instance_id}/instances",
-            headers=self._headers,
+            cache_ttl=cache_ttl,
         )
 
-        if response.status_code != 200:
-            return ResultWithArray.fail(f"Failed to retrieve instances for series ID '{series_instance_id}'. Error: {response.text}")
+        if not response.success:
+            return ResultWithArray.fail(f"Failed to retrieve instances for series ID '{series_instance_id}'. Error: {response.error}")
 
-        # Parse the response JSON
-        instances_data = response.json()
+        instances_data = response.data or []
         instances: list[DicomInstance] = []
 
         if len(instances_data) == 0:
@@ -278,6 +307,19 @@ class DicomService:
 
         return ResultWithArray[DicomInstance].succeed(instances)
     
+    def invalidate_cache(self, dicom_url: str | None = None) -> None:
+        """
+        Remove the cached QIDO-RS query results, e.g. when the DICOM server of an organization changes.
+        Args:
+            dicom_url (str, optional): Remove only the results of this DICOM server, otherwise all the results.
+        """
+        removed_count = self._metadata_cache.invalidate(dicom_url)
+        self._logger.info(f"Invalidated {removed_count} cached DICOM queries, DICOM URL: '{dicom_url}'")
+
+    def get_cache_stats(self) -> DicomCacheStats:
+        """Get the number of entries, hits and misses of the DICOM metadata cache"""
+        return DicomCacheStats(**self._metadata_cache.get_stats())
+    
     def download_and_zip_instances(self, dicom_url: str, study_instance_id: str, series_instance_id: str) -> ResultWithData[str]:
         """
         Download and zip instances associated with a series from the DICOM server.
@@ -288,13 +330,6 @@ class DicomService:
         Returns:
             ResultWithData[str]: A result object containing the path to the zipped file.
         """
-        result = self.get_instances(dicom_url, study_instance_id, series_instance_id)
-
-        if not result.success and result.error:
-            return ResultWithData.fail(result.error)
-        
-        instances = result.data or []
-
         if not os.path.exists("temp"):
             os.mkdir("temp")
 
@@ -304,27 +339,334 @@ class DicomService:
         if os.path.exists(zip_file_path):
             return ResultWithData[str].succeed(zip_file_path)
         
-        def download_instance(instance: DicomInstance) -> tuple[str, bytes]:
-            """Helper method to download a DICOM instance."""
-            response = requests.get(instance.retrieve_url)
-
-            if response.status_code == 200:
-                instance_name = f"{instance.modality}_{instance.instance_number}.dcm"
-                return instance_name, response.content
-            else:
-                raise ValueError(f"Failed to download instance '{instance.sop_instance_uid}' from retrieve URL '{instance.retrieve_url}'")
-
-        # Download and zip the instances concurrently using a ThreadPoolExecutor
-        with ThreadPoolExecutor() as executor, ZipFile(zip_file_path, "w") as zip_file:
-            future_to_instance = {executor.submit(download_instance, instance): instance for instance in instances}
-            for future in as_completed(future_to_instance):
+        instances_result = self.get_instances(dicom_url, study_instance_id, series_instance_id)
+
+        if not instances_result.success or not instances_result.data:
+            return ResultWithData.fail(instances_result.error)
+
+        # Lease the instances before downloading them, so they are not evicted before they are zipped
+        with self._instance_store.lease(instance.sop_instance_uid for instance in instances_result.data):
+            result = self._download_series_instances(dicom_url, study_instance_id, series_instance_id, instances_result.data)
+
+            if not result.success:
+                return ResultWithData.fail(result.error)
+
+            try:
+                self._zip_stored_instances(instances_result.data, zip_file_path)
+            except Exception as e:
+                if os.path.exists(zip_file_path):
+                    os.remove(zip_file_path) # Don't leave a partial zip file that would be reused on the next call
+                return ResultWithData.fail(str(e))
+
+        return ResultWithData[str].succeed(zip_file_path)
+    
+    def download_and_stage_instances(
+            self,
+            dicom_url: str,
+            study_instance_id: str,
+            series_instance_id: str,
+            staging_dir: str,
+            model_type: MLModelType,
+        ) -> ResultWithData[str]:
+        """
+        Download instances associated with a series from the DICOM server and stage them in a shared directory.
+        The instances are hard-linked from the instance store when possible, so staging does not copy the series.
+        The staged folder contains a `manifest.json` file which lists the staged instances.
+        The instances and the manifest are kept until the prediction finishes, see `remove_staged_instances`.
+        Args:
+            dicom_url (str): The URL of the DICOM server.
+            study_instance_id (str): The study instance UID to retrieve instances for.
+            series_instance_id (str): The series instance UID to retrieve instances for.
+            staging_dir (str): The shared staging directory.
+            model_type (MLModelType): The type of the model the series is staged for.
+        Returns:
+            ResultWithData[str]: A result object containing the path of the manifest relative to the staging directory.
+        """
+        instances_result = self.get_instances(dicom_url, study_instance_id, series_instance_id)
+
+        if not instances_result.success or not instances_result.data:
+            return ResultWithData.fail(instances_result.error)
+
+        instances = instances_result.data
+
+        # Lease the instances before downloading them, so they are not evicted before they are staged
+        with self._instance_store.lease(instance.sop_instance_uid for instance in instances):
+            result = self._download_series_instances(dicom_url, study_instance_id, series_instance_id, instances)
+
+            if not result.success:
+                return ResultWithData.fail(result.error)
+
+            # Use a unique folder per request, the same series can be predicted by several models at the same time
+            folder_name = f"{self._get_staged_folder_prefix(series_instance_id, model_type)}{uuid4().hex[:8]}"
+            folder_path = Path(staging_dir) / folder_name
+
+            try:
+                folder_path.mkdir(parents=True)
+                manifest_files: list[dict] = []
+
+                for instance in instances:
+                    instance_path = self._instance_store.get(instance.sop_instance_uid)
+
+                    if not instance_path:
+                        raise ValueError(f"Instance '{instance.sop_instance_uid}' is missing in the instance store")
+                
+                    instance_name = f"{instance.modality}_{instance.instance_number}.dcm"
+                    self._link_or_copy(instance_path, folder_path / instance_name)
+                    manifest_files.append({
+                        "name": instance_name,
+                        "sopInstanceUid": instance.sop_instance_uid,
+                        "size": instance_path.stat().st_size,
+                    })
+
+                manifest = {
+                    "studyInstanceUid": study_instance_id,
+                    "seriesInstanceUid": series_instance_id,
+                    "files": manifest_files,
+                }
+
+                with open(folder_path / "manifest.json", "w") as manifest_file:
+                    json.dump(manifest, manifest_file)
+            except Exception as e:
+                shutil.rmtree(folder_path, ignore_errors=True)
+                return ResultWithData.fail(f"Failed to stage instances of series '{series_instance_id}'. Error: {str(e)}")
+
+        return ResultWithData[str].succeed(f"{folder_name}/manifest.json")
+    
+    def remove_staged_instances(self, staging_dir: str, series_instance_id: str, model_type: MLModelType) -> None:
+        """
+        Remove the instances of a series staged for a model once its prediction finishes.
+        The instances stay in the instance store, only their links listed in the manifest and the manifest are removed.
+        The model outputs written next to them, such as the masks and the DICOM SEG, are kept.
+        A staged folder is removed only when nothing else is left in it.
+        Args:
+            staging_dir (str): The shared staging directory.
+            series_instance_id (str): The series instance UID of the staged series.
+            model_type (MLModelType): The type of the model the series was staged for.
+        """
+        prefix = self._get_staged_folder_prefix(series_instance_id, model_type)
+
+        for folder_path in Path(staging_dir).glob(f"{prefix}*"):
+            manifest_path = folder_path / "manifest.json"
+
+            try:
+                with open(manifest_path, "r") as manifest_file:
+                    manifest = json.load(manifest_file)
+
+                for item in manifest["files"]:
+                    (folder_path / item["name"]).unlink(missing_ok=True)
+
+                manifest_path.unlink()
+            except Exception as e:
+                self._logger.warning(f"Failed to remove the staged instances in '{folder_path.name}' of series '{series_instance_id}'. Error: {str(e)}")
+                continue
+
+            # Keep the folder while the model outputs are in it
+            if not any(folder_path.iterdir()):
+                folder_path.rmdir()
+
+            self._logger.info(f"Removed staged instances in '{folder_path.name}' of series '{series_instance_id}'")
+    
+    def _download_series_instances(
+            self,
+            dicom_url: str,
+            study_instance_id: str,
+            series_instance_id: str,
+            instances: list[DicomInstance],
+        ) -> ResultWithArray[DicomInstance]:
+        """
+        Helper method to make sure all the instances of a series are in the instance store.
+        Returns the instances of the series.
+        """
+        missing_instances = [instance for instance in instances if not self._instance_store.contains(instance.sop_instance_uid)]
+
+        # Retrieve the whole series in a single multipart response if none of its instances is stored locally
+        if (missing_instances and len(missing_instances) == len(instances)
+                and self._settings.series_retrieve and dicom_url not in self._series_retrieve_unsupported):
+            try:
+                series_downloaded = self._dicomweb_client.run(
+                    self._download_series(dicom_url, study_instance_id, series_instance_id, instances)
+                )
+
+                if not series_downloaded:
+                    self._series_retrieve_unsupported.add(dicom_url)
+                    self._logger.info(f"DICOM server '{dicom_url}' does not support series retrieval, falling back to instance retrieval")
+            except Exception as e:
+                self._logger.warning(f"Failed to retrieve series '{series_instance_id}', falling back to instance retrieval. Error: {str(e)}")
+
+            missing_instances = [instance for instance in instances if not self._instance_store.contains(instance.sop_instance_uid)]
+
+        if not missing_instances:
+            self._logger.info(f"All the instances of series '{series_instance_id}' are read from the instance store")
+            return ResultWithArray[DicomInstance].succeed(instances)
+
+        # Download the missing instances concurrently in the DICOMweb client, the number of in-flight requests
+        # is bounded per DICOM server and shared with the other series being downloaded at the same time
+        try:
+            self._dicomweb_client.run(self._download_instances(dicom_url, missing_instances))
+        except Exception as e:
+            return ResultWithArray.fail(str(e))
+
+        return ResultWithArray[DicomInstance].succeed(instances)
+    
+    def _get_staged_folder_prefix(self, series_instance_id: str, model_type: MLModelType) -> str:
+        """Helper method to get the name prefix of the folders of a series staged for a model."""
+        return f"dicom_{series_instance_id}_{model_type.value}_"
+
+    def _link_or_copy(self, source: Path, destination: Path) -> None:
+        """Helper method to hard-link a file, or copy it if the destination is on another file system."""
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    def _zip_stored_instances(self, instances: list[DicomInstance], zip_file_path: str) -> None:
+        """Helper method to zip the instances of a series from the instance store."""
+        with ZipFile(zip_file_path, "w") as zip_file:
+            for instance in instances:
+                instance_path = self._instance_store.get(instance.sop_instance_uid)
+
+                if not instance_path:
+                    raise ValueError(f"Instance '{instance.sop_instance_uid}' is missing in the instance store")
+
+                zip_file.write(instance_path, f"{instance.modality}_{instance.instance_number}.dcm")
+    
+    async def _download_series(
+            self,
+            dicom_url: str,
+            study_instance_id: str,
+            series_instance_id: str,
+            instances: list[DicomInstance],
+        ) -> bool:
+        """
+        Helper method to retrieve the whole series in a single multipart/related WADO-RS request
+        and write each instance to the instance store as its part is read from the stream.
+        The instances are resolved by the SOP Instance UID at the end of the part Content-Location.
+        Returns False if the DICOM server does not support the series retrieval, i.e. it rejects the multipart media type or returns another one.
+        Raises an error on the other failures, e.g. a server error, a timeout or a part without a known instance, which don't disable the series retrieval.
+        """
+        url = f"{dicom_url}/studies/{study_instance_id}/series/{series_instance_id}"
+        headers = {"Accept": self._dicom_multipart_content}
+        instances_by_uid = {instance.sop_instance_uid: instance for instance in instances}
+
+        async with self._dicomweb_client.stream(dicom_url, url, headers) as response:
+            # The server rejects the multipart media type
+            if response.status_code in (406, 415):
+                return False
+            
+            if response.status_code != 200:
+                raise ValueError(f"Series retrieval returned status code {response.status_code}")
+
+            boundary = get_multipart_boundary(response.headers.get("Content-Type", ""))
+
+            # The server returns the series in another media type
+            if not boundary:
+                return False
+
+            reader = MultipartReader(boundary)
+            writer: DicomInstanceWriter | None = None
+
+            try:
+                # Write the payload of every part straight to the instance store as the chunks arrive
+                async for chunk in response.aiter_bytes(self._chunk_size):
+                    for part, data in reader.feed(chunk):
+                        if writer is None:
+                            sop_instance_uid = self._get_part_uid(part, instances_by_uid)
+
+                            # The parts can't be stored without knowing their instances
+                            if not sop_instance_uid:
+                                raise ValueError(f"Part {part.number} of series '{series_instance_id}' does not reference an instance of the series")
+                            
+                            writer = self._instance_store.create_writer(sop_instance_uid)
+
+                        if data is None:
+                            writer.commit()
+                            writer = None
+                        else:
+                            writer.write(data)
+            finally:
+                if writer:
+                    writer.discard()
+            
+            if reader.parts_count != len(instances):
+                raise ValueError(f"Expected {len(instances)} instances in series '{series_instance_id}', received {reader.parts_count}")
+
+        return True
+    
+    def _get_part_uid(self, part: MultipartPart, instances_by_uid: dict[str, DicomInstance]) -> str | None:
+        """
+        Helper method to get the SOP Instance UID of a multipart part from the end of its Content-Location.
+        Returns None if the part does not reference an instance of the series.
+        """
+        location = part.headers.get("content-location", "").rstrip("/")
+        sop_instance_uid = location.rsplit("/", 1)[-1]
+        return sop_instance_uid if sop_instance_uid in instances_by_uid else None
+
+    async def _download_instances(self, dicom_url: str, instances: list[DicomInstance]) -> None:
+        """Helper method to download the DICOM instances concurrently to the instance store."""
+        pending_instances = iter(instances)
+
+        async def download_worker() -> None:
+            # Workers pull from the shared iterator, so each call waits on at most `max_concurrent_requests`
+            # slots of the DICOM server and the concurrent calls take turns fairly
+            for instance in pending_instances:
+                writer = self._instance_store.create_writer(instance.sop_instance_uid)
+
                 try:
-                    instance_name, content = future.result()
-                    zip_file.writestr(instance_name, content) # Write the instance content to the zip file
+                    await self._download_instance(dicom_url, instance, writer)
+                    writer.commit()
                 except Exception as e:
-                    return ResultWithData.fail(str(e))
+                    writer.discard()
+                    raise ValueError(f"Failed to download instance '{instance.sop_instance_uid}' from retrieve URL '{instance.retrieve_url}'. Error: {str(e)}")
 
-        return ResultWithData[str].succeed(zip_file_path)
+        workers_count = min(self._dicomweb_client.max_concurrent_requests, len(instances))
+        workers = [asyncio.create_task(download_worker()) for _ in range(workers_count)]
+
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _download_instance(self, dicom_url: str, instance: DicomInstance, output: DicomInstanceWriter) -> None:
+        """
+        Helper method to stream a DICOM instance to the instance store writer.
+        If the DICOM server wraps the instance in a multipart/related response, only the DICOM payload is written.
+        """
+        async with self._dicomweb_client.stream(dicom_url, instance.retrieve_url) as response:
+            if response.status_code != 200:
+                raise ValueError(f"Request failed with status code {response.status_code}")
+            
+            boundary = get_multipart_boundary(response.headers.get("Content-Type", ""))
+            reader = MultipartReader(boundary) if boundary else None
+
+            async for chunk in response.aiter_bytes(self._chunk_size):
+                if not reader:
+                    output.write(chunk)
+                    continue
+
+                for part, data in reader.feed(chunk):
+                    if part.number == 1 and data:
+                        output.write(data)
+
+    def _query(self, dicom_url: str, url: str, params: dict | None = None, cache_ttl: int | None = None) -> ResultWithArray[dict]:
+        """
+        Helper method to send a QIDO-RS query to the DICOM server, the successful results are served from the metadata cache.
+        The error of a failed result is the response text of the DICOM server.
+        """
+        cache_key = DicomMetadataCache.create_key(dicom_url, url, params)
+        cached_data = self._metadata_cache.get(cache_key)
+
+        if cached_data is not None:
+            return ResultWithArray[dict].succeed(cached_data)
+
+        response = self._session_manager.get(dicom_url, url, headers=self._headers, params=params)
+
+        if response.status_code != 200:
+            return ResultWithArray.fail(response.text)
+        
+        data = response.json()
+        self._metadata_cache.set(cache_key, data, cache_ttl)
+        return ResultWithArray[dict].succeed(data)
 
     def _get_value(self, dataset: dict, tag: DicomTag, value_type = DicomValueType.SINGLE) -> str | None:
         """
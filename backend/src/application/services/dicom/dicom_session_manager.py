@@ -0,0 +1,94 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+from .dicom_client_settings import DicomClientSettings
+
+class DicomSessionManager:
+    """
+    Manages pooled keep-alive HTTP sessions per DICOM server.
+    Each DICOM server gets its own `requests.Session` so that QIDO-RS queries and WADO-RS retrievals
+    reuse the open TCP/TLS connections instead of doing a handshake per request.
+    """
+    _retry_status_codes = (500, 502, 503, 504)
+
+    def __init__(self, settings: DicomClientSettings | None = None) -> None:
+        self._settings = settings or DicomClientSettings()
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """The (connect, read) timeout applied to each request"""
+        return (self._settings.connect_timeout, self._settings.read_timeout)
+
+    def get_session(self, dicom_url: str) -> requests.Session:
+        """
+        Get the pooled session for the DICOM server, create it if it does not exist.
+        Args:
+            dicom_url (str): The URL of the DICOM server.
+        Returns:
+            requests.Session: The session bound to the DICOM server host.
+        """
+        key = self._get_host_key(dicom_url)
+        session = self._sessions.get(key)
+
+        if session:
+            return session
+        
+        with self._lock:
+            if key not in self._sessions:
+                self._sessions[key] = self._create_session()
+                self._logger.info(f"Created pooled HTTP session for DICOM server '{key}'")
+            return self._sessions[key]
+        
+    def get(self, dicom_url: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the pooled session of the DICOM server.
+        Args:
+            dicom_url (str): The URL of the DICOM server which owns the session.
+            url (str): The URL of the request, can be a QIDO-RS or WADO-RS URL.
+            **kwargs: Additional arguments passed to `requests.Session.get`.
+        Returns:
+            requests.Response: The response of the request.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.get_session(dicom_url).get(url, **kwargs)
+
+    def close(self) -> None:
+        """Close all the sessions and release the pooled connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _create_session(self) -> requests.Session:
+        """Helper method to create a session with connection pooling and retries."""
+        retry = Retry(
+            total=self._settings.max_retries,
+            connect=self._settings.max_retries,
+            read=self._settings.max_retries,
+            status=self._settings.max_retries,
+            backoff_factor=self._settings.backoff_factor,
+            status_forcelist=self._retry_status_codes,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_maxsize=self._settings.pool_size,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.headers.update({"Connection": "keep-alive"})
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_host_key(self, dicom_url: str) -> str:
+        """Helper method to get the scheme and host of the DICOM server URL."""
+        parsed_url = urlparse(dicom_url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
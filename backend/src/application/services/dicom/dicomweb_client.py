@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+import httpx
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine
+from urllib.parse import urlparse
+from .dicom_client_settings import DicomClientSettings
+
+class DicomWebClient:
+    """
+    Asyncio DICOMweb client to retrieve instances from the DICOM servers.
+    The client runs its own event loop in a background thread, so the synchronous request handlers
+    can share the same HTTP connections and the same per-host concurrency limit.
+    The number of in-flight requests to a DICOM server is bounded by a semaphore per host
+    no matter how many series are being downloaded at the same time.
+    """
+    _retry_status_codes = (500, 502, 503, 504)
+
+    def __init__(self, settings: DicomClientSettings | None = None) -> None:
+        self._settings = settings or DicomClientSettings()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._logger = logging.getLogger(__name__)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="dicomweb-client", daemon=True)
+        self._thread.start()
+
+    @property
+    def max_concurrent_requests(self) -> int:
+        """Maximum number of in-flight requests per DICOM server"""
+        return self._settings.max_concurrent_requests
+
+    def run[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Run a coroutine in the client event loop and wait for its result.
+        Args:
+            coroutine (Coroutine): The coroutine to run, it should use this client for the requests.
+        Returns:
+            T: The result of the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @asynccontextmanager
+    async def stream(self, dicom_url: str, url: str, headers: dict[str, str] | None = None) -> AsyncIterator[httpx.Response]:
+        """
+        Send a GET request to the DICOM server and stream the response body.
+        The request waits for a free slot of the DICOM server and holds it until the response is closed.
+        It retries with backoff on 5xx responses and connection errors before the body is streamed.
+        Args:
+            dicom_url (str): The URL of the DICOM server which owns the connection pool.
+            url (str): The URL of the request.
+            headers (dict[str, str], optional): Additional request headers.
+        Returns:
+            AsyncIterator[httpx.Response]: The response which body is not read yet.
+        Raises:
+            httpx.TransportError: If the DICOM server is not reachable after all the retries.
+        """
+        key = self._get_host_key(dicom_url)
+        client = self._get_client(key)
+
+        async with self._get_semaphore(key):
+            for attempt in range(self._settings.max_retries + 1):
+                try:
+                    response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+
+                    if response.status_code not in self._retry_status_codes or attempt == self._settings.max_retries:
+                        break
+
+                    await response.aclose()
+                except httpx.TransportError:
+                    if attempt == self._settings.max_retries:
+                        raise
+
+                delay = self._settings.backoff_factor * (2 ** attempt)
+                self._logger.warning(f"Retrying request '{url}' in {delay} seconds, attempt {attempt + 1}")
+                await asyncio.sleep(delay)
+
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    def close(self) -> None:
+        """Close the HTTP clients and stop the event loop"""
+        async def close_clients() -> None:
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+
+        self.run(close_clients())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _get_client(self, key: str) -> httpx.AsyncClient:
+        """Helper method to get the HTTP client of the DICOM server host."""
+        if key not in self._clients:
+            self._clients[key] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self._settings.max_concurrent_requests,
+                    max_keepalive_connections=self._settings.pool_size,
+                ),
+                timeout=httpx.Timeout(self._settings.read_timeout, connect=self._settings.connect_timeout),
+            )
+            self._logger.info(f"Created async HTTP client for DICOM server '{key}'")
+        return self._clients[key]
+
+    def _get_semaphore(self, key: str) -> asyncio.Semaphore:
+        """Helper method to get the concurrency limit of the DICOM server host."""
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self._settings.max_concurrent_requests)
+        return self._semaphores[key]
+
+    def _get_host_key(self, dicom_url: str) -> str:
+        """Helper method to get the scheme and host of the DICOM server URL."""
+        parsed_url = urlparse(dicom_url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from typing import Iterator
+
+@dataclass
+class MultipartPart:
+    """Headers of a single part of a multipart/related message"""
+    number: int
+    """The 1-based position of the part in the message"""
+
+    headers: dict[str, str] = field(default_factory=dict)
+    """The part headers, header names are lower-cased"""
+
+class MultipartReader:
+    """
+    Streaming reader of a multipart/related response body, e.g. the WADO-RS series retrieval.
+    The body is fed chunk by chunk as it arrives from the network, and the part payloads are emitted
+    chunk by chunk too, so neither the whole response nor a whole part is ever held in memory.
+    """
+    _preamble = 0
+    _headers = 1
+    _body = 2
+    _epilogue = 3
+
+    def __init__(self, boundary: str) -> None:
+        self._delimiter = b"--" + boundary.encode("latin-1")
+        self._body_delimiter = b"\r\n" + self._delimiter
+        self._buffer = bytearray()
+        self._state = self._preamble
+        self._part: MultipartPart | None = None
+        self._parts_count = 0
+
+    @property
+    def finished(self) -> bool:
+        """True if the closing boundary has been read"""
+        return self._state == self._epilogue
+    
+    @property
+    def parts_count(self) -> int:
+        """Number of the parts read so far"""
+        return self._parts_count
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[MultipartPart, bytes | None]]:
+        """
+        Feed the next chunk of the body to the reader. The returned iterator must be consumed before the next call.
+        Args:
+            chunk (bytes): The next chunk of the multipart body.
+        Returns:
+            Iterator[tuple[MultipartPart, bytes | None]]: Pairs of the part and the next chunk of its payload.
+            The payload is None when the part is complete.
+        """
+        self._buffer.extend(chunk)
+
+        while True:
+            if self._state == self._preamble:
+                if not self._read_delimiter(self._buffer.find(self._delimiter)):
+                    return
+            elif self._state == self._headers:
+                headers_end = self._buffer.find(b"\r\n\r\n")
+
+                if headers_end == -1:
+                    return
+
+                self._parts_count += 1
+                self._part = MultipartPart(number=self._parts_count, headers=self._parse_headers(bytes(self._buffer[:headers_end])))
+                del self._buffer[:headers_end + 4]
+                self._state = self._body
+            elif self._state == self._body and self._part:
+                body_end = self._buffer.find(self._body_delimiter)
+
+                if body_end == -1:
+                    # Emit everything except the tail where a delimiter split across chunks can start
+                    emit_end = len(self._buffer) - len(self._body_delimiter) + 1
+
+                    if emit_end > 0:
+                        yield self._part, bytes(self._buffer[:emit_end])
+                        del self._buffer[:emit_end]
+                    return
+
+                if body_end > 0:
+                    yield self._part, bytes(self._buffer[:body_end])
+                
+                yield self._part, None
+                del self._buffer[:body_end + 2]
+                self._part = None
+                self._state = self._preamble # The buffer now starts with the next delimiter line
+            else:
+                self._buffer.clear()
+                return
+    
+    def _read_delimiter(self, index: int) -> bool:
+        """
+        Helper method to consume the delimiter line at the given index of the buffer.
+        Returns False if more data is needed to read the delimiter line.
+        """
+        if index == -1:
+            return False
+        
+        line_end = self._buffer.find(b"\r\n", index)
+        delimiter_end = index + len(self._delimiter)
+
+        if self._buffer[delimiter_end:delimiter_end + 2] == b"--":
+            self._state = self._epilogue
+            self._buffer.clear()
+            return True
+        
+        if line_end == -1:
+            return False
+
+        del self._buffer[:line_end + 2]
+        self._state = self._headers
+        return True
+
+    def _parse_headers(self, data: bytes) -> dict[str, str]:
+        """Helper method to parse the headers of a part, header names are lower-cased."""
+        headers: dict[str, str] = {}
+
+        for line in data.decode("latin-1").split("\r\n"):
+            name, separator, value = line.partition(":")
+
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+
+        return headers
+
+def get_multipart_boundary(content_type: str) -> str | None:
+    """
+    Get the boundary parameter of a multipart content type.
+    Args:
+        content_type (str): The value of the Content-Type header.
+    Returns:
+        str | None: The boundary if the content type is multipart, otherwise None.
+    """
+    media_type, _, params = content_type.partition(";")
+
+    if not media_type.strip().lower().startswith("multipart/"):
+        return None
+    
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+
+        if name.strip().lower() == "boundary":
+            return value.strip().strip('"')
+        
+    return None
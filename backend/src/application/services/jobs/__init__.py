@@ -0,0 +1,24 @@
+from core import DIContainer, ServiceLifecycle
+from .prediction_queue_settings import *
+from .prediction_queue_stats import *
+from .prediction_job_queue import *
+from .postgres_prediction_job_queue import *
+from .memory_prediction_job_queue import *
+
+def create_prediction_job_queue() -> PredictionJobQueue:
+    """Create the prediction job queue of the backend configured in the `PREDICTION_QUEUE_BACKEND` variable"""
+    settings = PredictionQueueSettings()
+
+    if settings.backend == "memory":
+        return MemoryPredictionJobQueue(settings)
+    
+    if settings.backend == "postgres":
+        return PostgresPredictionJobQueue(settings)
+    
+    raise ValueError(f"Unsupported prediction queue backend '{settings.backend}', must be 'postgres' or 'memory'")
+
+def get_prediction_job_queue() -> PredictionJobQueue:
+    """Get the singleton prediction job queue from the default DI container"""
+    return DIContainer.get_default().resolve(PredictionJobQueue)
+
+DIContainer.get_default().register(PredictionJobQueue, create_prediction_job_queue, ServiceLifecycle.SINGLETON)
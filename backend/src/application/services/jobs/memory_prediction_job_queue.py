@@ -0,0 +1,169 @@
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+from domain.entities import PredictionJob
+from domain.enums import JobStatus, MLModelType, PredictionPriority
+from .prediction_job_queue import PredictionJobQueue
+from .prediction_queue_settings import PredictionQueueSettings
+from .prediction_queue_stats import PredictionQueueStats
+
+class MemoryPredictionJobQueue(PredictionJobQueue):
+    """
+    Prediction job queue kept in the memory of the process, a local stand-in for the database queue.
+    The jobs are lost on restart and only the workers embedded in the API process can consume them.
+    """
+
+    def __init__(self, settings: PredictionQueueSettings | None = None) -> None:
+        super().__init__(settings)
+        self._jobs: dict[UUID, PredictionJob] = {}
+        self._started_jobs: deque[tuple[PredictionPriority, datetime, float]] = deque()
+        """Priority, start time and wait time of the started jobs for the wait time metrics"""
+        self._lock = threading.Lock()
+
+    def enqueue(
+            self,
+            model_type: MLModelType,
+            series_instance_uid: str,
+            payload: dict,
+            organization_id: str,
+            priority: PredictionPriority = PredictionPriority.ROUTINE,
+            weight: int = 1,
+        ) -> PredictionJob:
+        with self._lock:
+            # Finished jobs are removed, so all the jobs left are queued or running
+            for active_job in self._jobs.values():
+                if active_job.series_instance_uid == series_instance_uid and active_job.model_type == model_type:
+                    self._promote(active_job, priority)
+                    return active_job
+
+            job = PredictionJob(
+                model_type=model_type,
+                series_instance_uid=series_instance_uid,
+                organization_id=organization_id,
+                priority=priority,
+                weight=weight,
+                payload=payload,
+                max_attempts=self._settings.max_attempts,
+            )
+            self._jobs[job.id] = job
+            return job
+
+    def dequeue(self, worker_id: str) -> PredictionJob | None:
+        with self._lock:
+            now = datetime.utcnow()
+            running: dict[MLModelType, int] = {}
+            organization_running: dict[str, int] = {}
+
+            for job in self._jobs.values():
+                if job.status == JobStatus.RUNNING and job.available_at > now:
+                    running[job.model_type] = running.get(job.model_type, 0) + 1
+                    organization_running[job.organization_id] = organization_running.get(job.organization_id, 0) + 1
+
+            visible_jobs = [
+                job for job in self._jobs.values()
+                if job.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+                and job.available_at <= now
+                and job.attempts < job.max_attempts
+                and running.get(job.model_type, 0) < self._settings.get_model_limit(job.model_type)
+            ]
+
+            if not visible_jobs:
+                return None
+
+            # Priority class first, then the organization with the fewest running jobs per its weight
+            job = min(visible_jobs, key=lambda job: (
+                job.priority.rank,
+                organization_running.get(job.organization_id, 0) / job.weight,
+                job.available_at,
+            ))
+
+            if job.started_at is None:
+                self._started_jobs.append((job.priority, now, (now - job.created_at).total_seconds()))
+                self._prune_started_jobs(now)
+
+            self._lease(job, worker_id, now)
+            return job
+
+    def get_running(self, series_instance_uid: str, model_type: MLModelType) -> PredictionJob | None:
+        with self._lock:
+            running_jobs = [
+                job for job in self._jobs.values()
+                if job.series_instance_uid == series_instance_uid
+                and job.model_type == model_type
+                and job.status == JobStatus.RUNNING
+            ]
+
+            if not running_jobs:
+                return None
+            
+            return max(running_jobs, key=lambda job: job.created_at)
+
+    def complete(self, job_id: UUID) -> None:
+        self._update(job_id, self._complete)
+
+    def fail(self, job_id: UUID, error: str) -> None:
+        self._update(job_id, lambda job: self._fail(job, error))
+
+    def retry(self, job_id: UUID, error: str) -> bool:
+        job = self._update(job_id, lambda job: self._retry(job, error))
+        return job is not None and job.status == JobStatus.QUEUED
+
+    def get_stats(self) -> list[PredictionQueueStats]:
+        with self._lock:
+            now = datetime.utcnow()
+            stats = {priority: PredictionQueueStats(priority=priority) for priority in PredictionPriority}
+
+            for job in self._jobs.values():
+                if job.status == JobStatus.RUNNING:
+                    stats[job.priority].running += 1
+                else:
+                    stats[job.priority].queued += 1
+                    stats[job.priority].oldest_wait = max(stats[job.priority].oldest_wait, (now - job.created_at).total_seconds())
+
+            self._prune_started_jobs(now)
+
+            for priority in PredictionPriority:
+                waits = [wait for job_priority, _, wait in self._started_jobs if job_priority == priority]
+                stats[priority].average_wait = sum(waits) / len(waits) if waits else 0
+
+            return list(stats.values())
+
+    def fail_expired(self) -> list[PredictionJob]:
+        with self._lock:
+            now = datetime.utcnow()
+            expired_jobs = [
+                job for job in self._jobs.values()
+                if job.status == JobStatus.RUNNING
+                and job.available_at <= now
+                and job.attempts >= job.max_attempts
+            ]
+
+            for job in expired_jobs:
+                self._fail(job, f"The job lease expired after {job.attempts} attempts")
+                del self._jobs[job.id]
+
+            return expired_jobs
+
+    def _prune_started_jobs(self, now: datetime) -> None:
+        """Drop the started jobs out of the stats window"""
+        window_start = now - timedelta(seconds=self._settings.stats_window)
+
+        while self._started_jobs and self._started_jobs[0][1] < window_start:
+            self._started_jobs.popleft()
+
+    def _update(self, job_id: UUID, update: Callable[[PredictionJob], None]) -> PredictionJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+            if job is None:
+                return None
+
+            update(job)
+
+            # Finished jobs are not needed anymore
+            if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                del self._jobs[job.id]
+
+            return job
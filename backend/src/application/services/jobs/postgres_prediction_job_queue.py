@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+from sqlalchemy import Float, cast, text
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, func, select
+from domain.entities import PredictionJob
+from domain.enums import JobStatus, MLModelType, PredictionPriority
+from infrastructure import DbContext
+from .prediction_job_queue import PredictionJobQueue
+from .prediction_queue_stats import PredictionQueueStats
+
+class PostgresPredictionJobQueue(PredictionJobQueue):
+    """
+    Prediction job queue stored in the `prediction_jobs` table. 
+    The workers lease the jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so the queued jobs survive restarts
+    and any number of worker processes can consume the queue without blocking each other.
+    """
+
+    def enqueue(
+            self,
+            model_type: MLModelType,
+            series_instance_uid: str,
+            payload: dict,
+            organization_id: str,
+            priority: PredictionPriority = PredictionPriority.ROUTINE,
+            weight: int = 1,
+        ) -> PredictionJob:
+        with DbContext.create_session() as session:
+            # Serialize the requests of the same series and model, so only one of them creates the job
+            session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"prediction_jobs:{series_instance_uid}:{model_type.value}"})
+            query = select(PredictionJob).where(
+                PredictionJob.series_instance_uid == series_instance_uid,
+                PredictionJob.model_type == model_type,
+                col(PredictionJob.status).in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            )
+            active_job = session.exec(query).first()
+
+            if active_job is not None:
+                self._promote(active_job, priority)
+                session.add(active_job)
+                return self._commit(session, active_job)
+
+            job = PredictionJob(
+                model_type=model_type,
+                series_instance_uid=series_instance_uid,
+                organization_id=organization_id,
+                priority=priority,
+                weight=weight,
+                payload=payload,
+                max_attempts=self._settings.max_attempts,
+            )
+            session.add(job)
+            return self._commit(session, job)
+
+    def dequeue(self, worker_id: str) -> PredictionJob | None:
+        excluded_models: list[MLModelType] = []
+
+        while True:
+            with DbContext.create_session() as session:
+                now = datetime.utcnow()
+                query = select(PredictionJob).where(
+                    col(PredictionJob.status).in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+                    PredictionJob.available_at <= now,
+                    PredictionJob.attempts < PredictionJob.max_attempts,
+                )
+
+                if excluded_models:
+                    query = query.where(col(PredictionJob.model_type).not_in(excluded_models))
+
+                # Weighted fair share, the organization with the fewest running jobs per its weight goes first
+                running_job = aliased(PredictionJob)
+                organization_running = select(func.count()).where(
+                    running_job.organization_id == PredictionJob.organization_id,
+                    running_job.status == JobStatus.RUNNING,
+                    running_job.available_at > now,
+                ).correlate(PredictionJob).scalar_subquery()
+                organization_share = cast(organization_running, Float) / PredictionJob.weight
+
+                query = query.order_by(
+                    col(PredictionJob.priority),
+                    organization_share,
+                    col(PredictionJob.available_at),
+                ).limit(1).with_for_update(of=PredictionJob, skip_locked=True)
+                job = session.exec(query).first()
+
+                if job is None:
+                    return None
+
+                # Serialize the leases of the same model, so the workers can't exceed its limit together
+                session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"prediction_jobs:{job.model_type.value}"})
+
+                if self._count_running(session, job.model_type, now) >= self._settings.get_model_limit(job.model_type):
+                    excluded_models.append(job.model_type)
+                    session.rollback()
+                    continue
+
+                self._lease(job, worker_id, now)
+                session.add(job)
+                return self._commit(session, job)
+
+    def get_running(self, series_instance_uid: str, model_type: MLModelType) -> PredictionJob | None:
+        with DbContext.create_session() as session:
+            query = select(PredictionJob).where(
+                PredictionJob.series_instance_uid == series_instance_uid,
+                PredictionJob.model_type == model_type,
+                PredictionJob.status == JobStatus.RUNNING,
+            ).order_by(col(PredictionJob.created_at).desc())
+            job = session.exec(query).first()
+
+            if job is not None:
+                session.expunge(job)
+
+            return job
+
+    def complete(self, job_id: UUID) -> None:
+        self._update(job_id, self._complete)
+
+    def fail(self, job_id: UUID, error: str) -> None:
+        self._update(job_id, lambda job: self._fail(job, error))
+
+    def retry(self, job_id: UUID, error: str) -> bool:
+        job = self._update(job_id, lambda job: self._retry(job, error))
+        return job is not None and job.status == JobStatus.QUEUED
+
+    def get_stats(self) -> list[PredictionQueueStats]:
+        now = datetime.utcnow()
+        stats = {priority: PredictionQueueStats(priority=priority) for priority in PredictionPriority}
+
+        with DbContext.create_session() as session:
+            depth_query = select(
+                PredictionJob.priority,
+                PredictionJob.status,
+                func.count(),
+                func.min(PredictionJob.created_at),
+            ).where(
+                col(PredictionJob.status).in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            ).group_by(col(PredictionJob.priority), col(PredictionJob.status))
+
+            for priority, status, count, oldest_created_at in session.exec(depth_query).all():
+                if status == JobStatus.RUNNING:
+                    stats[priority].running = count
+                else:
+                    stats[priority].queued = count
+                    stats[priority].oldest_wait = (now - oldest_created_at).total_seconds()
+
+            wait_query = select(
+                PredictionJob.priority,
+                func.avg(func.extract("epoch", col(PredictionJob.started_at) - col(PredictionJob.created_at))),
+            ).where(
+                col(PredictionJob.started_at) >= now - timedelta(seconds=self._settings.stats_window),
+            ).group_by(col(PredictionJob.priority))
+
+            for priority, average_wait in session.exec(wait_query).all():
+                stats[priority].average_wait = float(average_wait or 0)
+
+        return list(stats.values())
+
+    def fail_expired(self) -> list[PredictionJob]:
+        with DbContext.create_session() as session:
+            query = select(PredictionJob).where(
+                PredictionJob.status == JobStatus.RUNNING,
+                PredictionJob.available_at <= datetime.utcnow(),
+                PredictionJob.attempts >= PredictionJob.max_attempts,
+            ).with_for_update(skip_locked=True)
+            jobs = list(session.exec(query).all())
+
+            for job in jobs:
+                self._fail(job, f"The job lease expired after {job.attempts} attempts")
+                session.add(job)
+
+            session.commit()
+
+            for job in jobs:
+                session.refresh(job)
+                session.expunge(job)
+
+            return jobs
+
+    def _count_running(self, session: Session, model_type: MLModelType, now: datetime) -> int:
+        query = select(func.count()).select_from(PredictionJob).where(
+            PredictionJob.model_type == model_type,
+            PredictionJob.status == JobStatus.RUNNING,
+            PredictionJob.available_at > now,
+        )
+        return session.exec(query).one()
+
+    def _update(self, job_id: UUID, update: Callable[[PredictionJob], None]) -> PredictionJob | None:
+        with DbContext.create_session() as session:
+            job = session.get(PredictionJob, job_id, with_for_update=True)
+
+            if job is None:
+                return None
+
+            update(job)
+            session.add(job)
+            return self._commit(session, job)
+
+    def _commit(self, session: Session, job: PredictionJob) -> PredictionJob:
+        """Commit the job changes and detach the job from the session to use it after the session is closed"""
+        session.commit()
+        session.refresh(job)
+        session.expunge(job)
+        return job
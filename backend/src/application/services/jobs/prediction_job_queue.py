@@ -0,0 +1,147 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from uuid import UUID
+from domain.entities import PredictionJob
+from domain.enums import JobStatus, MLModelType, PredictionPriority
+from .prediction_queue_settings import PredictionQueueSettings
+from .prediction_queue_stats import PredictionQueueStats
+
+class PredictionJobQueue(ABC):
+    """
+    Abstract queue of the series predictions consumed by the prediction workers.
+    The jobs are scheduled by their priority class first, then by the fair share of their organizations,
+    the organization with the fewest running jobs per its weight goes first.
+    A worker leases a job for the visibility timeout. A running job is completed when the ML service reports
+    the result, if the lease expires first the job becomes visible again and it's retried by another worker.
+    """
+
+    def __init__(self, settings: PredictionQueueSettings | None = None) -> None:
+        self._settings = settings or PredictionQueueSettings()
+
+    @abstractmethod
+    def enqueue(
+            self,
+            model_type: MLModelType,
+            series_instance_uid: str,
+            payload: dict,
+            organization_id: str,
+            priority: PredictionPriority = PredictionPriority.ROUTINE,
+            weight: int = 1,
+        ) -> PredictionJob:
+        """
+        Add a new prediction job to the queue. Concurrent requests of the same series and model are coalesced,
+        if the series is already queued or running with the model, the existing job is returned.
+        A queued job is promoted if the new request has a higher priority.
+        Args:
+            model_type (MLModelType): The model to predict the series with.
+            series_instance_uid (str): The series instance UID.
+            payload (dict): The predict series command in JSON format.
+            organization_id (str): The ID of the organization requesting the prediction.
+            priority (PredictionPriority): The priority class of the request.
+            weight (int): The fair share weight of the organization.
+        Returns:
+            PredictionJob: The queued job or the existing active job of the series.
+        """
+        pass
+
+    @abstractmethod
+    def dequeue(self, worker_id: str) -> PredictionJob | None:
+        """
+        Lease the next visible job whose model has not reached its concurrency limit.
+        Args:
+            worker_id (str): The ID of the worker leasing the job.
+        Returns:
+            PredictionJob | None: The leased job or None if there is no job to run.
+        """
+        pass
+
+    @abstractmethod
+    def get_running(self, series_instance_uid: str, model_type: MLModelType) -> PredictionJob | None:
+        """
+        Get the running job of the series waiting for the ML service result.
+        Args:
+            series_instance_uid (str): The series instance UID.
+            model_type (MLModelType): The model predicting the series.
+        Returns:
+            PredictionJob | None: The running job or None if it's not found.
+        """
+        pass
+
+    @abstractmethod
+    def complete(self, job_id: UUID) -> None:
+        """Mark the job as completed and release its model slot"""
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: UUID, error: str) -> None:
+        """Mark the job as failed without retrying it"""
+        pass
+
+    @abstractmethod
+    def retry(self, job_id: UUID, error: str) -> bool:
+        """
+        Put the failed job back to the queue with an exponential backoff delay.
+        Args:
+            job_id (UUID): The ID of the failed job.
+            error (str): The error of the failed attempt.
+        Returns:
+            bool: True if the job will be retried, False if it's out of attempts and marked as failed.
+        """
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> list[PredictionQueueStats]:
+        """
+        Get the queue depth and wait time metrics per priority class.
+        Returns:
+            list[PredictionQueueStats]: The metrics of each priority class.
+        """
+        pass
+
+    @abstractmethod
+    def fail_expired(self) -> list[PredictionJob]:
+        """
+        Mark the running jobs with an expired lease and no attempts left as failed.
+        Returns:
+            list[PredictionJob]: The failed jobs.
+        """
+        pass
+
+    def _promote(self, job: PredictionJob, priority: PredictionPriority) -> bool:
+        if job.status != JobStatus.QUEUED or priority.rank >= job.priority.rank:
+            return False
+        
+        job.priority = priority
+        job.updated_at = datetime.utcnow()
+        return True
+
+    def _lease(self, job: PredictionJob, worker_id: str, now: datetime) -> None:
+        job.started_at = job.started_at or now
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.available_at = now + timedelta(seconds=self._settings.visibility_timeout)
+        job.updated_at = now
+
+    def _complete(self, job: PredictionJob) -> None:
+        job.status = JobStatus.COMPLETED
+        job.locked_by = None
+        job.updated_at = datetime.utcnow()
+
+    def _fail(self, job: PredictionJob, error: str) -> None:
+        job.status = JobStatus.FAILED
+        job.error = error
+        job.locked_by = None
+        job.updated_at = datetime.utcnow()
+
+    def _retry(self, job: PredictionJob, error: str) -> None:
+        if job.attempts >= job.max_attempts:
+            self._fail(job, error)
+            return
+
+        now = datetime.utcnow()
+        job.status = JobStatus.QUEUED
+        job.error = error
+        job.locked_by = None
+        job.available_at = now + timedelta(seconds=self._settings.retry_delay * 2 ** max(job.attempts - 1, 0))
+        job.updated_at = now
@@ -0,0 +1,54 @@
+import os
+from domain.enums import MLModelType
+
+def _parse_model_limits(value: str | None) -> dict[str, int]:
+    """Parse the per-model limits in the format `model_type=limit,model_type=limit`"""
+    limits: dict[str, int] = {}
+
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+
+        model_type, limit = item.split("=", 1)
+        limits[model_type.strip()] = int(limit)
+
+    return limits
+
+class PredictionQueueSettings:
+    """Settings of the prediction job queue and its workers"""
+    backend: str = (os.getenv("PREDICTION_QUEUE_BACKEND") or "postgres").lower()
+    """Storage of the queued jobs, `postgres` to keep them in the database or `memory` to keep them in the process"""
+
+    workers: int = int(os.getenv("PREDICTION_QUEUE_WORKERS") or 4)
+    """Number of worker threads in a worker process"""
+
+    embedded_worker: bool = (os.getenv("PREDICTION_QUEUE_EMBEDDED_WORKER") or "true").lower() == "true"
+    """Run a worker inside the API process, disable it when the workers run as separate processes"""
+
+    model_concurrency: int = int(os.getenv("PREDICTION_QUEUE_MODEL_CONCURRENCY") or 2)
+    """Default maximum number of running predictions per model across all the workers"""
+
+    model_limits: dict[str, int] = _parse_model_limits(os.getenv("PREDICTION_QUEUE_MODEL_LIMITS"))
+    """Maximum number of running predictions of the specific models, e.g. `brain_tumor_segmentation=1`"""
+
+    visibility_timeout: int = int(os.getenv("PREDICTION_QUEUE_VISIBILITY_TIMEOUT") or 1800)
+    """Time in seconds a running job stays leased before it becomes visible again to the workers"""
+
+    max_attempts: int = int(os.getenv("PREDICTION_QUEUE_MAX_ATTEMPTS") or 3)
+    """Maximum number of attempts of a job before it's marked as failed"""
+
+    retry_delay: float = float(os.getenv("PREDICTION_QUEUE_RETRY_DELAY") or 30)
+    """Delay in seconds before the first retry of a failed job, doubled on each next attempt"""
+
+    stats_window: int = int(os.getenv("PREDICTION_QUEUE_STATS_WINDOW") or 3600)
+    """Time window in seconds of the started jobs used for the average wait time metrics"""
+
+    poll_interval: float = float(os.getenv("PREDICTION_QUEUE_POLL_INTERVAL") or 2)
+    """Time in seconds an idle worker waits before polling the queue again"""
+
+    expiry_interval: float = float(os.getenv("PREDICTION_QUEUE_EXPIRY_INTERVAL") or 60)
+    """Time in seconds between the sweeps failing the expired jobs out of attempts, whether the workers are idle or not"""
+
+    def get_model_limit(self, model_type: MLModelType) -> int:
+        """Get the maximum number of running predictions of the model"""
+        return self.model_limits.get(model_type.value, self.model_concurrency)
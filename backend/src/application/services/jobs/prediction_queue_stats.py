@@ -0,0 +1,17 @@
+from application.models.base_model import BaseModel
+from domain.enums import PredictionPriority
+
+class PredictionQueueStats(BaseModel):
+    """Queue depth and wait time metrics of a prediction priority class"""
+    priority: PredictionPriority
+    queued: int = 0
+    """Number of the jobs waiting for a worker"""
+
+    running: int = 0
+    """Number of the jobs leased by the workers or waiting for the ML service result"""
+
+    oldest_wait: float = 0
+    """Time in seconds the oldest queued job has been waiting"""
+
+    average_wait: float = 0
+    """Average time in seconds from the request to the start of the jobs started in the stats window"""
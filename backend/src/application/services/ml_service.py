@@ -1,5 +1,7 @@
 import logging
+import os
 import requests
+from urllib.parse import quote
 from core import DIContainer, Result
 from application.utils import getenv_required
 from domain.entities import Series
@@ -9,14 +11,24 @@ from domain.enums import MLModelType
 class MLService:
     _logger = logging.getLogger(__name__)
     _ml_app_url = getenv_required("ML_APP_URL")
+    _shared_staging_dir = os.getenv("SHARED_STAGING_DIR")
 
-    def send_for_prediction(self, series: Series, model_type: MLModelType, series_zip_file: str) -> Result:
+    @property
+    def shared_staging_dir(self) -> str | None:
+        """
+        The staging directory shared with the ML service, e.g. a volume mounted to both services.
+        If it's not configured, the series are uploaded to the ML service as zip files.
+        """
+        return self._shared_staging_dir
+
+    def send_for_prediction(self, series: Series, model_type: MLModelType, series_zip_file: str, dicom_url: str) -> Result:
         """
         Send a zipped series to the ML service for prediction.
         Args:
             series (Series): The series to send for prediction.
             model_type (MLModelType): The type of the model to use for prediction.
             series_zip_file (str): The path to the zipped series to send.
+            dicom_url (str): The URL of the DICOM server of the series, the results of the model are stored to it.
         Returns:
             Result: The result of the operation.
         """
@@ -24,7 +36,7 @@ class MLService:
         try:
             with open(series_zip_file, "rb") as file:
                 files = {"file": file}
-                url = f"{self._ml_app_url}/predict?seriesId={str(series.id)}&modality={series.modality}&modelType={model_type.value}&bodyPart={series.body_part}"
+                url = f"{self._ml_app_url}/predict?{self._get_query(series, model_type, dicom_url)}"
 
                 self._logger.info(f"Sending series '{series.id}' for prediction to URL: {url}")
                 response = requests.post(url, files=files)
@@ -39,3 +51,37 @@ class MLService:
             self._logger.error(f"Failed to send series for prediction: {str(e)}")
             return Result.fail(f"Failed to send series for prediction: {str(e)}")
 
+    def send_staged_for_prediction(self, series: Series, model_type: MLModelType, manifest_path: str, dicom_url: str) -> Result:
+        """
+        Send a reference to a series staged in the shared staging directory to the ML service for prediction.
+        Only the manifest path is sent, the ML service reads the instances from the shared directory.
+        Args:
+            series (Series): The series to send for prediction.
+            model_type (MLModelType): The type of the model to use for prediction.
+            manifest_path (str): The path of the series manifest relative to the shared staging directory.
+            dicom_url (str): The URL of the DICOM server of the series, the results of the model are stored to it.
+        Returns:
+            Result: The result of the operation.
+        """
+        try:
+            url = f"{self._ml_app_url}/predict/staged?{self._get_query(series, model_type, dicom_url)}"
+
+            self._logger.info(f"Sending staged series '{series.id}' for prediction to URL: {url}, manifest: {manifest_path}")
+            response = requests.post(url, json={"manifestPath": manifest_path})
+
+            if response.status_code != 200:
+                self._logger.error(f"Failed to send staged series for prediction: {response.text}")
+                return Result.fail(f"Failed to send staged series for prediction: {response.text}")
+            
+            self._logger.info(f"Staged series '{series.id}' sent for prediction")
+            return Result.succeed()
+        except Exception as e:
+            self._logger.error(f"Failed to send staged series for prediction: {str(e)}")
+            return Result.fail(f"Failed to send staged series for prediction: {str(e)}")
+
+    def _get_query(self, series: Series, model_type: MLModelType, dicom_url: str) -> str:
+        """Helper method to get the query string of a prediction request"""
+        return (
+            f"seriesId={str(series.id)}&modality={series.modality}&modelType={model_type.value}"
+            f"&bodyPart={series.body_part}&dicomUrl={quote(dicom_url, safe='')}"
+        )
@@ -60,7 +60,7 @@ class PatientService:
             ValueError: If the organization or patient is not found, or an error occurs while retrieving the study from the DICOM server.
         """
 
-        result = self._dicom_service.get_study(organization.dicom_url, study_instance_uid)
+        result = self._dicom_service.get_study(organization.dicom_url, study_instance_uid, organization.dicom_cache_ttl)
 
         if not result.success:
             raise ValueError(result.error)
@@ -118,7 +118,7 @@ class PatientService:
         """
         series_repo = self._uow.get_repository(Series)
 
-        result = self._dicom_service.get_series(organization.dicom_url, study.study_instance_uid)
+        result = self._dicom_service.get_series(organization.dicom_url, study.study_instance_uid, organization.dicom_cache_ttl)
 
         if not result.success:
             raise ValueError(result.error)
@@ -12,3 +12,4 @@ from .organization import *
 from .bookmark_report import *
 from .series import *
 from .user_role import *
+from .prediction_job import *
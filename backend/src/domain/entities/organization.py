@@ -16,6 +16,12 @@ class Organization(Entity, table=True):
     email: str | None = None
     address: str | None = None
     dicom_url: str
+
+    dicom_cache_ttl: int | None = None
+    """Time to live in seconds of the cached DICOM metadata queries, uses the default TTL if not specified"""
+
+    prediction_weight: int | None = None
+    """Fair share weight of the organization in the prediction queue, defaults to 1 if not specified"""
     
     users: list["User"] = Relationship(back_populates="organization")
     patients: list["Patient"] = Relationship(back_populates="organization")
@@ -0,0 +1,49 @@
+from datetime import datetime
+from sqlalchemy import Column, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+from domain.entities import Entity
+from domain.enums import JobStatus, MLModelType, PredictionPriority
+
+class PredictionJob(Entity, table=True):
+    """Prediction of a series queued for the prediction workers"""
+    __tablename__ = "prediction_jobs" # type: ignore
+    __table_args__ = (
+        # Only one active job per series and model, concurrent requests are coalesced into it
+        Index(
+            "ux_prediction_jobs_active_series_model",
+            "series_instance_uid",
+            "model_type",
+            unique=True,
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+    model_type: MLModelType = Field(index=True)
+    series_instance_uid: str = Field(index=True)
+    organization_id: str = Field(index=True)
+
+    priority: PredictionPriority = Field(default=PredictionPriority.ROUTINE, index=True)
+    """Priority class of the job, the database enum keeps the declaration order so it sorts from STAT to BACKFILL"""
+
+    weight: int = 1
+    """Fair share weight of the organization at the time of the request"""
+
+    payload: dict = Field(sa_column=Column(JSONB, nullable=False))
+    """Predict series command in JSON format"""
+
+    status: JobStatus = Field(default=JobStatus.QUEUED, index=True)
+    attempts: int = 0
+    max_attempts: int = 3
+
+    available_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    """Time when a queued job becomes visible to the workers, for a running job it's the lease expiration time"""
+
+    started_at: datetime | None = None
+    """Time when a worker leased the job for the first time"""
+
+    locked_by: str | None = None
+    """ID of the worker that leased the job"""
+
+    error: str | None = None
+    """Error of the last failed attempt"""
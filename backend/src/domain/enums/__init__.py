@@ -2,3 +2,5 @@ from .user_role_type import *
 from .gender import *
 from .prediction_status import *
 from .ml_model_type import *
+from .job_status import *
+from .prediction_priority import *
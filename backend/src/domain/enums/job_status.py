@@ -0,0 +1,13 @@
+from enum import Enum
+from typing import Self
+
+class JobStatus(str, Enum):
+    """Status of a prediction job in the queue"""
+    QUEUED = "queued" # Waiting for a worker
+    RUNNING = "running" # Leased by a worker, the ML service is processing the series
+    COMPLETED = "completed" # The ML service reported the prediction result
+    FAILED = "failed" # The prediction failed or the job ran out of attempts
+
+    @classmethod
+    def has_value(cls: type[Self], value: str) -> bool:
+        return value in cls._value2member_map_
@@ -0,0 +1,17 @@
+from enum import Enum
+from typing import Self
+
+class PredictionPriority(str, Enum):
+    """Priority class of a queued prediction, the higher classes are scheduled first"""
+    STAT = "stat" # Urgent request, e.g. a radiologist waiting on the result
+    ROUTINE = "routine" # Default priority of the user requests
+    BACKFILL = "backfill" # Bulk predictions of the archive, run only when the workers are idle
+
+    @property
+    def rank(self) -> int:
+        """Scheduling order of the priority, starting from 0 for the highest priority"""
+        return list(PredictionPriority).index(self)
+
+    @classmethod
+    def has_value(cls: type[Self], value: str) -> bool:
+        return value in cls._value2member_map_
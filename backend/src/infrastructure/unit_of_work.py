@@ -5,10 +5,9 @@ from .repository import Repository
 
 @DIContainer.register_scoped()
 class UnitOfWork:
-    _repositories: dict[type[Repository], Repository] = {}
-
     def __init__(self):
         self._session = DbContext.create_session()
+        self._repositories: dict[type[Repository], Repository] = {} # Per instance, the repositories are bound to the session
 
     def __enter__(self):
         return self
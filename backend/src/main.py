@@ -1,14 +1,30 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
 from core import ResultWithData
+from application.services.jobs import PredictionQueueSettings, get_prediction_job_queue
 from presentation.exception_handlers import http_error_handler, validation_error_handler
 from presentation.routers import auth_router, api_router
+from presentation.workers import PredictionWorker
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:    %(message)s")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Run the prediction worker in the API process unless the workers are deployed separately (src/worker.py)
+    worker = PredictionWorker(get_prediction_job_queue()) if PredictionQueueSettings.embedded_worker else None
+
+    if worker:
+        worker.start()
+
+    yield
+
+    if worker:
+        worker.stop(timeout=10)
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(api_router)
 app.include_router(auth_router)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_headers=["*"], allow_methods=["*"])
@@ -1,13 +1,17 @@
 from typing import Annotated
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from core import Mediator, ResultWithArray, ResultWithData, Result
 from application.queries.study.get_studies import GetStudiesQuery
 from application.queries.study.get_study_series import GetStudySeriesQuery, GetStudySeriesParams
-from application.commands.study.predict_series import PredictSeriesCommand
+from application.queries.study.get_prediction_queue_stats import GetPredictionQueueStatsQuery
+from application.queries.study.get_dicom_cache_stats import GetDicomCacheStatsQuery
+from application.commands.study.queue_predict_series import QueuePredictSeriesCommand
 from application.commands.study.update_predict_status import UpdatePredictStatusPayload
 from application.commands.study.update_predict_status import UpdatePredictionStatusCommand
 from application.models import StudyDto, SeriesDto
+from application.services.jobs import PredictionQueueStats
+from application.services.dicom import DicomCacheStats
 from domain.enums import PredictionStatus
 from presentation.routers.auth import jwt_required
 
@@ -49,14 +53,41 @@ async def get_study_series(
 
 @router.post("/series/predict", responses={400: {"description": "Bad request"}})
 async def predict_series(
-    command: PredictSeriesCommand,
-    background_tasks: BackgroundTasks,
+    command: QueuePredictSeriesCommand,
     #_: Annotated[dict, Depends(jwt_required)],
     mediator: Annotated[Mediator, Depends()],
 ) -> ResultWithData[PredictionStatus]:
 
-    background_tasks.add_task(mediator.send, command, ResultWithData[PredictionStatus])
-    result = ResultWithData[PredictionStatus].succeed(PredictionStatus.IN_PROGRESS)
+    result = mediator.send(command, ResultWithData[PredictionStatus])
+
+    if result.success is False:
+        raise HTTPException(status_code=400, detail=result.error)
+    
+    return result
+
+@router.get("/series/predict/stats", responses={400: {"description": "Bad request"}})
+async def get_prediction_queue_stats(
+    _: Annotated[dict, Depends(jwt_required)],
+    mediator: Annotated[Mediator, Depends()],
+) -> ResultWithArray[PredictionQueueStats]:
+
+    result = mediator.send(GetPredictionQueueStatsQuery(), ResultWithArray[PredictionQueueStats])
+
+    if result.success is False:
+        raise HTTPException(status_code=400, detail=result.error)
+    
+    return result
+
+@router.get("/cache/stats", responses={400: {"description": "Bad request"}})
+async def get_dicom_cache_stats(
+    _: Annotated[dict, Depends(jwt_required)],
+    mediator: Annotated[Mediator, Depends()],
+) -> ResultWithData[DicomCacheStats]:
+
+    result = mediator.send(GetDicomCacheStatsQuery(), ResultWithData[DicomCacheStats])
+
+    if result.success is False:
+        raise HTTPException(status_code=400, detail=result.error)
     
     return result
 
@@ -0,0 +1 @@
+from .prediction_worker import *
@@ -0,0 +1,129 @@
+import logging
+import os
+import socket
+import threading
+from core import DIContainer, Mediator, ResultWithData
+from application.commands.study.predict_series import PredictSeriesCommand
+from application.services import MLService
+from application.services.dicom import DicomService
+from application.services.jobs import PredictionJobQueue, PredictionQueueSettings
+from domain.entities import PredictionJob, Series
+from domain.enums import PredictionStatus
+from infrastructure import UnitOfWork
+
+class PredictionWorker:
+    """
+    Runs the queued series predictions in a pool of worker threads.
+    A job stays leased after its series is sent to the ML service until the service reports the result,
+    so the number of the running jobs per model is limited by the queue and the ML servers aren't oversubscribed.
+    """
+    _logger = logging.getLogger(__name__)
+
+    def __init__(self, job_queue: PredictionJobQueue, settings: PredictionQueueSettings | None = None) -> None:
+        self._job_queue = job_queue
+        self._settings = settings or PredictionQueueSettings()
+        self._mediator = Mediator()
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        if self._threads:
+            return
+        
+        self._stop_event.clear()
+
+        for i in range(self._settings.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self._worker_id}:{i}",), name=f"prediction-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        # The expired jobs are failed on a timer, the worker threads may never be idle under load
+        sweeper = threading.Thread(target=self._sweep_expired_jobs, name="prediction-expiry-sweeper", daemon=True)
+        sweeper.start()
+        self._threads.append(sweeper)
+
+        self._logger.info(f"Started {self._settings.workers} prediction worker threads in '{self._worker_id}'")
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the worker threads after they finish their current jobs"""
+        self._stop_event.set()
+
+        for thread in self._threads:
+            thread.join(timeout)
+
+        self._threads.clear()
+        self._logger.info(f"Stopped the prediction worker threads in '{self._worker_id}'")
+
+    def run_forever(self) -> None:
+        """Start the worker threads and block until the process is interrupted"""
+        self.start()
+
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _work(self, worker_id: str) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job = self._job_queue.dequeue(worker_id)
+
+                if job is None:
+                    self._stop_event.wait(self._settings.poll_interval)
+                    continue
+
+                self._run_job(job)
+            except Exception as e:
+                self._logger.error(f"Prediction worker '{worker_id}' failed to process the queue: {e}")
+                self._stop_event.wait(self._settings.poll_interval)
+
+    def _run_job(self, job: PredictionJob) -> None:
+        self._logger.info(f"Running prediction job '{job.id}' for series '{job.series_instance_uid}', attempt {job.attempts} of {job.max_attempts}")
+
+        try:
+            command = PredictSeriesCommand.model_validate(job.payload)
+            result = self._mediator.send(command, ResultWithData[PredictionStatus])
+        except Exception as e:
+            result = ResultWithData[PredictionStatus].fail(str(e))
+
+        if not result.success:
+            if not self._job_queue.retry(job.id, result.error or "Could not send the series for prediction"):
+                self._logger.error(f"Prediction job '{job.id}' failed after {job.attempts} attempts: {result.error}")
+            return
+
+        # Keep the job leased until the ML service reports the result unless there is nothing to predict
+        if result.data != PredictionStatus.IN_PROGRESS:
+            self._job_queue.complete(job.id)
+
+    def _sweep_expired_jobs(self) -> None:
+        while not self._stop_event.wait(self._settings.expiry_interval):
+            try:
+                self._fail_expired_jobs()
+            except Exception as e:
+                self._logger.error(f"Prediction worker '{self._worker_id}' failed to fail the expired jobs: {e}")
+
+    def _fail_expired_jobs(self) -> None:
+        for job in self._job_queue.fail_expired():
+            self._logger.error(f"Prediction job '{job.id}' for series '{job.series_instance_uid}' expired after {job.attempts} attempts")
+            self._remove_staged_series(job)
+
+            with UnitOfWork() as uow:
+                series_repo = uow.get_repository(Series)
+                series = series_repo.get_one(Series.series_instance_uid == job.series_instance_uid)
+
+                if series and series.prediction_status == PredictionStatus.IN_PROGRESS:
+                    series.prediction_status = PredictionStatus.FAILED
+                    series_repo.update(series)
+
+    def _remove_staged_series(self, job: PredictionJob) -> None:
+        """Remove the instances staged for an expired job, the ML service will never report its status"""
+        ml_service = DIContainer.get_default().resolve(MLService)
+
+        if ml_service.shared_staging_dir:
+            dicom_service = DIContainer.get_default().resolve(DicomService)
+            dicom_service.remove_staged_instances(ml_service.shared_staging_dir, job.series_instance_uid, job.model_type)
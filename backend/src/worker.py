@@ -0,0 +1,10 @@
+import logging
+from application.services.jobs import get_prediction_job_queue
+from presentation.routers import api_router # Import the routers to register the request handlers
+from presentation.workers import PredictionWorker
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:    %(message)s")
+
+if __name__ == "__main__":
+    worker = PredictionWorker(get_prediction_job_queue())
+    worker.run_forever()
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+_backend_dir = Path(__file__).resolve().parent.parent
+
+# The tests import the app modules from `src`, the same way the app runs
+sys.path.insert(0, str(_backend_dir / "src"))
+
+# The modules read their required variables on import, the environment and the `.env` file take precedence
+load_dotenv(_backend_dir / ".env.default")
@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from application.services.dicom import DicomInstanceStore
+
+class TestDicomInstanceStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = DicomInstanceStore(self.temp_dir.name, max_size=20)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def add(self, sop_instance_uid: str, size: int = 10) -> None:
+        writer = self.store.create_writer(sop_instance_uid)
+        writer.write(b"0" * size)
+        writer.commit()
+
+    def test_add_evicts_the_least_recently_used_instance(self):
+        # Arrange
+        self.add("1")
+        self.add("2")
+        self.store.get("1")
+
+        # Act
+        self.add("3")
+
+        # Assert
+        self.assertIsNotNone(self.store.get("1"))
+        self.assertIsNone(self.store.get("2"))
+        self.assertIsNotNone(self.store.get("3"))
+
+    def test_add_keeps_the_leased_instances(self):
+        # Arrange
+        self.add("1")
+
+        # Act
+        with self.store.lease(["1", "2", "3"]):
+            self.add("2")
+            self.add("3")
+            self.add("4")
+
+        # Assert
+        self.assertTrue(self.store.contains("1"))
+        self.assertTrue(self.store.contains("2"))
+        self.assertTrue(self.store.contains("3"))
+        self.assertTrue(self.store.contains("4"))
+
+    def test_lease_is_released_after_all_the_leases(self):
+        # Arrange
+        self.add("1")
+
+        # Act
+        with self.store.lease(["1"]):
+            with self.store.lease(["1"]):
+                pass
+
+            self.add("2")
+            self.add("3")
+            leased_instance_kept = self.store.contains("1")
+
+        self.add("4")
+
+        # Assert
+        self.assertTrue(leased_instance_kept)
+        self.assertFalse(self.store.contains("1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+from application.services.dicom import DicomMetadataCache
+
+class TestDicomMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = DicomMetadataCache(max_size=2, default_ttl=60)
+        self.key = DicomMetadataCache.create_key("http://pacs", "http://pacs/series", {"StudyInstanceUID": "1.2.3"})
+
+    def test_create_key_ignores_the_params_order(self):
+        key = DicomMetadataCache.create_key("http://pacs", "http://pacs/studies", {"a": "1", "b": "2"})
+        same_key = DicomMetadataCache.create_key("http://pacs", "http://pacs/studies", {"b": "2", "a": "1"})
+
+        self.assertEqual(key, same_key)
+
+    def test_get_counts_hits_and_misses(self):
+        # Act
+        missed_value = self.cache.get(self.key)
+        self.cache.set(self.key, [{"series": 1}])
+        cached_value = self.cache.get(self.key)
+
+        # Assert
+        self.assertIsNone(missed_value)
+        self.assertEqual(cached_value, [{"series": 1}])
+        self.assertEqual(self.cache.get_stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_get_with_expired_entry(self):
+        # Arrange
+        with patch("application.services.dicom.dicom_metadata_cache.time.monotonic", return_value=100):
+            self.cache.set(self.key, [], ttl=10)
+
+        # Act
+        with patch("application.services.dicom.dicom_metadata_cache.time.monotonic", return_value=111):
+            value = self.cache.get(self.key)
+
+        # Assert
+        self.assertIsNone(value)
+        self.assertEqual(self.cache.get_stats()["size"], 0)
+
+    def test_set_with_zero_ttl(self):
+        # Act
+        self.cache.set(self.key, [], ttl=0)
+
+        # Assert
+        self.assertIsNone(self.cache.get(self.key))
+
+    def test_set_evicts_the_least_recently_used_entry(self):
+        # Arrange
+        first_key = DicomMetadataCache.create_key("http://pacs", "http://pacs/studies/1")
+        second_key = DicomMetadataCache.create_key("http://pacs", "http://pacs/studies/2")
+        third_key = DicomMetadataCache.create_key("http://pacs", "http://pacs/studies/3")
+        self.cache.set(first_key, 1)
+        self.cache.set(second_key, 2)
+        self.cache.get(first_key)
+
+        # Act
+        self.cache.set(third_key, 3)
+
+        # Assert
+        self.assertEqual(self.cache.get(first_key), 1)
+        self.assertIsNone(self.cache.get(second_key))
+        self.assertEqual(self.cache.get(third_key), 3)
+
+    def test_invalidate_by_url(self):
+        # Arrange
+        other_key = DicomMetadataCache.create_key("http://other-pacs", "http://other-pacs/studies/1.2.3")
+        self.cache.set(self.key, 1)
+        self.cache.set(other_key, 2)
+
+        # Act
+        removed_count = self.cache.invalidate(dicom_url="http://pacs")
+
+        # Assert
+        self.assertEqual(removed_count, 1)
+        self.assertIsNone(self.cache.get(self.key))
+        self.assertEqual(self.cache.get(other_key), 2)
+
+    def test_invalidate_all(self):
+        # Arrange
+        self.cache.set(self.key, 1)
+        self.cache.set(DicomMetadataCache.create_key("http://other-pacs", "http://other-pacs/studies"), 2)
+
+        # Act
+        removed_count = self.cache.invalidate()
+
+        # Assert
+        self.assertEqual(removed_count, 2)
+        self.assertEqual(self.cache.get_stats()["size"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from application.services.dicom import MultipartReader, get_multipart_boundary
+
+class TestMultipartReader(unittest.TestCase):
+    def setUp(self):
+        self.boundary = "boundary-123"
+        self.body = (
+            b"--boundary-123\r\n"
+            b"Content-Type: application/dicom\r\n"
+            b"Content-Location: /studies/1/series/2/instances/1.2.3\r\n"
+            b"\r\n"
+            b"first instance\r\n\r\npayload"
+            b"\r\n--boundary-123\r\n"
+            b"Content-Type: application/dicom\r\n"
+            b"\r\n"
+            b"second instance"
+            b"\r\n--boundary-123--\r\n"
+        )
+
+    def read(self, chunk_size: int) -> tuple[MultipartReader, list[tuple[int, dict, bytes]]]:
+        reader = MultipartReader(self.boundary)
+        parts: dict[int, tuple[dict, bytearray]] = {}
+        completed: list[int] = []
+
+        for start in range(0, len(self.body), chunk_size):
+            for part, data in reader.feed(self.body[start:start + chunk_size]):
+                headers, payload = parts.setdefault(part.number, (part.headers, bytearray()))
+
+                if data is None:
+                    completed.append(part.number)
+                else:
+                    payload.extend(data)
+
+        return reader, [(number, parts[number][0], bytes(parts[number][1])) for number in completed]
+
+    def test_feed_with_the_whole_body(self):
+        # Act
+        reader, parts = self.read(len(self.body))
+
+        # Assert
+        self.assertTrue(reader.finished)
+        self.assertEqual(reader.parts_count, 2)
+        self.assertEqual([payload for _, _, payload in parts], [b"first instance\r\n\r\npayload", b"second instance"])
+        self.assertEqual(parts[0][1]["content-location"], "/studies/1/series/2/instances/1.2.3")
+        self.assertEqual(parts[1][1]["content-type"], "application/dicom")
+
+    def test_feed_with_chunks_splitting_the_delimiters(self):
+        expected_parts = self.read(len(self.body))[1]
+
+        for chunk_size in (1, 2, 3, 5, 7, 13):
+            with self.subTest(chunk_size=chunk_size):
+                # Act
+                reader, parts = self.read(chunk_size)
+
+                # Assert
+                self.assertTrue(reader.finished)
+                self.assertEqual(parts, expected_parts)
+
+    def test_feed_with_incomplete_body(self):
+        # Arrange
+        reader = MultipartReader(self.boundary)
+
+        # Act
+        list(reader.feed(self.body[:120]))
+
+        # Assert
+        self.assertFalse(reader.finished)
+        self.assertEqual(reader.parts_count, 1)
+
+    def test_get_multipart_boundary(self):
+        self.assertEqual(get_multipart_boundary('multipart/related; type="application/dicom"; boundary="abc"'), "abc")
+        self.assertEqual(get_multipart_boundary("multipart/related; boundary=abc"), "abc")
+        self.assertIsNone(get_multipart_boundary("application/dicom"))
+        self.assertIsNone(get_multipart_boundary("multipart/related"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+import unittest
+from application.services.jobs import MemoryPredictionJobQueue, PredictionQueueSettings
+from domain.enums import JobStatus, MLModelType, PredictionPriority
+
+class TestMemoryPredictionJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.settings = PredictionQueueSettings()
+        self.settings.model_concurrency = 10
+        self.settings.model_limits = {}
+        self.settings.visibility_timeout = 1800
+        self.settings.max_attempts = 3
+        self.settings.retry_delay = 0
+        self.queue = MemoryPredictionJobQueue(self.settings)
+
+    def enqueue(
+            self,
+            series: str,
+            organization: str = "org-1",
+            model_type: MLModelType = MLModelType.CHEST_XRAY_CLASSIFICATION,
+            priority: PredictionPriority = PredictionPriority.ROUTINE,
+            weight: int = 1,
+        ):
+        return self.queue.enqueue(model_type, series, {"series": series}, organization, priority, weight)
+
+    def test_dequeue_leases_the_queued_job(self):
+        # Arrange
+        job = self.enqueue("1.2.3")
+
+        # Act
+        leased_job = self.queue.dequeue("worker-1")
+
+        # Assert
+        self.assertIsNotNone(leased_job)
+        self.assertEqual(leased_job.id, job.id)
+        self.assertEqual(leased_job.status, JobStatus.RUNNING)
+        self.assertEqual(leased_job.attempts, 1)
+        self.assertEqual(leased_job.locked_by, "worker-1")
+        self.assertIsNone(self.queue.dequeue("worker-2"))
+
+    def test_dequeue_with_empty_queue(self):
+        self.assertIsNone(self.queue.dequeue("worker-1"))
+
+    def test_complete_removes_the_job(self):
+        # Arrange
+        job = self.enqueue("1.2.3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        self.queue.complete(job.id)
+
+        # Assert
+        self.assertEqual(job.status, JobStatus.COMPLETED)
+        self.assertIsNone(self.queue.get_running("1.2.3", MLModelType.CHEST_XRAY_CLASSIFICATION))
+        self.assertIsNot(self.enqueue("1.2.3"), job)
+
+    def test_expired_lease_redelivers_the_job(self):
+        # Arrange
+        self.settings.visibility_timeout = 0
+        job = self.enqueue("1.2.3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        redelivered_job = self.queue.dequeue("worker-2")
+
+        # Assert
+        self.assertIsNotNone(redelivered_job)
+        self.assertEqual(redelivered_job.id, job.id)
+        self.assertEqual(redelivered_job.attempts, 2)
+        self.assertEqual(redelivered_job.locked_by, "worker-2")
+
+    def test_fail_expired_fails_the_jobs_out_of_attempts(self):
+        # Arrange
+        self.settings.visibility_timeout = 0
+        self.settings.max_attempts = 1
+        job = self.enqueue("1.2.3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        expired_jobs = self.queue.fail_expired()
+
+        # Assert
+        self.assertEqual([expired_job.id for expired_job in expired_jobs], [job.id])
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIsNone(self.queue.dequeue("worker-2"))
+
+    def test_fail_expired_keeps_the_leased_jobs(self):
+        # Arrange
+        self.settings.max_attempts = 1
+        self.enqueue("1.2.3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        expired_jobs = self.queue.fail_expired()
+
+        # Assert
+        self.assertEqual(expired_jobs, [])
+
+    def test_retry_requeues_the_job_until_out_of_attempts(self):
+        # Arrange
+        self.settings.max_attempts = 2
+        job = self.enqueue("1.2.3")
+
+        # Act
+        self.queue.dequeue("worker-1")
+        first_retry = self.queue.retry(job.id, "error 1")
+        self.queue.dequeue("worker-1")
+        second_retry = self.queue.retry(job.id, "error 2")
+
+        # Assert
+        self.assertTrue(first_retry)
+        self.assertFalse(second_retry)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, "error 2")
+
+    def test_enqueue_coalesces_the_same_series_and_model(self):
+        # Act
+        job = self.enqueue("1.2.3")
+        same_job = self.enqueue("1.2.3", organization="org-2")
+        other_model_job = self.enqueue("1.2.3", model_type=MLModelType.LUNG_TUMOR_SEGMENTATION)
+
+        # Assert
+        self.assertIs(same_job, job)
+        self.assertIsNot(other_model_job, job)
+
+    def test_enqueue_coalesces_into_the_running_job(self):
+        # Arrange
+        job = self.enqueue("1.2.3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        same_job = self.enqueue("1.2.3")
+
+        # Assert
+        self.assertIs(same_job, job)
+        self.assertIsNone(self.queue.dequeue("worker-2"))
+
+    def test_enqueue_promotes_the_queued_job(self):
+        # Arrange
+        job = self.enqueue("1.2.3", priority=PredictionPriority.BACKFILL)
+
+        # Act
+        self.enqueue("1.2.3", priority=PredictionPriority.STAT)
+        self.enqueue("1.2.3", priority=PredictionPriority.ROUTINE)
+
+        # Assert
+        self.assertEqual(job.priority, PredictionPriority.STAT)
+
+    def test_dequeue_orders_by_priority(self):
+        # Arrange
+        self.enqueue("1", priority=PredictionPriority.BACKFILL)
+        self.enqueue("2", priority=PredictionPriority.ROUTINE)
+        self.enqueue("3", priority=PredictionPriority.STAT)
+
+        # Act
+        series = [self.queue.dequeue("worker-1").series_instance_uid for _ in range(3)]
+
+        # Assert
+        self.assertEqual(series, ["3", "2", "1"])
+
+    def test_dequeue_shares_the_workers_between_organizations(self):
+        # Arrange
+        self.enqueue("a1", organization="org-a")
+        self.enqueue("a2", organization="org-a")
+        self.enqueue("b1", organization="org-b")
+
+        # Act
+        series = [self.queue.dequeue("worker-1").series_instance_uid for _ in range(3)]
+
+        # Assert
+        self.assertEqual(series, ["a1", "b1", "a2"])
+
+    def test_dequeue_weights_the_fair_share(self):
+        # Arrange
+        self.enqueue("a1", organization="org-a", weight=4)
+        self.enqueue("b1", organization="org-b")
+        self.queue.dequeue("worker-1")
+        self.queue.dequeue("worker-1")
+        self.enqueue("b2", organization="org-b")
+        self.enqueue("a2", organization="org-a", weight=4)
+
+        # Act
+        job = self.queue.dequeue("worker-1")
+
+        # Assert
+        self.assertEqual(job.series_instance_uid, "a2")
+
+    def test_dequeue_respects_the_model_limit(self):
+        # Arrange
+        self.settings.model_limits = {MLModelType.CHEST_XRAY_CLASSIFICATION.value: 1}
+        self.enqueue("1")
+        self.enqueue("2")
+        self.enqueue("3", model_type=MLModelType.LUNG_TUMOR_SEGMENTATION)
+
+        # Act
+        first_job = self.queue.dequeue("worker-1")
+        second_job = self.queue.dequeue("worker-1")
+        third_job = self.queue.dequeue("worker-1")
+
+        # Assert
+        self.assertEqual(first_job.series_instance_uid, "1")
+        self.assertEqual(second_job.series_instance_uid, "3")
+        self.assertIsNone(third_job)
+
+    def test_get_stats_counts_the_jobs_per_priority(self):
+        # Arrange
+        self.enqueue("1", priority=PredictionPriority.STAT)
+        self.enqueue("2")
+        self.enqueue("3")
+        self.queue.dequeue("worker-1")
+
+        # Act
+        stats = {item.priority: item for item in self.queue.get_stats()}
+
+        # Assert
+        self.assertEqual((stats[PredictionPriority.STAT].queued, stats[PredictionPriority.STAT].running), (0, 1))
+        self.assertEqual((stats[PredictionPriority.ROUTINE].queued, stats[PredictionPriority.ROUTINE].running), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
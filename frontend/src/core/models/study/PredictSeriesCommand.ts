@@ -1,4 +1,5 @@
 import {MLModelType} from "./MLModelType";
+import {PredictionPriority} from "./PredictionPriority";
 
 export interface PredictSeriesCommand {
   organization: string;
@@ -7,4 +8,5 @@ export interface PredictSeriesCommand {
   modelType: MLModelType;
   bodyPart?: string;
   predictAgain?: boolean;
+  priority?: PredictionPriority;
 }
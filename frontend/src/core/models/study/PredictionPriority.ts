@@ -0,0 +1,5 @@
+export enum PredictionPriority {
+  STAT = "stat",
+  ROUTINE = "routine",
+  BACKFILL = "backfill",
+}
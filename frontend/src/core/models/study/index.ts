@@ -3,5 +3,6 @@ export * from "./GetStudySeriesQuery";
 export * from "./SeriesDto";
 export * from "./StudyDto";
 export * from "./PredictionStatus";
+export * from "./PredictionPriority";
 export * from "./MLModelType";
 export * from "./PredictSeriesCommand";